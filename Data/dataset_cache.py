@@ -0,0 +1,220 @@
+# job_portal_dashboard/dataset_cache.py
+
+"""
+Server-side registry of loaded datasets.
+
+The browser only holds a short 'dataset version' string (dcc.Store 'dataset-version');
+callbacks look the DataFrame up here instead of receiving it from the client. Anything
+derived from a dataset (search indexes, aggregates, ...) is cached against its version,
+so it is built once per load and dropped together with the dataset.
+
+Datasets can also be registered per site (siteInstanceID): each site's rows are their own
+partition with their own version, so caches and aggregates of a site only ever touch that
+site's rows, and reloading one site leaves the versions (and caches) of the others intact.
+Only the partitions hold rows. The "all sites" view is a recipe (its partition versions and
+how to combine them) under a version derived from the partition versions; its frame is built
+from the partitions the first time it is looked up, the same way after a load or a refresh.
+
+The registry lives in the Dash server process. If a version is unknown (server restart,
+another worker) get_dataset() returns None and callers fall back to their empty state
+until the next data load.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# Number of dataset versions kept in memory (all-sites views and loads without a site column)
+MAX_VERSIONS = 4
+# Number of per-site partition versions kept in memory (all sites of both sources plus refreshes)
+MAX_PARTITION_VERSIONS = int(os.getenv('MAX_PARTITION_VERSIONS', 256))
+SITE_COLUMN = 'siteInstanceID'
+ALL_SITES = 'all'
+MISSING_SITE = '<NA>'  # Site key of the rows without a siteInstanceID
+# Derived objects kept per version (least recently used are dropped first)
+MAX_DERIVED_PER_VERSION = 64
+
+_datasets = OrderedDict()   # version -> DataFrame
+_partitions = set()         # versions registered as site partitions
+_all_sites = OrderedDict()  # all-sites version -> (source, partition versions, combine)
+_derived = {}               # version -> OrderedDict {name: derived object}
+_lock = threading.RLock()
+
+
+def dataset_version(df, source):
+    """
+    Content hash of a DataFrame. Identical reloads give the same version, so caches
+    built for the previous load are reused.
+    """
+    if df is None or df.empty:
+        return f"{source}-empty"
+    content_hash = pd.util.hash_pandas_object(df, index=False).sum()
+    return f"{source}-{len(df)}-{int(content_hash) & 0xFFFFFFFFFFFF:012x}"
+
+
+def register_dataset(df, source, version=None, partition=False):
+    """
+    Stores a loaded DataFrame and returns its version string.
+
+    Args:
+        df (pd.DataFrame): The cleaned frame returned by load_data() / load_unique_most_recent_data().
+        source (str): Data source key ('full', 'latest_unique' or 'summary').
+        version (str, optional): Precomputed version (defaults to the content hash).
+        partition (bool): True for a per-site partition (kept under MAX_PARTITION_VERSIONS).
+
+    Returns:
+        str: Version to put in the 'dataset-version' store.
+    """
+    version = version or dataset_version(df, source)
+    with _lock:
+        if version in _datasets:
+            _datasets.move_to_end(version)
+            return version
+
+        _datasets[version] = df
+        _derived[version] = OrderedDict()
+        if partition:
+            _partitions.add(version)
+
+        # Evict the least recently registered versions of the same kind and everything derived from them
+        same_kind = [v for v in _datasets if (v in _partitions) == partition]
+        limit = MAX_PARTITION_VERSIONS if partition else MAX_VERSIONS
+        for old_version in same_kind[:max(len(same_kind) - limit, 0)]:
+            del _datasets[old_version]
+            _derived.pop(old_version, None)
+            _partitions.discard(old_version)
+            print(f"Evicted dataset version {old_version} from cache.")
+
+    print(f"Registered dataset version {version} ({len(df) if df is not None else 0} rows).")
+    return version
+
+
+def register_partitions(df, source, site_versions=None, prepare=None):
+    """
+    Registers one partition per site of a loaded DataFrame.
+
+    Args:
+        df (pd.DataFrame): Rows of all sites, or only of the sites being refreshed.
+        source (str): Data source key ('full', 'latest_unique' or 'summary').
+        site_versions (dict, optional): Current site -> version map; sites not present in df keep
+                                        their partition (and its cached aggregates).
+        prepare (callable, optional): Applied to each site's rows before they are registered
+                                      (e.g. the 'latest_unique' deduplication).
+
+    Returns:
+        dict: Site (str) -> partition version. Empty if df has no SITE_COLUMN.
+    """
+    site_versions = dict(site_versions or {})
+    if df is None or SITE_COLUMN not in df.columns:
+        return site_versions
+
+    sites = df[SITE_COLUMN]
+    if pd.api.types.is_float_dtype(sites):
+        # Rows without a site turn the integer column into floats; keep the keys '107', not '107.0'
+        sites = sites.astype('Int64')
+    sites = sites.astype(str)
+    for site, rows in df.groupby(sites, sort=True).indices.items():
+        partition = df.iloc[rows].reset_index(drop=True)
+        if prepare is not None:
+            partition = prepare(partition)
+        site_versions[site] = register_dataset(partition, f"{source}-site{site}", partition=True)
+    return site_versions
+
+
+def all_sites_version(site_versions, source, combine=None):
+    """
+    Returns the version of the rows of all site partitions, without building them (see get_dataset()).
+    The version is derived from the partition versions, so it changes only when a site is reloaded.
+
+    Args:
+        combine (callable, optional): Applied to the concatenated partitions (e.g. the 'latest_unique'
+                                      deduplication, so a user seen on several sites is counted once).
+    """
+    digest = hashlib.sha1('|'.join(f"{site}={site_versions[site]}" for site in sorted(site_versions))
+                          .encode()).hexdigest()[:12]
+    version = f"{source}-{ALL_SITES}-{digest}"
+    with _lock:
+        _all_sites[version] = (source, [site_versions[site] for site in sorted(site_versions)], combine)
+        _all_sites.move_to_end(version)
+        while len(_all_sites) > MAX_VERSIONS:
+            _all_sites.popitem(last=False)
+    return version
+
+
+def _build_all_sites(version):
+    """Concatenates (and combines) the partitions of an all-sites version; None if one of them is gone."""
+    with _lock:
+        recipe = _all_sites.get(version)
+    if recipe is None:
+        return None
+    source, partition_versions, combine = recipe
+    parts = [get_dataset(partition_version) for partition_version in partition_versions]
+    if any(part is None for part in parts):
+        return None
+    df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+    if combine is not None:
+        df = combine(df)
+    register_dataset(df, source, version=version)
+    return df
+
+
+def get_dataset(version):
+    """
+    Returns the DataFrame registered under 'version', or None if it is not (or no longer) cached.
+    An all-sites version is built from its partitions on first use.
+    """
+    if version is None:
+        return None
+    with _lock:
+        df = _datasets.get(version)
+    if df is None:
+        df = _build_all_sites(version)
+    return df
+
+
+def peek_derived(version, name):
+    """Returns the object cached as 'name' for a dataset version without building it (None if not built yet)."""
+    with _lock:
+        cached = _derived.get(version, {})
+        if name not in cached:
+            return None
+        cached.move_to_end(name)
+        return cached[name]
+
+
+def get_derived(version, name, builder):
+    """
+    Returns the object cached as 'name' for a dataset version, building it on first use.
+
+    Args:
+        version (str): Dataset version.
+        name (str or tuple): Cache key within the version (e.g. 'job_title_index').
+        builder (callable): Called with the DataFrame to build the object.
+
+    Returns:
+        The cached object, or None if the dataset version is unknown.
+    """
+    df = get_dataset(version)
+    if df is None:
+        return None
+
+    with _lock:
+        cached = _derived.get(version, {})
+        if name in cached:
+            cached.move_to_end(name)
+            return cached[name]
+
+    # Build outside the lock so a slow build does not block other versions
+    result = builder(df)
+
+    with _lock:
+        cached = _derived.get(version)
+        if cached is None:
+            return result
+        result = cached.setdefault(name, result)
+        while len(cached) > MAX_DERIVED_PER_VERSION:
+            cached.popitem(last=False)
+    return result
@@ -0,0 +1,223 @@
+# job_portal_dashboard/datasetmongo.py
+
+"""
+MongoDB read backend for the dashboard.
+
+Reads the collections filled by main_file/mongoconnector.py:
+
+- load_raw_data() returns the rows load_data() reads from MySQL (the newest LOAD_LIMIT by id,
+  or one site's rows of the same id window, same column names), so Data.datasetsql.load_data()
+  can serve the dashboard from Mongo when MySQL is down, or always with DATA_BACKEND=mongo.
+- aggregate_counts() turns page filters (dates, countries, sites) and a grouping (GROUP_KEYS)
+  into one $match / $group / $project pipeline on job_data, so counts per day, country,
+  status, device, ... come back pre-aggregated instead of as rows.
+- load_raw_summary() returns the daily counts per day, site, country, status, device and
+  registration source for Data.datasetsql.load_summary_data(): the summary collection kept up
+  to date by the connector, or the same counts grouped from job_data by aggregate_counts()
+  while that collection is empty. The pages sum these counts instead of counting rows.
+
+Check the pipelines against a local mongod with: python -m Data.datasetmongo
+"""
+
+import os
+from datetime import timedelta
+
+import pandas as pd
+import pymongo
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Collection written by main_file/mongoconnector.py (MONGO_URI in .env holds the SQL config, not the data)
+MONGO_DATA_URI = os.getenv('MONGO_DATA_URI', 'mongodb://localhost:27017/')
+MONGO_DATA_DB = os.getenv('MONGO_DATA_DB', 'job_database')
+MONGO_DATA_COLLECTION = os.getenv('MONGO_DATA_COLLECTION', 'job_data')
+MONGO_SUMMARY_COLLECTION = os.getenv('MONGO_SUMMARY_COLLECTION', 'jobseeker_daily_summary')
+SERVER_TIMEOUT_MS = 3000  # Fail fast when mongod is down instead of pymongo's 30s default
+
+LOAD_LIMIT = 20000  # Newest rows loaded over all sites, by both backends of Data.datasetsql.load_data()
+
+
+def _status_expression():
+    """jobpage_status of load_data(): 'Active' if status is 'active' (trimmed, any case), else 'Inactive'."""
+    status = {'$toLower': {'$trim': {'input': {'$ifNull': ['$status', '']}}}}
+    return {'$cond': [{'$eq': [status, 'active']}, 'Active', 'Inactive']}
+
+
+def _label_expression(field):
+    """Trimmed string value of a field, 'Unknown' when missing (as load_data() cleans dtype / regsource)."""
+    return {'$ifNull': [{'$trim': {'input': {'$toString': f'${field}'}}}, 'Unknown']}
+
+
+# Grouping key -> aggregation expression
+GROUP_KEYS = {
+    'day': {'$dateToString': {'format': '%Y-%m-%d', 'date': '$dateUTC'}},
+    'month': {'$dateToString': {'format': '%Y-%m', 'date': '$dateUTC'}},
+    'country': '$countryCode',
+    'status': _status_expression(),
+    'device': _label_expression('deviceType'),
+    'regsource': _label_expression('registerSource'),
+    'site': '$siteInstanceID',
+}
+
+# Summary column of each grouping key (the names of the summary collection and MySQL table)
+SUMMARY_GROUPING = {'day': 'dateUTC', 'site': 'siteInstanceID', 'country': 'countryCode', 'status': 'status',
+                    'device': 'deviceType', 'regsource': 'registerSource'}
+
+_client = None
+
+
+def get_collection():
+    """The job_data collection (one pooled client per process)."""
+    global _client
+    if _client is None:
+        _client = pymongo.MongoClient(MONGO_DATA_URI, serverSelectionTimeoutMS=SERVER_TIMEOUT_MS)
+    return _client[MONGO_DATA_DB][MONGO_DATA_COLLECTION]
+
+
+def match_stage(start_date=None, end_date=None, countries=None, site_ids=None):
+    """
+    $match of the page filters: dates inclusive of both days, countries and sites as $in.
+    Documents without a dateUTC are left out, as load_data() drops them. Site 0 (how the daily
+    summary keys a missing site) also matches documents without a site.
+    """
+    dates = {'$type': 'date'}
+    if start_date is not None:
+        dates['$gte'] = pd.Timestamp(start_date).normalize().to_pydatetime()
+    if end_date is not None:
+        dates['$lt'] = (pd.Timestamp(end_date).normalize() + timedelta(days=1)).to_pydatetime()
+    match = {'dateUTC': dates}
+    if countries:
+        match['countryCode'] = {'$in': list(countries)}
+    if site_ids:
+        sites = [None if site is None else int(site) for site in site_ids]
+        match['siteInstanceID'] = {'$in': sites + [None] if 0 in sites else sites}
+    return {'$match': match}
+
+
+def count_pipeline(group_by, start_date=None, end_date=None, countries=None, site_ids=None, latest=None):
+    """
+    Aggregation pipeline counting the documents per combination of the 'group_by' keys
+    (see GROUP_KEYS) for the page filters. With 'latest', only the newest 'latest' documents
+    by id are counted, i.e. the rows load_data() would load.
+    """
+    pipeline = []
+    if latest:
+        pipeline += [{'$sort': {'id': -1}}, {'$limit': int(latest)}]
+    pipeline += [
+        match_stage(start_date, end_date, countries, site_ids),
+        {'$group': {'_id': {key: GROUP_KEYS[key] for key in group_by}, 'count': {'$sum': 1}}},
+        {'$project': {'_id': 0, **{key: f'$_id.{key}' for key in group_by}, 'count': 1}},
+        {'$sort': {key: 1 for key in group_by}},
+    ]
+    return pipeline
+
+
+def aggregate_counts(group_by, start_date=None, end_date=None, countries=None, site_ids=None, latest=None):
+    """
+    Runs count_pipeline() on the collection.
+
+    Returns:
+        pd.DataFrame: One row per group with the 'group_by' columns and 'count'.
+    """
+    rows = list(get_collection().aggregate(count_pipeline(group_by, start_date, end_date, countries, site_ids,
+                                                          latest), allowDiskUse=True))
+    return pd.DataFrame(rows, columns=list(group_by) + ['count'])
+
+
+def load_raw_data(site_ids=None, since_id=None, limit=LOAD_LIMIT):
+    """
+    The newest 'limit' documents by id with the MySQL column names, before load_data()'s cleaning.
+    With 'site_ids' only those sites' documents, from 'since_id' on if given (the id window of the
+    last full load) instead of the newest 'limit'. Raises pymongo errors if mongod is unreachable.
+    """
+    match = {}
+    if site_ids:
+        # {'$in': [None]} also matches documents without a site
+        match['siteInstanceID'] = {'$in': [None if site is None else int(site) for site in site_ids]}
+        if since_id is not None:
+            match['id'] = {'$gte': int(since_id)}
+            limit = None
+    pipeline = [{'$match': match}, {'$sort': {'id': -1}}]
+    if limit:
+        pipeline.append({'$limit': int(limit)})
+    pipeline.append({'$project': {'_id': 0}})
+    return pd.DataFrame(list(get_collection().aggregate(pipeline, allowDiskUse=True)))
+
+
+def summary_counts(site_ids=None, days=None):
+    """
+    The daily summary computed from job_data by one grouped pipeline (see aggregate_counts()),
+    with the summary's column names and a missing site counted as site 0.
+    """
+    start_date = None
+    if days:
+        newest = get_collection().find_one({'dateUTC': {'$type': 'date'}}, {'dateUTC': 1}, sort=[('dateUTC', -1)])
+        if newest is not None:
+            start_date = pd.Timestamp(newest['dateUTC']).normalize() - timedelta(days=int(days) - 1)
+    counts = aggregate_counts(list(SUMMARY_GROUPING), start_date=start_date, site_ids=site_ids)
+    counts = counts.rename(columns={**SUMMARY_GROUPING, 'count': 'applications'})
+    counts['siteInstanceID'] = counts['siteInstanceID'].fillna(0)
+    return counts
+
+
+def load_raw_summary(site_ids=None, days=None):
+    """
+    The daily summary documents (only 'site_ids' if given) of the last 'days' days before the
+    newest summarized day of any site (as in the MySQL query, so a refreshed site covers the same
+    days as in a load of all sites), without _id. While the summary collection is empty (never
+    built by the connector) the counts are grouped from job_data instead (summary_counts()).
+    Raises pymongo errors if mongod is unreachable.
+    """
+    summary = get_collection().database[MONGO_SUMMARY_COLLECTION]
+    if summary.find_one({}, {'_id': 1}) is None:
+        print(f"Summary collection {MONGO_SUMMARY_COLLECTION} is empty; grouping {MONGO_DATA_COLLECTION} instead.")
+        return summary_counts(site_ids, days)
+    query = {}
+    if days:
+        newest = summary.find_one({}, {'dateUTC': 1}, sort=[('dateUTC', -1)])
+        if newest is not None:
+            query['dateUTC'] = {'$gt': newest['dateUTC'] - timedelta(days=int(days))}
+    if site_ids:
+        query['siteInstanceID'] = {'$in': [int(site) for site in site_ids]}
+    return pd.DataFrame(list(summary.find(query, {'_id': 0})))
+
+
+if __name__ == '__main__':
+    # Checks that a site read over the loaded id window matches that site's rows of the full load,
+    # compares the pipelines with the same counts computed by pandas on the loaded rows, and the
+    # daily summary against the documents
+    df = load_raw_data()
+    print(f"Loaded {len(df)} documents from {MONGO_DATA_DB}.{MONGO_DATA_COLLECTION}.")
+    if df.empty:
+        raise SystemExit("Collection is empty; load it with main_file/mongoconnector.py first.")
+
+    newest_first = df['id'].is_monotonic_decreasing and len(df) <= LOAD_LIMIT
+    site = df['siteInstanceID'].value_counts().index[0]
+    refreshed = load_raw_data([site], since_id=df['id'].min())
+    same_rows = refreshed['id'].tolist() == df.loc[df['siteInstanceID'] == site, 'id'].tolist()
+    print(f"Newest {len(df)} rows first, site {site} refreshed over the same window: "
+          f"{'OK' if newest_first and same_rows else 'MISMATCH (documents added since the load?)'}")
+
+    df = df[df['dateUTC'].notna()]
+    expected = pd.DataFrame({
+        'day': pd.to_datetime(df['dateUTC']).dt.strftime('%Y-%m-%d'),
+        'country': df['countryCode'],
+        'status': df['status'].map(lambda x: 'Active' if str(x).strip().lower() == 'active' else 'Inactive'),
+        'device': df['deviceType'].fillna('Unknown').astype(str).str.strip(),
+    })
+    for group_by in (['day', 'status'], ['country', 'status'], ['day', 'device']):
+        counts = aggregate_counts(group_by, latest=LOAD_LIMIT)
+        reference = expected.groupby(group_by).size().reset_index(name='count')
+        same = counts.sort_values(group_by).reset_index(drop=True).equals(
+            reference.sort_values(group_by).reset_index(drop=True))
+        print(f"{' x '.join(group_by):>15}: {len(counts)} groups, {'OK' if same else 'MISMATCH'}")
+
+    summary = load_raw_summary()
+    documents = get_collection().count_documents({'dateUTC': {'$type': 'date'}})
+    summarized = int(summary['applications'].sum()) if not summary.empty else 0
+    print(f"Daily summary: {len(summary)} rows counting {summarized} of {documents} dated documents: "
+          f"{'OK' if summarized == documents else 'MISMATCH (run mongoconnector.py --rebuild-summary)'}")
+    grouped = int(summary_counts()['applications'].sum())
+    print(f"Grouped summary: {grouped} of {documents} dated documents: "
+          f"{'OK' if grouped == documents else 'MISMATCH'}")
@@ -10,6 +10,9 @@ import sys
 import os
 from dotenv import load_dotenv
 
+from Data.datasetmongo import load_raw_data as load_raw_mongo_data, load_raw_summary as load_raw_mongo_summary, \
+    MONGO_DATA_DB, MONGO_DATA_COLLECTION, MONGO_SUMMARY_COLLECTION, LOAD_LIMIT
+
 # --- 0. Load Environment Variables ---
 # This loads the variables from the .env file into the system environment
 load_dotenv()
@@ -20,6 +23,13 @@ MONGO_URI = os.getenv('MONGO_URI')
 MONGO_DB_NAME = os.getenv('MONGO_DB_NAME')
 MONGO_COLLECTION_NAME = os.getenv('MONGO_COLLECTION_NAME')
 
+# Backend of the dashboard reads: 'mysql' (falls back to MongoDB when MySQL fails) or 'mongo'
+DATA_BACKEND = os.getenv('DATA_BACKEND', 'mysql').strip().lower()
+
+# Daily summary maintained by the connectors (see load_summary_data)
+SUMMARY_TABLE_NAME = os.getenv('SUMMARY_TABLE_NAME', 'jobseeker_daily_summary')
+SUMMARY_DAYS = int(os.getenv('SUMMARY_DAYS', '365'))  # Days of summary loaded, counted back from the newest day
+
 
 def get_config_from_mongo():
     """
@@ -87,18 +97,17 @@ print({k: v if k != 'password' else '******' for k, v in DB_CONFIG.items()})
 
 # --- 4. Data Loading Functions ---
 
-def load_data():
+def load_raw_sql_data(site_ids=None, since_id=None):
     """
-    Loads job seeker data from a MySQL database.
-    Performs initial data cleaning and feature engineering.
-    This is the PRIMARY data source.
+    Reads the newest LOAD_LIMIT rows (over all sites) from MySQL (raw columns). With 'site_ids'
+    only those sites' rows are read, from 'since_id' (the lowest id of the last full load) on,
+    so a refreshed site covers the same window as the other sites.
+    Returns None if MySQL is not configured or fails.
     """
-    df = pd.DataFrame()
-
     # Ensure we have a valid config before trying to connect
     if not DB_CONFIG or not DB_CONFIG.get('host'):
         print("❌ Critical Error: No Database Configuration available.")
-        return df
+        return None
 
     try:
         # Create SQLAlchemy engine for MySQL
@@ -107,19 +116,135 @@ def load_data():
             f"@{DB_CONFIG['host']}/{DB_CONFIG['database']}"
         )
         engine = create_engine(engine_url)
+        table = DB_CONFIG['table_name']
 
         # SQL query to select all necessary columns.
-        sql_query = f"SELECT * FROM {DB_CONFIG['table_name']} ORDER BY id DESC LIMIT 20000;"
+        params = None
+        where = ""
+        limit = f"LIMIT {LOAD_LIMIT}"
+        if site_ids:
+            # One idx_site_id range per site (<=> also matches rows without a site)
+            sites = " OR ".join(f"siteInstanceID <=> %(site{i})s" for i in range(len(site_ids)))
+            where = f"WHERE ({sites}) "
+            params = {f"site{i}": site for i, site in enumerate(site_ids)}
+            if since_id is not None:
+                where += "AND id >= %(since_id)s "
+                params['since_id'] = int(since_id)
+                limit = ""
+        sql_query = f"SELECT * FROM {table} {where}ORDER BY id DESC {limit};"
 
         # Load data from SQL into a Pandas DataFrame
-        df = pd.read_sql(sql_query, engine)
-        print(f"Data loaded from MySQL table: {DB_CONFIG['table_name']}.")
+        df = pd.read_sql(sql_query, engine, params=params)
+        print(f"Data loaded from MySQL table: {table}.")
+        return df
 
     except Exception as e:
         print(f"Error loading data from MySQL: {e}")
-        # Return empty DF or handle error as needed
-        return pd.DataFrame()
+        return None
+
+
+def load_raw_sql_summary(site_ids=None, days=SUMMARY_DAYS):
+    """
+    Reads the last 'days' days of the daily summary table from MySQL. Returns None if MySQL is
+    not configured or fails (e.g. the summary table was not created yet).
+    """
+    if not DB_CONFIG or not DB_CONFIG.get('host'):
+        print("❌ Critical Error: No Database Configuration available.")
+        return None
+
+    try:
+        engine_url = (
+            f"mysql+pymysql://{DB_CONFIG['user']}:{DB_CONFIG['password']}"
+            f"@{DB_CONFIG['host']}/{DB_CONFIG['database']}"
+        )
+        engine = create_engine(engine_url)
+
+        params = {'days': days}
+        where = f"WHERE dateUTC > (SELECT MAX(dateUTC) FROM {SUMMARY_TABLE_NAME}) - INTERVAL %(days)s DAY "
+        if site_ids:
+            placeholders = ", ".join(f"%(site{i})s" for i in range(len(site_ids)))
+            where += f"AND siteInstanceID IN ({placeholders}) "
+            params.update({f"site{i}": site for i, site in enumerate(site_ids)})
+        sql_query = f"SELECT * FROM {SUMMARY_TABLE_NAME} {where}ORDER BY dateUTC;"
+
+        df = pd.read_sql(sql_query, engine, params=params)
+        print(f"Summary loaded from MySQL table: {SUMMARY_TABLE_NAME}.")
+        return df
+
+    except Exception as e:
+        print(f"Error loading summary from MySQL: {e}")
+        return None
 
+
+def load_data(site_ids=None, since_id=None):
+    """
+    Loads job seeker data from MySQL, the PRIMARY data source, or from the MongoDB collection
+    (Data/datasetmongo.py) with DATA_BACKEND=mongo or when MySQL is unavailable.
+    Performs initial data cleaning and feature engineering.
+
+    Args:
+        site_ids (list, optional): Only load these siteInstanceIDs (used to refresh single sites).
+        since_id (int, optional): With site_ids, load the sites' rows with id >= since_id (the
+                                  lowest id of the full load) instead of the newest LOAD_LIMIT.
+    """
+    df = load_raw_sql_data(site_ids, since_id) if DATA_BACKEND != 'mongo' else None
+
+    if df is None:
+        if DATA_BACKEND != 'mongo':
+            print("⚠️ Falling back to MongoDB for the dashboard data.")
+        try:
+            df = load_raw_mongo_data(site_ids, since_id)
+            print(f"Data loaded from MongoDB collection: {MONGO_DATA_DB}.{MONGO_DATA_COLLECTION}.")
+        except Exception as e:
+            print(f"Error loading data from MongoDB: {e}")
+            return pd.DataFrame()
+        if df.empty:
+            print("MongoDB collection is empty.")
+            return df
+
+    return clean_data(df)
+
+
+def load_summary_data(site_ids=None):
+    """
+    Loads the daily summary (counts per day, site, country, status, device and registration
+    source, kept up to date by the connectors) instead of the raw rows: MySQL first, MongoDB
+    with DATA_BACKEND=mongo or as fallback. One row per summary key is kept with its count in
+    'applications', which the pages sum instead of counting rows (see timeseries.count_rows()),
+    so all of the last SUMMARY_DAYS days are covered rather than the newest LOAD_LIMIT rows.
+    Per-row columns (id, title, userID, timestamps) are not available.
+
+    Args:
+        site_ids (list, optional): Only load these siteInstanceIDs (used to refresh single sites).
+    """
+    df = load_raw_sql_summary(site_ids) if DATA_BACKEND != 'mongo' else None
+
+    if df is None:
+        if DATA_BACKEND != 'mongo':
+            print("⚠️ Falling back to MongoDB for the daily summary.")
+        try:
+            df = load_raw_mongo_summary(site_ids, SUMMARY_DAYS)
+            print(f"Summary loaded from MongoDB collection: {MONGO_DATA_DB}.{MONGO_SUMMARY_COLLECTION}.")
+        except Exception as e:
+            print(f"Error loading summary from MongoDB: {e}")
+            return pd.DataFrame()
+    if df.empty:
+        print("Daily summary is empty. Load data with the connectors or run them with --rebuild-summary.")
+        return df
+
+    # The summary stores missing text keys as ''; restore them as missing values before cleaning.
+    # A missing site is stored as 0 and stays site 0, so siteInstanceID remains an integer column.
+    df = df.replace({'countryCode': {'': np.nan}, 'status': {'': np.nan},
+                     'deviceType': {'': np.nan}, 'registerSource': {'': np.nan}})
+    df['siteInstanceID'] = df['siteInstanceID'].fillna(0).astype(np.int64)
+    df['applications'] = df['applications'].astype(np.int64)
+    print(f"Loaded {len(df)} summary rows covering {df['applications'].sum()} applications.")
+
+    return clean_data(df)
+
+
+def clean_data(df):
+    """Initial data cleaning and feature engineering of the raw rows (MySQL column names)."""
     # --- Data Cleaning and Feature Engineering ---
 
     # Rename columns based on the CSV structure provided
@@ -152,6 +277,12 @@ def load_data():
     df['day_of_month'] = df['application_date'].dt.day
     df['year_month'] = df['application_date'].dt.to_period('M').astype(str)
 
+    # Registration time codes (UTC) for the activity heatmap: hour 0-23, weekday 0=Monday; -1 if unknown
+    if 'timeCreatedUTC' in df.columns:
+        created = pd.to_datetime(df['timeCreatedUTC'], errors='coerce')
+        df['hour_utc'] = created.dt.hour.fillna(-1).astype('int8')
+        df['weekday_utc'] = created.dt.dayofweek.fillna(-1).astype('int8')
+
     # Clean up categorical columns
     if 'dtype' in df.columns:
         df['dtype'] = df['dtype'].fillna('Unknown').astype(str).str.strip()
@@ -164,7 +295,7 @@ def load_data():
     return df
 
 
-def load_unique_most_recent_data(df=None) -> pd.DataFrame:
+def load_unique_most_recent_data(df=None, site_ids=None) -> pd.DataFrame:
     """
     Takes the DataFrame from load_data() and deduplicates it using Pandas.
     It keeps only the record with the highest 'id' (most recent) for each 'applicant_id'.
@@ -172,11 +303,12 @@ def load_unique_most_recent_data(df=None) -> pd.DataFrame:
     Args:
         df (pd.DataFrame, optional): The dataframe returned by load_data().
                                      If None, it calls load_data() internally.
+        site_ids (list, optional): Passed to load_data() when df is None.
     """
     # 1. Get the data (either passed in or loaded fresh)
     if df is None:
         print("No DataFrame provided to load_unique_most_recent_data, calling load_data()...")
-        df = load_data()
+        df = load_data(site_ids)
     else:
         print("Using provided DataFrame for deduplication...")
         # Create a copy to avoid modifying the original dataframe in memory
@@ -0,0 +1,211 @@
+# job_portal_dashboard/Activity_Heatmap.py
+
+import pandas as pd
+import numpy as np
+from dash import html, dcc, Input, Output, State, no_update
+import dash_bootstrap_components as dbc
+
+from jobpage_status.chart_builder import create_summary_card, figure_or_patch, heatmap_figure, empty_figure
+from jobpage_status.timeseries import filter_key
+from Data.dataset_cache import get_derived
+
+# Filter options
+SPLIT_OPTIONS = [
+    {'label': 'None', 'value': 'none'},
+    {'label': 'Device Type', 'value': 'device'},
+    {'label': 'Status', 'value': 'status'}
+]
+
+WEEKDAY_NAMES = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+HOUR_LABELS = [f'{hour:02d}:00' for hour in range(24)]
+STATUSES = ['Active', 'Inactive']
+
+
+def build_activity_cube(df, start_date, end_date, selected_countries):
+    """
+    Counts registrations per status x device x weekday x hour (UTC) for the page filters.
+
+    Uses the integer 'weekday_utc' / 'hour_utc' codes derived from timeCreatedUTC at load time,
+    so the whole cube is one np.bincount. Every split of the heatmap is a sum over this cube,
+    which is cached per dataset version and filter combination.
+
+    Returns:
+        dict: 'counts' (array of shape (len(STATUSES), len(devices), 7, 24)), 'devices' (labels)
+              and 'unknown' (filtered rows without a registration time); None if the codes are missing.
+    """
+    if 'hour_utc' not in df.columns or 'weekday_utc' not in df.columns:
+        return None
+
+    dates = pd.to_datetime(df['application_date'])
+    if not start_date: start_date = dates.min().date()
+    if not end_date: end_date = dates.max().date()
+    keep = ((dates >= str(start_date)) & (dates <= str(end_date))).to_numpy()
+    if selected_countries:
+        keep &= df['applicant_location'].isin(selected_countries).to_numpy()
+
+    hours = df['hour_utc'].to_numpy()[keep].astype(np.int64)
+    weekdays = df['weekday_utc'].to_numpy()[keep].astype(np.int64)
+    status_codes = pd.Categorical(df['jobpage_status'][keep], categories=STATUSES).codes.astype(np.int64)
+    if 'dtype' in df.columns:
+        device_codes, devices = pd.factorize(df['dtype'][keep].astype(str).str.strip().str.title(), sort=True)
+    else:
+        device_codes, devices = np.zeros(int(keep.sum()), dtype=np.int64), pd.Index(['Unknown'])
+    n_devices = max(len(devices), 1)
+
+    known = (hours >= 0) & (weekdays >= 0) & (status_codes >= 0) & (device_codes >= 0)
+    flat = ((status_codes * n_devices + device_codes) * 7 + weekdays) * 24 + hours
+    counts = np.bincount(flat[known], minlength=len(STATUSES) * n_devices * 7 * 24)
+    return {'counts': counts.reshape(len(STATUSES), n_devices, 7, 24),
+            'devices': list(devices) or ['Unknown'],
+            'unknown': int((~known).sum())}
+
+
+def heatmap_panels(cube, split):
+    """(name, weekday x hour counts) panels for the selected split."""
+    counts = cube['counts']
+    if split == 'device':
+        return list(zip(cube['devices'], counts.sum(axis=0)))
+    if split == 'status':
+        return list(zip(STATUSES, counts.sum(axis=1)))
+    return [('All', counts.sum(axis=(0, 1)))]
+
+
+# Page layout
+layout = dbc.Container([
+    html.H2("Page 10: Registration Activity by Hour and Weekday", className="text-center my-4",
+            style={'color': '#2c3e50'}),
+    dcc.Store(id='p10-figure-signature'),  # Layout signature of the figure on screen (see figure_or_patch)
+
+    # Filters Section
+    dbc.Row([
+        dbc.Col([html.Label("Select Date Range:", className="control-label"),
+                 dcc.DatePickerRange(id='p10-date-range-picker',
+                                     display_format='YYYY-MM-DD')],
+                width=12, md=4),
+        dbc.Col([html.Label("Select Country:", className="control-label"),
+                 dcc.Dropdown(id='p10-country-filter', value=[], multi=True,
+                              placeholder="Select countries...")],
+                width=12, md=4),
+        dbc.Col([html.Label("Split By:", className="control-label"),
+                 dcc.Dropdown(id='p10-split-filter',
+                              options=SPLIT_OPTIONS,
+                              value='none',
+                              clearable=False)],
+                width=12, md=4),
+    ], className="mb-4 glass-container"),
+
+    # Summary Cards
+    dbc.Row([
+        dbc.Col(id='p10-total-applications-card', width=12, md=4),
+        dbc.Col(id='p10-peak-hour-card', width=12, md=4),
+        dbc.Col(id='p10-peak-day-card', width=12, md=4),
+    ], className="mb-4"),
+
+    # Heatmap Graph
+    dbc.Row([
+        dbc.Col(
+            html.Div(
+                dcc.Graph(id='p10-activity-heatmap'),
+                style={
+                    'width': '100%',
+                    'border': '1px solid #e0e0e0',
+                    'borderRadius': '5px',
+                    'padding': '10px',
+                    'backgroundColor': 'white'
+                }
+            ),
+            width=12, className="glass-container"
+        )
+    ])
+], fluid=True)
+
+
+# --- Callback Registration ---
+def register_callbacks(app):
+    """Registers all callbacks for Page 10 (Activity Heatmap)."""
+
+    # 1. Callback to Initialize Filters (Triggered by Data Load)
+    @app.callback(
+        [Output('p10-date-range-picker', 'min_date_allowed'),
+         Output('p10-date-range-picker', 'max_date_allowed'),
+         Output('p10-date-range-picker', 'start_date'),
+         Output('p10-date-range-picker', 'end_date'),
+         Output('p10-country-filter', 'options')],
+        [Input('global-data-store', 'data')]
+    )
+    def update_page_10_filters(json_data):
+        if json_data is None:
+            return no_update, no_update, no_update, no_update, []
+
+        df = pd.DataFrame(json_data)
+        dates = pd.to_datetime(df['application_date'])
+        min_date = dates.min().date()
+        max_date = dates.max().date()
+
+        country_options = [{'label': country, 'value': country} for country in
+                           sorted(df['applicant_location'].unique())]
+
+        return min_date, max_date, min_date, max_date, country_options
+
+    # 2. Callback to Update Content (Triggered by Filters OR Data Load)
+    @app.callback(
+        [Output('p10-activity-heatmap', 'figure'),
+         Output('p10-total-applications-card', 'children'),
+         Output('p10-peak-hour-card', 'children'),
+         Output('p10-peak-day-card', 'children'),
+         Output('p10-figure-signature', 'data')],
+        [Input('p10-date-range-picker', 'start_date'),
+         Input('p10-date-range-picker', 'end_date'),
+         Input('p10-country-filter', 'value'),
+         Input('p10-split-filter', 'value'),
+         Input('data-source-selector', 'value'),
+         Input('global-data-store', 'data')],
+        [State('p10-figure-signature', 'data'),
+         State('dataset-version', 'data')]
+    )
+    def update_page_10_content(start_date, end_date, selected_countries, split, data_source, json_data,
+                               figure_signature, dataset_version):
+
+        if json_data is None:
+            return no_update, no_update, no_update, no_update, no_update
+
+        # Weekday x hour cube for these filters (changing the split reuses it)
+        cube = get_derived(dataset_version,
+                           ('activity_cube',) + filter_key(start_date, end_date, selected_countries),
+                           lambda df: build_activity_cube(df, start_date, end_date, selected_countries))
+        if cube is None:
+            cube = build_activity_cube(pd.DataFrame(json_data), start_date, end_date, selected_countries)
+
+        suffix = "Users" if data_source == 'latest_unique' else "CVs"
+
+        # --- Handle Missing / Empty Data ---
+        if cube is None:
+            empty_fig = empty_figure("Data Error: 'timeCreatedUTC' column missing.")
+            return empty_fig, create_summary_card(f"Total {suffix}", 0, "primary"), \
+                create_summary_card("Busiest Hour (UTC)", "N/A", "info"), \
+                create_summary_card("Busiest Day", "N/A", "secondary"), None
+
+        weekday_hour = cube['counts'].sum(axis=(0, 1))
+        total = int(weekday_hour.sum())
+        if total == 0:
+            empty_fig = empty_figure("No data available for the selected filters.")
+            return empty_fig, create_summary_card(f"Total {suffix}", 0, "primary"), \
+                create_summary_card("Busiest Hour (UTC)", "N/A", "info"), \
+                create_summary_card("Busiest Day", "N/A", "secondary"), None
+
+        # --- Summary Cards ---
+        total_card = create_summary_card(f"Total {suffix}", int(total), "primary")
+        peak_hour_card = create_summary_card("Busiest Hour (UTC)", HOUR_LABELS[int(weekday_hour.sum(axis=0).argmax())],
+                                             "info")
+        peak_day_card = create_summary_card("Busiest Day", WEEKDAY_NAMES[int(weekday_hour.sum(axis=1).argmax())],
+                                            "secondary")
+
+        # --- Graph Generation ---
+        title = f'{suffix} by Registration Hour and Weekday (UTC)'
+        if cube['unknown']:
+            title += f" ({cube['unknown']:,} without a registration time)"
+        fig = heatmap_figure(heatmap_panels(cube, split), HOUR_LABELS, WEEKDAY_NAMES, title,
+                             x_title='Hour of Day (UTC)', tick_step=3 if split != 'none' else 1)
+
+        fig, signature = figure_or_patch(fig, figure_signature)
+        return fig, total_card, peak_hour_card, peak_day_card, signature
@@ -1,11 +1,16 @@
 # job_portal_dashboard/Device_Overview.py
 
 import pandas as pd
-import plotly.graph_objects as go
-from dash import html, dcc, callback, Input, Output, no_update
+from dash import html, dcc, callback, Input, Output, State, no_update
 import dash_bootstrap_components as dbc
 from datetime import datetime
 
+from jobpage_status.chart_builder import figure_or_patch, device_bar_line_figure, empty_figure, DATE_XAXIS
+from jobpage_status.timeseries import cached_daily_rolling, filter_key, keep_year_months, downsample, \
+    downsample_note, point_budget, year_month_options, rolling_overlay_control, rolling_overlay_traces, \
+    count_rows, row_weights
+from jobpage_status.anomalies import anomaly_flags, daily_anomaly_traces, ALL
+
 # --- Filter Options ---
 DEVICE_TYPE_OPTIONS = [
     {'label': 'All Devices', 'value': 'all_devices'},
@@ -29,6 +34,7 @@ def create_summary_card(title, value, color_class="primary"):
 # --- Page Layout ---
 layout = dbc.Container([
     html.H2("Page 6: Daily Application Overview by Device", className="text-center my-4", style={'color': '#2c3e50'}),
+    dcc.Store(id='p6-figure-signature'),  # Layout signature of the figure on screen (see figure_or_patch)
 
     # Filters Section
     dbc.Row([
@@ -72,6 +78,8 @@ layout = dbc.Container([
 
         html.Div([
         # Optional: Add a Title inside the glass box
+        # Moving-average overlays
+        rolling_overlay_control('p6'),
 
         # The Graph
         dcc.Graph(id='p6-daily-device-cv-graph', style={'height': '500px', 'width':'12'})
@@ -100,15 +108,12 @@ def register_callbacks(app):
 
         df = pd.DataFrame(json_data)
 
-        # Ensure 'month' column exists
-        if 'month' not in df.columns and 'application_date' in df.columns:
-            df['application_date'] = pd.to_datetime(df['application_date'])
-            df['month'] = df['application_date'].dt.month
-
-        month_map = {1: 'January', 2: 'February', 3: 'March', 4: 'April', 5: 'May', 6: 'June',
-                     7: 'July', 8: 'August', 9: 'September', 10: 'October', 11: 'November', 12: 'December'}
+        # Ensure 'year_month' column exists
+        if 'year_month' not in df.columns and 'application_date' in df.columns:
+            df['year_month'] = pd.to_datetime(df['application_date']).dt.to_period('M').astype(str)
 
-        month_opts = [{'label': month_map.get(m, f"Month {m}"), 'value': m} for m in sorted(df['month'].unique())]
+        # Months are year-qualified ('2024-11'), so November 2023 and November 2024 stay separate
+        month_opts = year_month_options(df['year_month'])
         country_opts = [{'label': country, 'value': country} for country in sorted(df['applicant_location'].unique())]
 
         # Status Options (NEW)
@@ -125,19 +130,25 @@ def register_callbacks(app):
          Output('p6-total-applications-card', 'children'),
          Output('p6-mobile-total-card', 'children'),
          Output('p6-desktop-total-card', 'children'),
-         Output('p6-mobile-percentage-card', 'children')],
+         Output('p6-mobile-percentage-card', 'children'),
+         Output('p6-figure-signature', 'data')],
         [Input('p6-month-filter', 'value'),
          Input('p6-country-filter', 'value'),
          Input('p6-device-filter', 'value'),
          Input('p6-status-filter', 'value'),  # Added Input for Status
+         Input('p6-rolling-overlay', 'value'),
          Input('data-source-selector', 'value'),
-         Input('global-data-store', 'data')]
+         Input('global-data-store', 'data')],
+        [State('p6-figure-signature', 'data'),
+         State('viewport-width', 'data'),
+         State('dataset-version', 'data')]
     )
-    def update_page_6_content(selected_months, selected_countries, selected_device, selected_statuses, data_source,
-                              json_data):
+    def update_page_6_content(selected_months, selected_countries, selected_device, selected_statuses,
+                              rolling_windows, data_source, json_data, figure_signature, viewport_width,
+                              dataset_version):
 
         if json_data is None:
-            return no_update, no_update, no_update, no_update, no_update
+            return no_update, no_update, no_update, no_update, no_update, no_update
 
         df = pd.DataFrame(json_data)
         filtered_df = df.copy()
@@ -147,16 +158,16 @@ def register_callbacks(app):
             filtered_df['dtype'] = filtered_df['dtype'].astype(str).str.lower().str.strip()
         else:
             # Handle missing column
-            empty_fig = go.Figure().update_layout(title="Data Error: 'dtype' column missing.")
+            empty_fig = empty_figure("Data Error: 'dtype' column missing.")
             return empty_fig, \
                 create_summary_card("Total", 0, "primary"), \
                 create_summary_card("Mobile", 0, "warning"), \
                 create_summary_card("Desktop", 0, "info"), \
-                create_summary_card("Mobile %", "N/A", "secondary")
+                create_summary_card("Mobile %", "N/A", "secondary"), None
 
         # --- Apply Filters ---
         if selected_months:
-            filtered_df = filtered_df[filtered_df['month'].isin(selected_months)]
+            filtered_df = filtered_df[filtered_df['year_month'].isin(selected_months)]
 
         if selected_countries:
             filtered_df = filtered_df[filtered_df['applicant_location'].isin(selected_countries)]
@@ -170,17 +181,17 @@ def register_callbacks(app):
 
         # --- Handle Empty Data ---
         if filtered_df.empty:
-            empty_fig = go.Figure().update_layout(title="No data available for the selected filters.")
+            empty_fig = empty_figure("No data available for the selected filters.")
             return empty_fig, \
                 create_summary_card("Total Applications", 0, "primary"), \
                 create_summary_card("Mobile CVs", 0, "warning"), \
                 create_summary_card("Desktop CVs", 0, "info"), \
-                create_summary_card("Mobile %", "0.00%", "secondary")
+                create_summary_card("Mobile %", "0.00%", "secondary"), None
 
         # --- Summary Cards Calculations ---
-        total_applications = filtered_df.shape[0]
-        mobile_count = filtered_df[filtered_df['dtype'] == 'mobile'].shape[0]
-        desktop_count = filtered_df[filtered_df['dtype'] == 'desktop'].shape[0]
+        total_applications = count_rows(filtered_df)
+        mobile_count = count_rows(filtered_df[filtered_df['dtype'] == 'mobile'])
+        desktop_count = count_rows(filtered_df[filtered_df['dtype'] == 'desktop'])
 
         suffix = "Users" if data_source == 'latest_unique' else "CVs"
 
@@ -192,70 +203,28 @@ def register_callbacks(app):
         mobile_perc_card = create_summary_card("Mobile %", f"{mobile_percentage:.2f}%", "secondary")
 
         # --- Graph Aggregation ---
-        def generate_device_bar_line_graph(df_pivot, x_col, title, x_title):
-            """Generates a combined Bar and Line graph for daily Mobile vs Desktop counts."""
-            fig = go.Figure()
-
-            # Bar Traces for Mobile vs Desktop counts
-            if 'desktop' in df_pivot.columns:
-                fig.add_trace(
-                    go.Bar(x=df_pivot[x_col], y=df_pivot['desktop'], name='Desktop', marker_color='#191970',
-                           opacity=0.9))
-            if 'mobile' in df_pivot.columns:
-                fig.add_trace(
-                    go.Bar(x=df_pivot[x_col], y=df_pivot['mobile'], name='Mobile', marker_color='#FF8C00', opacity=0.9))
-
-            # Line Trace for Mobile Percentage (if available)
-            if 'Mobile_Percent' in df_pivot.columns and not df_pivot['Mobile_Percent'].isnull().all():
-                fig.add_trace(go.Scatter(
-                    x=df_pivot[x_col], y=df_pivot['Mobile_Percent'], name='Mobile %', mode='lines+markers+text',
-                    yaxis='y2',
-                    line=dict(color='#3CB371', width=3), marker=dict(size=8),
-                    text=[f"{p:.0f}%" for p in df_pivot['Mobile_Percent']], textposition="top center",
-                    textfont=dict(color='#3CB371')
-                ))
-
-            fig.update_layout(
-                title=title,
-                barmode='group',
-                xaxis=dict(title=x_title),
-                yaxis=dict(title=f'{suffix} Count (Mobile/Desktop)', title_font=dict(color='#191970'), tickformat='.0f',
-                           side='left',
-                           showgrid=True, gridcolor='#e0e0e0', rangemode='tozero'),
-                yaxis2=dict(title='Mobile %', title_font=dict(color='#3CB371'), overlaying='y', side='right',
-                            range=[0, 100],
-                            tickformat='.0f', showgrid=False),
-                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-                plot_bgcolor='white', paper_bgcolor='white', margin=dict(t=50, b=50, l=50, r=50)
-            )
-
-            # Set linear ticks for Day of Month
-            if x_col == 'day_of_month':
-                fig.update_layout(xaxis=dict(tickmode='linear', dtick=1, tick0=1, range=[0.5, 31.5]))
-
-            return fig
-
-        # 1. Group by Day and Device Type
-        daily_summary = filtered_df.groupby(['day_of_month', 'dtype']).size().reset_index(name='Total_Count')
-
-        # 2. Pivot to get Mobile/Desktop counts per day
-        daily_pivot_device = daily_summary.pivot_table(
-            index='day_of_month',
-            columns='dtype',
-            values='Total_Count',
-            fill_value=0
-        ).reset_index()
-
-        # Ensure 'mobile' and 'desktop' columns exist
-        if 'mobile' not in daily_pivot_device.columns: daily_pivot_device['mobile'] = 0
-        if 'desktop' not in daily_pivot_device.columns: daily_pivot_device['desktop'] = 0
-
-        # 3. Calculate Totals and Mobile Percentage
-        daily_pivot_device['Total'] = daily_pivot_device['mobile'] + daily_pivot_device['desktop']
-
-        daily_pivot_device['Mobile_Percent'] = daily_pivot_device.apply(
-            lambda row: (row['mobile'] / row['Total'] * 100) if row['Total'] > 0 else 0, axis=1
-        )
+        # 1. Count Mobile/Desktop per calendar day (gaps zero-filled) with moving averages,
+        #    cached for these filters
+        daily_pivot_device = cached_daily_rolling(
+            dataset_version, filter_key('p6', selected_months, selected_countries, selected_device, selected_statuses),
+            filtered_df['application_date'], filtered_df['dtype'], ['mobile', 'desktop'], numerator='mobile',
+            weights=row_weights(filtered_df))
+        daily_pivot_device = keep_year_months(daily_pivot_device, selected_months)
+
+        # Precomputed volume anomaly flags for the selected countries and device (all statuses only)
+        anomalies = []
+        if not selected_statuses:
+            flags = anomaly_flags(dataset_version, selected_countries,
+                                  ALL if selected_device == 'all_devices' else selected_device)
+            anomalies = daily_anomaly_traces(flags, daily_pivot_device, volume_label=suffix)
+
+        # 2. Downsample (LTTB on the daily total) to what the chart width can show
+        total_days = len(daily_pivot_device)
+        daily_pivot_device, downsampled = downsample(daily_pivot_device, 'Total', point_budget(viewport_width))
+
+        # 3. Mobile Percentage (no value on days without applications)
+        daily_pivot_device['Mobile_Percent'] = \
+            daily_pivot_device['mobile'] / daily_pivot_device['Total'].where(daily_pivot_device['Total'] > 0) * 100
 
         # --- Final Pivot for Graph ---
         if selected_device == 'all_devices':
@@ -264,15 +233,26 @@ def register_callbacks(app):
             device_name = selected_device
 
             final_daily_pivot = pd.DataFrame({
-                'day_of_month': daily_pivot_device['day_of_month'],
+                'date': daily_pivot_device['date'],
                 'mobile': daily_pivot_device[device_name] if device_name == 'mobile' else 0,
                 'desktop': daily_pivot_device[device_name] if device_name == 'desktop' else 0,
                 'Mobile_Percent': 0  # No line for single selection
             })
 
         # --- Graph Generation ---
-        fig = generate_device_bar_line_graph(final_daily_pivot, 'day_of_month',
-                                             f'Daily {suffix} Count by Device ({selected_device})',
-                                             'Day of Month')
-
-        return fig, total_card, mobile_card, desktop_card, mobile_perc_card
\ No newline at end of file
+        title = f'Daily {suffix} Count by Device ({selected_device})'
+        if downsampled:
+            title += downsample_note(len(final_daily_pivot), total_days)
+
+        # Mobile % averages are only meaningful when both devices are shown
+        overlays = rolling_overlay_traces(daily_pivot_device, rolling_windows,
+                                          'mobile' if selected_device == 'all_devices' else None, 'Mobile %',
+                                          volume_label=suffix)
+        overlays += anomalies
+        fig = device_bar_line_figure(final_daily_pivot['date'], final_daily_pivot['desktop'],
+                                     final_daily_pivot['mobile'], final_daily_pivot['Mobile_Percent'],
+                                     title, 'Date',
+                                     f'{suffix} Count (Mobile/Desktop)', overlays=overlays, xaxis=DATE_XAXIS)
+
+        fig, signature = figure_or_patch(fig, figure_signature)
+        return fig, total_card, mobile_card, desktop_card, mobile_perc_card, signature
\ No newline at end of file
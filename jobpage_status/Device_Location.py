@@ -1,17 +1,25 @@
 # job_portal_dashboard/Location_Device.py
 
 import pandas as pd
-import plotly.graph_objects as go
-from dash import html, dcc, callback, Input, Output, no_update
+from dash import html, dcc, callback, Input, Output, State, no_update
 import dash_bootstrap_components as dbc
 from datetime import datetime
 
+from jobpage_status.chart_builder import figure_or_patch, bar_line_figure, bar_trace, percent_line_trace, \
+    empty_figure, DESKTOP_COLOR
+from jobpage_status.top_n import top_n_controls, register_drilldown, fold_other, depth_title
+from jobpage_status.timeseries import count_rows
+
 # --- Filter Options ---
 # Initialized as None/Empty, populated by callback
 COUNTRY_OPTIONS = []
 MIN_DATE = None
 MAX_DATE = None
 
+# Trace colours specific to this page
+LOCATION_MOBILE_COLOR = '#FFC300'
+LOCATION_TREND_COLOR = '#FF5733'
+
 
 # --- Helper Functions ---
 def create_summary_card(title, value, color_class="primary"):
@@ -27,30 +35,34 @@ def create_summary_card(title, value, color_class="primary"):
 # --- Page Layout ---
 layout = dbc.Container([
     html.H2("Page 8: Total CV Count by Location", className="text-center my-4", style={'color': '#2c3e50'}),
+    dcc.Store(id='p8-figure-signature'),  # Layout signature of the figure on screen (see figure_or_patch)
 
     # Filters Section
     dbc.Row([
-        # 1. Date Range (Width changed to 4)
+        # 1. Date Range (Width changed to 3)
         dbc.Col([html.Label("Select Date Range:", className="control-label"),
                  dcc.DatePickerRange(id='p8-date-range-picker',
                                      display_format='YYYY-MM-DD')],
-                width=12, md=4),
+                width=12, md=3),
 
-        # 2. Country Filter (Width changed to 4)
+        # 2. Country Filter (Width changed to 3)
         dbc.Col([html.Label("Select Applicant Location:", className="control-label"),
                  dcc.Dropdown(id='p8-country-filter',
                               multi=True,
                               placeholder="Select one or more locations...")
                  ],
-                width=12, md=4),
+                width=12, md=3),
 
-        # 3. NEW: Applicant Status Filter (Width 4)
+        # 3. NEW: Applicant Status Filter (Width 3)
         dbc.Col([html.Label("Filter by Status:", className="control-label"),
                  dcc.Dropdown(id='p8-status-filter',
                               value=[],
                               multi=True,
                               placeholder="Select status...")],
-                width=12, md=4),
+                width=12, md=3),
+
+        # 4. Top-N Locations (Width 3)
+        dbc.Col(top_n_controls('p8'), width=12, md=3),
     ], className="mb-4 glass-container"),
 
     # Summary Cards
@@ -120,24 +132,32 @@ def register_callbacks(app):
 
         return min_date, max_date, min_date, max_date, country_options, status_options
 
+    # Clicking the "Other" bar drills into the next N locations
+    register_drilldown(app, 'p8', 'p8-location-cv-graph')
+
     # 2. Callback to Update Content (Triggered by Filters OR Data Load)
     @app.callback(
         [Output('p8-location-cv-graph', 'figure'),
          Output('p8-total-applications-card', 'children'),
          Output('p8-mobile-total-card', 'children'),
          Output('p8-desktop-total-card', 'children'),
-         Output('p8-mobile-percentage-card', 'children')],
+         Output('p8-mobile-percentage-card', 'children'),
+         Output('p8-figure-signature', 'data')],
         [Input('p8-date-range-picker', 'start_date'),
          Input('p8-date-range-picker', 'end_date'),
          Input('p8-country-filter', 'value'),
          Input('p8-status-filter', 'value'),  # Added Input for Status
+         Input('p8-top-n-filter', 'value'),
+         Input('p8-top-n-depth', 'data'),
          Input('data-source-selector', 'value'),
-         Input('global-data-store', 'data')]
+         Input('global-data-store', 'data')],
+        [State('p8-figure-signature', 'data')]
     )
-    def update_page_8_content(start_date, end_date, selected_countries, selected_statuses, data_source, json_data):
+    def update_page_8_content(start_date, end_date, selected_countries, selected_statuses, top_n, depth, data_source,
+                              json_data, figure_signature):
 
         if json_data is None:
-            return no_update, no_update, no_update, no_update, no_update
+            return no_update, no_update, no_update, no_update, no_update, no_update
 
         df = pd.DataFrame(json_data)
 
@@ -173,89 +193,30 @@ def register_callbacks(app):
 
         # --- Handle Empty Data ---
         if filtered_df.empty:
-            empty_fig = go.Figure().update_layout(title="No data available for the selected filters.")
+            empty_fig = empty_figure("No data available for the selected filters.")
             zero_card = create_summary_card("Mobile %", "0.00%", "secondary")
             return empty_fig, \
                 create_summary_card("Total Applications", 0, "primary"), \
                 create_summary_card("Mobile CVs", 0, "warning"), \
                 create_summary_card("Desktop CVs", 0, "info"), \
-                zero_card
+                zero_card, None
 
         # --- Summary Cards ---
-        total_applications = filtered_df.shape[0]
-        mobile_count = filtered_df[filtered_df['dtype'] == 'mobile'].shape[0]
-        desktop_count = filtered_df[filtered_df['dtype'] == 'desktop'].shape[0]
+        total_applications = count_rows(filtered_df)
+        mobile_count = count_rows(filtered_df[filtered_df['dtype'] == 'mobile'])
+        desktop_count = count_rows(filtered_df[filtered_df['dtype'] == 'desktop'])
 
         mobile_percentage = (mobile_count / total_applications) * 100 if total_applications > 0 else 0.0
 
         suffix = "Users" if data_source == 'latest_unique' else "CVs"
 
-        def generate_location_bar_chart(df_pivot, x_col, title, x_title):
-            """Generates a Bar Chart showing Total CV Count per Location (Mobile vs Desktop split)
-               AND adds a Scatter trace for Mobile Users with visible text labels."""
-            fig = go.Figure()
-
-            # Bar Trace 1: Mobile Count (Yellow/Orange)
-            if 'mobile' in df_pivot.columns:
-                fig.add_trace(
-                    go.Bar(x=df_pivot[x_col], y=df_pivot['mobile'], name='Mobile CVs (Bar)', marker_color='#FFC300',
-                           opacity=0.9))
-
-            # Bar Trace 2: Desktop Count (Dark Blue)
-            if 'desktop' in df_pivot.columns:
-                fig.add_trace(
-                    go.Bar(x=df_pivot[x_col], y=df_pivot['desktop'], name='Desktop CVs (Bar)', marker_color='#191970',
-                           opacity=0.9))
-
-            # --- NEW TRACE: Scatter for Mobile Percentage on Secondary Y-Axis with Labels ---
-            if 'mobile_percentage' in df_pivot.columns:
-                fig.add_trace(
-                    go.Scatter(
-                        x=df_pivot[x_col],
-                        y=df_pivot['mobile_percentage'],
-                        name='Mobile % (Trend)',
-                        mode='lines+markers+text',  # Added +text
-                        marker=dict(color='#FF5733', size=8),
-                        line=dict(color='#FF5733', width=2),
-                        opacity=0.7,
-                        yaxis='y2',
-                        text=[f"{p:.0f}%" for p in df_pivot['mobile_percentage']],
-                        textposition="top center"
-                    )
-                )
-
-            fig.update_layout(
-                title=title,
-                barmode='group',
-                xaxis=dict(title=x_title),
-                # Primary Y-axis (Counts)
-                yaxis=dict(title=f'Total {suffix} Count', title_font=dict(color='#191970'), tickformat='.0f',
-                           side='left',
-                           showgrid=True, gridcolor='#e0e0e0', rangemode='tozero'),
-                # Secondary Y-axis (Percentage)
-                yaxis2=dict(
-                    title=f'Mobile {suffix} Percentage (%)',
-                    title_font=dict(color='#FF5733'),
-                    overlaying='y',
-                    side='right',
-                    showgrid=False,
-                    tickformat=".0f",
-                    range=[0, 110]  # Slightly higher range for text labels
-                ),
-                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-                plot_bgcolor='white', paper_bgcolor='white',
-                margin=dict(t=50, b=120, l=50, r=50),
-                xaxis_tickangle=-45,
-            )
-            return fig
-
         total_card = create_summary_card(f"Total {suffix}", total_applications, "primary")
         mobile_card = create_summary_card(f"Mobile {suffix}", mobile_count, "warning")
         desktop_card = create_summary_card(f"Desktop {suffix}", desktop_count, "info")
         mobile_percent_card = create_summary_card("Mobile %", f"{mobile_percentage:.2f}%", "secondary")
 
         # --- Graph Aggregation ---
-        location_device_counts = filtered_df.groupby(['applicant_location', 'dtype']).size().reset_index(
+        location_device_counts = count_rows(filtered_df, ['applicant_location', 'dtype']).reset_index(
             name='Total_Count')
 
         location_pivot = location_device_counts.pivot_table(
@@ -269,18 +230,32 @@ def register_callbacks(app):
         if 'mobile' not in location_pivot.columns: location_pivot['mobile'] = 0
         if 'desktop' not in location_pivot.columns: location_pivot['desktop'] = 0
 
-        # Calculate percentage for the new trace
         location_pivot['Total_Count'] = location_pivot['mobile'] + location_pivot['desktop']
 
+        # Keep the top-N locations (already in descending order), fold the rest into "Other"
+        location_pivot = fold_other(location_pivot, 'applicant_location', ['mobile', 'desktop', 'Total_Count'],
+                                    top_n, depth, rank_col='Total_Count')
+
+        # Calculate percentage for the new trace
+
         location_pivot['mobile_percentage'] = location_pivot.apply(
             lambda row: (row['mobile'] / row['Total_Count'] * 100) if row['Total_Count'] > 0 else 0, axis=1
         )
 
-        location_pivot.sort_values('Total_Count', ascending=False, inplace=True)
-
         # Graph Generation
-        fig = generate_location_bar_chart(location_pivot, 'applicant_location',
-                                          f'{suffix} Count by Location (Mobile vs Desktop) with Mobile % Trend',
-                                          'Country/Location')
-
-        return fig, total_card, mobile_card, desktop_card, mobile_percent_card
\ No newline at end of file
+        # Mobile / Desktop bars plus the Mobile % trend line (labelled) on the secondary axis
+        x = location_pivot['applicant_location']
+        traces = [bar_trace('Mobile CVs (Bar)', location_pivot['mobile'], x, LOCATION_MOBILE_COLOR),
+                  bar_trace('Desktop CVs (Bar)', location_pivot['desktop'], x, DESKTOP_COLOR),
+                  percent_line_trace('Mobile % (Trend)', location_pivot['mobile_percentage'], x,
+                                     color=LOCATION_TREND_COLOR, line_width=2, text_color=False, opacity=0.7)]
+        title = depth_title(f'{suffix} Count by Location (Mobile vs Desktop) with Mobile % Trend', top_n, depth)
+        fig = bar_line_figure(traces, title,
+                              'Country/Location', f'Total {suffix} Count', f'Mobile {suffix} Percentage (%)',
+                              yaxis={'rangemode': 'tozero'},
+                              yaxis2={'title': {'font': {'color': LOCATION_TREND_COLOR}},
+                                      'range': [0, 110]},  # Slightly higher range for text labels
+                              margin={'b': 120}, xaxis={'tickangle': -45})
+
+        fig, signature = figure_or_patch(fig, figure_signature)
+        return fig, total_card, mobile_card, desktop_card, mobile_percent_card, signature
\ No newline at end of file
@@ -0,0 +1,182 @@
+# job_portal_dashboard/Dimension_Breakdown.py
+
+import pandas as pd
+from dash import html, dcc, Input, Output, State, no_update
+import dash_bootstrap_components as dbc
+
+from jobpage_status.chart_builder import figure_or_patch, bar_line_figure, bar_trace, empty_figure, \
+    create_summary_card, ACTIVE_COLOR, INACTIVE_COLOR, MOBILE_COLOR, DESKTOP_COLOR
+from jobpage_status.top_n import top_n_controls, register_drilldown, fold_other, depth_title
+from jobpage_status.dimensions import DIMENSIONS, STATUSES, dimension_options, dimension_counts, split_pivot
+
+# Filter options (Static options)
+SPLIT_OPTIONS = [
+    {'label': 'None', 'value': 'none'},
+    {'label': 'Status', 'value': 'status'},
+    {'label': 'Device Type', 'value': 'device'}
+]
+
+SPLIT_COLORS = {'Active': ACTIVE_COLOR, 'Inactive': INACTIVE_COLOR,
+                'Desktop': DESKTOP_COLOR, 'Mobile': MOBILE_COLOR, 'Unknown': 'grey'}
+DEFAULT_DIMENSION = 'trafficSource'
+
+
+# Page layout
+layout = dbc.Container([
+    html.H2("Page 13: Count by Dimension", className="text-center my-4", style={'color': '#2c3e50'}),
+    dcc.Store(id='p13-figure-signature'),  # Layout signature of the figure on screen (see figure_or_patch)
+
+    # Filters Section
+    dbc.Row([
+        dbc.Col([html.Label("Dimension:", className="control-label"),
+                 dcc.Dropdown(id='p13-dimension-filter',
+                              value=DEFAULT_DIMENSION,
+                              clearable=False),
+                 html.Label("Split By:", className="control-label mt-2"),
+                 dcc.Dropdown(id='p13-split-filter',
+                              options=SPLIT_OPTIONS,
+                              value='status',
+                              clearable=False)],
+                width=12, md=3),
+        dbc.Col([html.Label("Select Date Range:", className="control-label"),
+                 dcc.DatePickerRange(id='p13-date-range-picker',
+                                     display_format='YYYY-MM-DD')],
+                width=12, md=3),
+        dbc.Col([html.Label("Select Country:", className="control-label"),
+                 dcc.Dropdown(id='p13-country-filter', value=[], multi=True,
+                              placeholder="Select countries..."),
+                 html.Label("Select Values:", className="control-label mt-2"),
+                 dcc.Dropdown(id='p13-value-filter', value=[], multi=True,
+                              placeholder="Select values...")],
+                width=12, md=3),
+        dbc.Col(top_n_controls('p13'), width=12, md=3)
+    ], className="mb-4 glass-container"),
+
+    # Summary Cards
+    dbc.Row([
+        dbc.Col(id='p13-total-applications-card', width=12, md=4),
+        dbc.Col(id='p13-active-applications-card', width=12, md=4),
+        dbc.Col(id='p13-inactive-applications-card', width=12, md=4),
+    ], className="mb-4"),
+
+    # Graph
+    html.Div([
+        dcc.Graph(id='p13-dimension-graph', style={'height': '500px'})
+    ], className="glass-container")
+], fluid=True)
+
+
+# --- Callback Registration ---
+def register_callbacks(app):
+    """Registers all callbacks for Page 13 (Dimension Breakdown)."""
+
+    # 1. Callback to Initialize Filters (Triggered by Data Load)
+    @app.callback(
+        [Output('p13-date-range-picker', 'min_date_allowed'),
+         Output('p13-date-range-picker', 'max_date_allowed'),
+         Output('p13-date-range-picker', 'start_date'),
+         Output('p13-date-range-picker', 'end_date'),
+         Output('p13-country-filter', 'options'),
+         Output('p13-dimension-filter', 'options')],
+        [Input('global-data-store', 'data')]
+    )
+    def update_page_13_filters(json_data):
+        if json_data is None:
+            return no_update, no_update, no_update, no_update, [], []
+
+        df = pd.DataFrame(json_data)
+        dates = pd.to_datetime(df['application_date'])
+        min_date = dates.min().date()
+        max_date = dates.max().date()
+
+        country_options = [{'label': country, 'value': country} for country in
+                           sorted(df['applicant_location'].unique())]
+
+        return min_date, max_date, min_date, max_date, country_options, dimension_options(df.columns)
+
+    # 2. Value options follow the selected dimension (labels of the cached count table)
+    @app.callback(
+        [Output('p13-value-filter', 'options'),
+         Output('p13-value-filter', 'value')],
+        [Input('p13-dimension-filter', 'value'),
+         Input('global-data-store', 'data')],
+        [State('dataset-version', 'data')]
+    )
+    def update_page_13_values(dimension, json_data, dataset_version):
+        if json_data is None or dimension not in DIMENSIONS:
+            return [], []
+        counts = dimension_counts(dataset_version, dimension, json_data)
+        if counts is None:
+            return [], []
+        return [{'label': value, 'value': value} for value in counts.values], []
+
+    # Clicking the "Other" bar drills into the next N values
+    register_drilldown(app, 'p13', 'p13-dimension-graph')
+
+    # 3. Callback to Update Content (Triggered by Filters OR Data Load)
+    @app.callback(
+        [Output('p13-dimension-graph', 'figure'),
+         Output('p13-total-applications-card', 'children'),
+         Output('p13-active-applications-card', 'children'),
+         Output('p13-inactive-applications-card', 'children'),
+         Output('p13-figure-signature', 'data')],
+        [Input('p13-dimension-filter', 'value'),
+         Input('p13-split-filter', 'value'),
+         Input('p13-date-range-picker', 'start_date'),
+         Input('p13-date-range-picker', 'end_date'),
+         Input('p13-country-filter', 'value'),
+         Input('p13-value-filter', 'value'),
+         Input('p13-top-n-filter', 'value'),
+         Input('p13-top-n-depth', 'data'),
+         Input('data-source-selector', 'value'),
+         Input('global-data-store', 'data')],
+        [State('p13-figure-signature', 'data'),
+         State('dataset-version', 'data')]
+    )
+    def update_page_13_content(dimension, split, start_date, end_date, selected_countries, selected_values,
+                               top_n, depth, data_source, json_data, figure_signature, dataset_version):
+
+        if json_data is None or dimension not in DIMENSIONS:
+            return no_update, no_update, no_update, no_update, no_update
+
+        suffix = "Users" if data_source == 'latest_unique' else "CVs"
+        label = DIMENSIONS[dimension]['label']
+        counts = dimension_counts(dataset_version, dimension, json_data)
+
+        # --- Handle Missing / Empty Data ---
+        if counts is None:
+            empty_fig = empty_figure(f"Data Error: '{dimension}' column missing.")
+            return empty_fig, create_summary_card(f"Total {suffix}", 0, "primary"), \
+                create_summary_card(f"Active {suffix}", 0, "success"), \
+                create_summary_card(f"Inactive {suffix}", 0, "warning"), None
+
+        # Value x status x device counts for the filters (no raw rows touched)
+        cube = counts.aggregate(start_date, end_date, selected_countries, selected_values)
+        by_status = cube.sum(axis=(0, 2))
+        total = int(by_status.sum())
+        if total == 0:
+            empty_fig = empty_figure("No data available for the selected filters.")
+            return empty_fig, create_summary_card(f"Total {suffix}", 0, "primary"), \
+                create_summary_card(f"Active {suffix}", 0, "success"), \
+                create_summary_card(f"Inactive {suffix}", 0, "warning"), None
+
+        # --- Summary Cards ---
+        total_card = create_summary_card(f"Total {suffix}", total, "primary")
+        active_card = create_summary_card(f"Active {suffix}", int(by_status[STATUSES.index('Active')]), "success")
+        inactive_card = create_summary_card(f"Inactive {suffix}", int(by_status[STATUSES.index('Inactive')]),
+                                            "warning")
+
+        # --- Graph Generation ---
+        pivot, columns = split_pivot(cube, counts.values, split)
+        pivot = fold_other(pivot, 'value', columns + ['Total'], top_n, depth)
+        if columns:
+            traces = [bar_trace(column, pivot[column], pivot['value'], SPLIT_COLORS.get(column, 'grey'))
+                      for column in columns]
+        else:
+            traces = [bar_trace(f'Total {suffix}', pivot['Total'], pivot['value'], ACTIVE_COLOR)]
+        fig = bar_line_figure(traces, depth_title(f'Total {suffix} Count by {label}', top_n, depth), label,
+                              f'Total {suffix} Count', barmode='stack',
+                              xaxis={'type': 'category'})
+
+        fig, signature = figure_or_patch(fig, figure_signature)
+        return fig, total_card, active_card, inactive_card, signature
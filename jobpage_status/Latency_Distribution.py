@@ -0,0 +1,213 @@
+# job_portal_dashboard/Latency_Distribution.py
+
+import pandas as pd
+import numpy as np
+from dash import html, dcc, Input, Output, State, no_update
+import dash_bootstrap_components as dbc
+
+from jobpage_status.chart_builder import figure_or_patch, bar_line_figure, bar_trace, empty_figure, \
+    create_summary_card, ACTIVE_COLOR, INACTIVE_COLOR, PERCENT_COLOR
+from jobpage_status.latency_sketch import LatencySketches, quantiles, histogram, format_duration, ZERO_BUCKET
+from Data.dataset_cache import get_derived
+
+# Filter options (Static options)
+BREAKDOWN_OPTIONS = [
+    {'label': 'Country', 'value': 'country'},
+    {'label': 'Device Type', 'value': 'device'},
+    {'label': 'Registration Source', 'value': 'regsource'}
+]
+
+QUANTILES = [0.5, 0.9, 0.99]
+QUANTILE_COLORS = [ACTIVE_COLOR, PERCENT_COLOR, INACTIVE_COLOR]
+# Groups shown in the breakdown chart (most updated profiles first)
+BREAKDOWN_TOP = 15
+HISTOGRAM_BINS = 40
+
+
+def get_sketches(dataset_version, json_data):
+    """Latency sketches of the loaded dataset (built once per dataset version)."""
+    sketches = get_derived(dataset_version, 'latency_sketches', LatencySketches.from_frame)
+    if sketches is None and json_data is not None:
+        sketches = LatencySketches.from_frame(pd.DataFrame(json_data))
+    return sketches
+
+
+def histogram_figure(merged, suffix):
+    """Bar chart of a merged sketch on logarithmic latency bins."""
+    edges, counts = histogram(merged, HISTOGRAM_BINS)
+    labels = [format_duration(edge) for edge in edges]
+    trace = bar_trace(f'Updated {suffix}', counts, np.arange(len(counts)), ACTIVE_COLOR)
+    trace['hovertext'] = [f"from {label}: {count:,}" for label, count in zip(labels, counts)]
+    trace['hoverinfo'] = 'text'
+    # Bins are evenly spaced on a log scale; tick labels show their lower edge
+    step = max(1, len(labels) // 10)
+    return bar_line_figure([trace], f'Time to Update Distribution ({suffix})', 'Time from creation to update',
+                           f'{suffix} Count',
+                           xaxis={'tickmode': 'array', 'tickvals': np.arange(len(labels))[::step],
+                                  'ticktext': labels[::step]})
+
+
+def breakdown_figure(grouped, group_labels, dimension_label):
+    """p50/p90/p99 per group (hours, log scale) for the groups with the most updated profiles."""
+    updated = grouped[:, ZERO_BUCKET + 1:].sum(axis=1)
+    order = np.argsort(-updated, kind='stable')[:BREAKDOWN_TOP]
+    order = order[updated[order] > 0]
+    if not len(order):
+        return empty_figure("No updated profiles for the selected filters.")
+
+    values = quantiles(grouped[order], QUANTILES) / 3600
+    names = np.asarray(group_labels, dtype=object)[order]
+    traces = [bar_trace(f'p{int(q * 100)}', values[:, i], names, color)
+              for i, (q, color) in enumerate(zip(QUANTILES, QUANTILE_COLORS))]
+    return bar_line_figure(traces, f'Time to Update by {dimension_label} (p50 / p90 / p99)', dimension_label,
+                           'Hours (log scale)', yaxis={'type': 'log', 'tickformat': None})
+
+
+# Page layout
+layout = dbc.Container([
+    html.H2("Page 11: Time to Update Profiles", className="text-center my-4", style={'color': '#2c3e50'}),
+    dcc.Store(id='p11-histogram-signature'),  # Layout signatures of the figures on screen (see figure_or_patch)
+    dcc.Store(id='p11-breakdown-signature'),
+
+    # Filters Section
+    dbc.Row([
+        dbc.Col([html.Label("Select Date Range:", className="control-label"),
+                 dcc.DatePickerRange(id='p11-date-range-picker',
+                                     display_format='YYYY-MM-DD')],
+                width=12, md=3),
+        dbc.Col([html.Label("Select Country:", className="control-label"),
+                 dcc.Dropdown(id='p11-country-filter', value=[], multi=True,
+                              placeholder="Select countries...")],
+                width=12, md=3),
+        dbc.Col([html.Label("Device Type:", className="control-label"),
+                 dcc.Dropdown(id='p11-device-filter', value=[], multi=True,
+                              placeholder="Select device type...")],
+                width=12, md=2),
+        dbc.Col([html.Label("Registration Source:", className="control-label"),
+                 dcc.Dropdown(id='p11-regsource-filter', value=[], multi=True,
+                              placeholder="Select sources...")],
+                width=12, md=2),
+        dbc.Col([html.Label("Breakdown By:", className="control-label"),
+                 dcc.Dropdown(id='p11-breakdown-filter',
+                              options=BREAKDOWN_OPTIONS,
+                              value='country',
+                              clearable=False)],
+                width=12, md=2),
+    ], className="mb-4 glass-container"),
+
+    # Summary Cards
+    dbc.Row([
+        dbc.Col(id='p11-p50-card', width=12, md=3),
+        dbc.Col(id='p11-p90-card', width=12, md=3),
+        dbc.Col(id='p11-p99-card', width=12, md=3),
+        dbc.Col(id='p11-updated-card', width=12, md=3),
+    ], className="mb-4"),
+
+    # Graphs
+    dbc.Row([
+        dbc.Col(html.Div(dcc.Graph(id='p11-latency-histogram'), className="glass-container"), width=12, md=6),
+        dbc.Col(html.Div(dcc.Graph(id='p11-latency-breakdown'), className="glass-container"), width=12, md=6),
+    ])
+], fluid=True)
+
+
+# --- Callback Registration ---
+def register_callbacks(app):
+    """Registers all callbacks for Page 11 (Time to Update)."""
+
+    # 1. Callback to Initialize Filters (Triggered by Data Load)
+    @app.callback(
+        [Output('p11-date-range-picker', 'min_date_allowed'),
+         Output('p11-date-range-picker', 'max_date_allowed'),
+         Output('p11-date-range-picker', 'start_date'),
+         Output('p11-date-range-picker', 'end_date'),
+         Output('p11-country-filter', 'options'),
+         Output('p11-device-filter', 'options'),
+         Output('p11-regsource-filter', 'options')],
+        [Input('global-data-store', 'data')],
+        [State('dataset-version', 'data')]
+    )
+    def update_page_11_filters(json_data, dataset_version):
+        if json_data is None:
+            return no_update, no_update, no_update, no_update, [], [], []
+
+        dates = pd.to_datetime(pd.DataFrame(json_data, columns=['application_date'])['application_date'])
+        min_date = dates.min().date()
+        max_date = dates.max().date()
+
+        # Options use the sketch labels, so selected values match the sketch codes
+        sketches = get_sketches(dataset_version, json_data)
+        if sketches is None:
+            return min_date, max_date, min_date, max_date, [], [], []
+        options = [[{'label': value, 'value': value} for value in sketches.labels[name]]
+                   for name in ('country', 'device', 'regsource')]
+
+        return min_date, max_date, min_date, max_date, *options
+
+    # 2. Callback to Update Content (Triggered by Filters OR Data Load)
+    @app.callback(
+        [Output('p11-latency-histogram', 'figure'),
+         Output('p11-latency-breakdown', 'figure'),
+         Output('p11-p50-card', 'children'),
+         Output('p11-p90-card', 'children'),
+         Output('p11-p99-card', 'children'),
+         Output('p11-updated-card', 'children'),
+         Output('p11-histogram-signature', 'data'),
+         Output('p11-breakdown-signature', 'data')],
+        [Input('p11-date-range-picker', 'start_date'),
+         Input('p11-date-range-picker', 'end_date'),
+         Input('p11-country-filter', 'value'),
+         Input('p11-device-filter', 'value'),
+         Input('p11-regsource-filter', 'value'),
+         Input('p11-breakdown-filter', 'value'),
+         Input('data-source-selector', 'value'),
+         Input('global-data-store', 'data')],
+        [State('p11-histogram-signature', 'data'),
+         State('p11-breakdown-signature', 'data'),
+         State('dataset-version', 'data')]
+    )
+    def update_page_11_content(start_date, end_date, selected_countries, selected_devices, selected_regsources,
+                               breakdown, data_source, json_data, histogram_signature, breakdown_signature,
+                               dataset_version):
+
+        if json_data is None:
+            return (no_update,) * 8
+
+        sketches = get_sketches(dataset_version, json_data)
+        suffix = "Users" if data_source == 'latest_unique' else "CVs"
+
+        if sketches is None:
+            empty_fig = empty_figure("Data Error: 'timeCreatedUTC' / 'timeUpdatedUTC' columns missing.")
+            return empty_fig, empty_fig, create_summary_card("Median (p50)", "N/A", "primary"), \
+                create_summary_card("p90", "N/A", "info"), create_summary_card("p99", "N/A", "warning"), \
+                create_summary_card(f"Updated {suffix}", "N/A", "secondary"), None, None
+
+        # Merge the per-day sketches of the selected filters (no raw rows are touched)
+        filters = dict(country=selected_countries, device=selected_devices, regsource=selected_regsources)
+        grouped = sketches.merge(start_date, end_date, by=breakdown, **filters)
+        merged = grouped.sum(axis=0)
+
+        total = int(merged.sum())
+        updated = total - int(merged[ZERO_BUCKET])
+        if updated == 0:
+            empty_fig = empty_figure("No updated profiles for the selected filters.")
+            return empty_fig, empty_fig, create_summary_card("Median (p50)", "N/A", "primary"), \
+                create_summary_card("p90", "N/A", "info"), create_summary_card("p99", "N/A", "warning"), \
+                create_summary_card(f"Updated {suffix}", f"0 of {total:,}", "secondary"), None, None
+
+        # --- Summary Cards ---
+        p50, p90, p99 = quantiles(merged, QUANTILES)
+        p50_card = create_summary_card("Median (p50)", format_duration(p50), "primary")
+        p90_card = create_summary_card("p90", format_duration(p90), "info")
+        p99_card = create_summary_card("p99", format_duration(p99), "warning")
+        updated_card = create_summary_card(f"Updated {suffix}", f"{updated / total * 100:.1f}% of {total:,}",
+                                           "secondary")
+
+        # --- Graph Generation ---
+        dimension_label = next(o['label'] for o in BREAKDOWN_OPTIONS if o['value'] == breakdown)
+        histogram_fig, histogram_signature = figure_or_patch(histogram_figure(merged, suffix), histogram_signature)
+        breakdown_fig, breakdown_signature = figure_or_patch(
+            breakdown_figure(grouped, sketches.labels[breakdown], dimension_label), breakdown_signature)
+
+        return histogram_fig, breakdown_fig, p50_card, p90_card, p99_card, updated_card, \
+            histogram_signature, breakdown_signature
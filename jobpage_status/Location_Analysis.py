@@ -1,25 +1,35 @@
 # job_portal_dashboard/Location_Analysis.py
 
 import pandas as pd
-import plotly.graph_objects as go
-from dash import html, dcc, callback, Input, Output, no_update
+from dash import html, dcc, callback, Input, Output, State, no_update
 import dash_bootstrap_components as dbc
 from datetime import datetime, timedelta
 
+from jobpage_status.chart_builder import figure_or_patch, status_bar_line_figure, comparison_marker_trace, \
+    empty_figure
+from jobpage_status.top_n import top_n_controls, register_drilldown, fold_other, label_top_n, depth_title
+from jobpage_status.period_compare import compare_control, period_frame, split_periods, delta_text, comparison_name
+from jobpage_status.timeseries import count_rows
+
 
 # Helper functions (Unchanged)
-def create_summary_card(title, value, color_class="primary"):
+def create_summary_card(title, value, color_class="primary", delta=None):
+    body = [
+        html.H6(title, className="card-title", style={'opacity': '0.9', 'color': 'white'}),
+        html.H2(f"{value:,}", className="card-text",style={'fontWeight': 'bold', 'color': 'white'}),
+    ]
+    # Optional comparison with the previous period (see period_compare.delta_text)
+    if delta:
+        body.append(html.P(delta, className="card-text small mb-0", style={'color': 'white', 'opacity': '0.85'}))
     return dbc.Card(
-        dbc.CardBody([
-            html.H6(title, className="card-title", style={'opacity': '0.9', 'color': 'white'}),
-            html.H2(f"{value:,}", className="card-text",style={'fontWeight': 'bold', 'color': 'white'}),
-        ]),
+        dbc.CardBody(body),
         color=color_class, inverse=True, className=f"mb-4 shadow-sm {color_class}"
 )
 
 # Page layout
 layout = dbc.Container([
     html.H2("Page 3: Location Breakdown", className="text-center my-4", style={'color': '#2c3e50'}),
+    dcc.Store(id='p3-figure-signature'),  # Layout signature of the figure on screen (see figure_or_patch)
 
     # Filters Section
     dbc.Row([
@@ -28,6 +38,8 @@ layout = dbc.Container([
                                      # Limits will be set by callback
                                      display_format='YYYY-MM-DD')],
                 width=12, md=6),
+        dbc.Col(top_n_controls('p3'), width=12, md=3),
+        dbc.Col(compare_control('p3'), width=12, md=3),
     ], className="mb-4 glass-container"),
 
     # Summary Cards
@@ -82,22 +94,32 @@ def register_callbacks(app):
 
         return min_date, max_date, min_date, max_date
 
+    # Clicking the "Other" bar drills into the next N locations
+    register_drilldown(app, 'p3', 'p3-location-cv-graph')
+
     # 2. Callback to Update Content (Triggered by Date Picker OR Data Load)
     @app.callback(
         [Output('p3-location-cv-graph', 'figure'),
          Output('p3-total-applications-card', 'children'),
          Output('p3-active-applications-card', 'children'),
-         Output('p3-inactive-applications-card', 'children')],
+         Output('p3-inactive-applications-card', 'children'),
+         Output('p3-figure-signature', 'data')],
         [Input('p3-date-range-picker', 'start_date'),
          Input('p3-date-range-picker', 'end_date'),
+         Input('p3-top-n-filter', 'value'),
+         Input('p3-top-n-depth', 'data'),
+         Input('p3-compare-filter', 'value'),
          Input('data-source-selector', 'value'),
-         Input('global-data-store', 'data')]  # Add Store as Input
+         Input('global-data-store', 'data')],  # Add Store as Input
+        [State('p3-figure-signature', 'data'),
+         State('dataset-version', 'data')]
     )
-    def update_page_3_content(start_date, end_date,data_source, json_data):
+    def update_page_3_content(start_date, end_date, top_n, depth, compare_mode, data_source, json_data,
+                              figure_signature, dataset_version):
 
         # Handle missing data
         if json_data is None:
-            return no_update, no_update, no_update, no_update
+            return no_update, no_update, no_update, no_update, no_update
 
         df = pd.DataFrame(json_data)
 
@@ -112,79 +134,41 @@ def register_callbacks(app):
             end_date = df['application_date'].max().date()
 
         # Filter Data
-        filtered_df = df.copy()
-
-        # Convert input strings to datetime for comparison if necessary,
-        # but pandas usually handles string vs datetime comparison well.
-        filtered_df = filtered_df[
-            (filtered_df['application_date'] >= str(start_date)) &
-            (filtered_df['application_date'] <= str(end_date))
-            ]
+        # The selected range and the comparison period are looked up together on the sorted dates
+        filtered_df, previous_df = split_periods(
+            period_frame(df, start_date, end_date, compare_mode, dataset_version), compare_mode)
 
         # Handle Empty Filtered Data
         if filtered_df.empty:
-            empty_fig = go.Figure().update_layout(title="No data available for the selected filters.")
+            empty_fig = empty_figure("No data available for the selected filters.")
             return (empty_fig,
                     create_summary_card("Total Applications", 0, "primary"),
                     create_summary_card("Active CVs", 0, "success"),
-                    create_summary_card("Inactive CVs", 0, "warning"))
+                    create_summary_card("Inactive CVs", 0, "warning"), None)
 
         # Summary Cards
-        total_applications = filtered_df.shape[0]
-        active_applications = filtered_df[filtered_df['jobpage_status'] == 'Active'].shape[0]
-        inactive_applications = filtered_df[filtered_df['jobpage_status'] == 'Inactive'].shape[0]
+        total_applications = count_rows(filtered_df)
+        active_applications = count_rows(filtered_df[filtered_df['jobpage_status'] == 'Active'])
+        inactive_applications = count_rows(filtered_df[filtered_df['jobpage_status'] == 'Inactive'])
 
         suffix = "Users" if data_source == 'latest_unique' else "CVs"
 
-        def generate_bar_line_graph(df_pivot, x_col, title, x_title):
-            fig = go.Figure()
-            fig.add_trace(
-                go.Bar(x=df_pivot[x_col], y=df_pivot['Inactive'], name='Inactive', marker_color='#8B4513', opacity=0.9))
-            fig.add_trace(
-                go.Bar(x=df_pivot[x_col], y=df_pivot['Active'], name='Active', marker_color='#191970', opacity=0.9))
-
-            if 'Active_Percent' in df_pivot.columns and not df_pivot['Active_Percent'].isnull().all():
-                fig.add_trace(go.Scatter(
-                    x=df_pivot[x_col], y=df_pivot['Active_Percent'], name='Active%', mode='lines+markers+text',
-                    yaxis='y2',
-                    line=dict(color='#3CB371', width=3), marker=dict(size=8),
-                    text=[f"{p:.0f}%" for p in df_pivot['Active_Percent']], textposition="top center",
-                    textfont=dict(color='#3CB371')
-                ))
-
-            fig.update_layout(
-                title=title,
-                barmode='group',
-                xaxis=dict(title=x_title),
-                yaxis=dict(title=f'{suffix} Count (Active/Inactive)', title_font=dict(color='#191970'), tickformat='.0f',
-                           side='left',
-                           showgrid=True, gridcolor='#e0e0e0'),
-                yaxis2=dict(title='Active %', title_font=dict(color='#3CB371'), overlaying='y', side='right',
-                            range=[0, 100],
-                            tickformat='.0f', showgrid=False),
-                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-                plot_bgcolor='white',
-                paper_bgcolor='white',
-                margin=dict(t=50, b=50, l=50, r=50),
-                height=600,
-                xaxis_tickfont_size=10,
-            )
-
-            # For location graph specifically, rotate x-axis labels for better readability
-            if x_col == 'applicant_location':
-                fig.update_layout(
-                    xaxis_tickangle=-45,
-                    margin=dict(b=120)
-                )
-
-            return fig
-
-        total_card = create_summary_card(f"Total {suffix}", total_applications, "primary")
-        active_card = create_summary_card(f"Active {suffix}", active_applications, "success")
-        inactive_card = create_summary_card(f"Inactive {suffix}", inactive_applications, "warning")
+        previous_counts = {}
+        if previous_df is not None:
+            previous_counts = count_rows(previous_df, 'jobpage_status').to_dict()
+            previous_counts['Total'] = count_rows(previous_df)
+
+        total_card = create_summary_card(f"Total {suffix}", total_applications, "primary",
+                                         delta_text(total_applications, previous_counts.get('Total'), compare_mode))
+        active_card = create_summary_card(f"Active {suffix}", active_applications, "success",
+                                          delta_text(active_applications, previous_counts.get('Active', 0),
+                                                     compare_mode))
+        inactive_card = create_summary_card(f"Inactive {suffix}", inactive_applications, "warning",
+                                            delta_text(inactive_applications, previous_counts.get('Inactive', 0),
+                                                       compare_mode))
 
         # Graph Aggregation
-        location_counts = filtered_df.groupby(['applicant_location', 'jobpage_status']).size().reset_index(name='count')
+        location_counts = count_rows(filtered_df, ['applicant_location', 'jobpage_status']).reset_index(name='count')
         location_pivot = location_counts.pivot(index='applicant_location', columns='jobpage_status', values='count').fillna(
             0)
 
@@ -193,15 +177,41 @@ def register_callbacks(app):
         if 'Inactive' not in location_pivot.columns: location_pivot['Inactive'] = 0
 
         location_pivot['Total'] = location_pivot['Active'] + location_pivot['Inactive']
+        location_pivot.reset_index(inplace=True)
+
+        # Comparison period totals, bucketed like the current period's locations
+        # (locations without applications in the selected range are not shown)
+        overlays = []
+        if previous_df is not None:
+            to_display = label_top_n(location_pivot['applicant_location'].to_numpy(),
+                                     location_pivot['Total'].to_numpy(), top_n, depth)
+            previous_totals = count_rows(previous_df, to_display(previous_df['applicant_location']))
+        else:
+            previous_totals = None
+
+        # Keep the top-N locations, fold the rest into "Other"
+        location_pivot = fold_other(location_pivot, 'applicant_location', ['Active', 'Inactive', 'Total'],
+                                    top_n, depth)
+
+        if previous_totals is not None:
+            overlays.append(comparison_marker_trace(
+                comparison_name(compare_mode),
+                previous_totals.reindex(location_pivot['applicant_location'], fill_value=0),
+                location_pivot['applicant_location']))
 
         # Safe division
         location_pivot['Active_Percent'] = location_pivot.apply(
             lambda row: (row['Active'] / row['Total'] * 100) if row['Total'] > 0 else 0, axis=1
         )
 
-        location_pivot.reset_index(inplace=True)
-
         # Graph Generation
-        fig = generate_bar_line_graph(location_pivot, 'applicant_location', f'{suffix} by Applicant Location', 'Location')
-
-        return fig, total_card, active_card, inactive_card
\ No newline at end of file
+        # Location labels are rotated for readability
+        fig = status_bar_line_figure(location_pivot['applicant_location'], location_pivot['Inactive'],
+                                     location_pivot['Active'], location_pivot['Active_Percent'],
+                                     depth_title(f'{suffix} by Applicant Location', top_n, depth), 'Location',
+                                     f'{suffix} Count (Active/Inactive)', overlays=overlays,
+                                     height=600, xaxis={'tickfont': {'size': 10}, 'tickangle': -45},
+                                     margin={'b': 120})
+
+        fig, signature = figure_or_patch(fig, figure_signature)
+        return fig, total_card, active_card, inactive_card, signature
\ No newline at end of file
@@ -1,11 +1,15 @@
 # job_portal_dashboard/Mobile_Desktop.py
 
 import pandas as pd
-import plotly.graph_objects as go
-from dash import html, dcc, callback, Input, Output, no_update
+from dash import html, dcc, callback, Input, Output, State, no_update
 import dash_bootstrap_components as dbc
 from datetime import datetime
 
+from jobpage_status.chart_builder import figure_or_patch, pie_figure, empty_figure, DEVICE_COLOR_MAP
+from jobpage_status.period_compare import compare_control, period_frame, split_periods, delta_text, \
+    delta_points_text
+from jobpage_status.timeseries import count_rows
+
 # Filter options
 DEVICE_TYPE_OPTIONS = [
     {'label': 'All', 'value': 'All'},
@@ -15,12 +19,16 @@ DEVICE_TYPE_OPTIONS = [
 
 
 # Helper functions
-def create_summary_card(title, value, color_class="primary"):
+def create_summary_card(title, value, color_class="primary", delta=None):
+    body = [
+        html.H6(title, className="card-title", style={'opacity': '0.9', 'color': 'white'}),
+        html.H2(f"{value:}", className="card-text",style={'fontWeight': 'bold', 'color': 'white'}),
+    ]
+    # Optional comparison with the previous period (see period_compare.delta_text)
+    if delta:
+        body.append(html.P(delta, className="card-text small mb-0", style={'color': 'white', 'opacity': '0.85'}))
     return dbc.Card(
-        dbc.CardBody([
-            html.H6(title, className="card-title", style={'opacity': '0.9', 'color': 'white'}),
-            html.H2(f"{value:}", className="card-text",style={'fontWeight': 'bold', 'color': 'white'}),
-        ]),
+        dbc.CardBody(body),
         color=color_class, inverse=True, className=f"mb-4 shadow-sm {color_class}"
 )
 
@@ -28,13 +36,15 @@ def create_summary_card(title, value, color_class="primary"):
 # Page layout
 layout = dbc.Container([
     html.H2("Page 5: Mobile vs Desktop Users Breakdown", className="text-center my-4", style={'color': '#2c3e50'}),
+    dcc.Store(id='p5-figure-signature'),  # Layout signature of the figure on screen (see figure_or_patch)
 
     # Filters Section
     dbc.Row([
         # 1. Date Range (Width changed to 3)
         dbc.Col([html.Label("Select Date Range:", className="control-label"),
                  dcc.DatePickerRange(id='p5-date-range-picker',
-                                     display_format='YYYY-MM-DD')],
+                                     display_format='YYYY-MM-DD'),
+                 html.Div(compare_control('p5'), className="mt-2")],
                 width=12, md=3),
 
         # 2. Country Filter (Width changed to 3)
@@ -136,21 +146,25 @@ def register_callbacks(app):
          Output('p5-total-applications-card', 'children'),
          Output('p5-mobile-total-card', 'children'),
          Output('p5-desktop-total-card', 'children'),
-         Output('p5-mobile-percentage-card', 'children')],
+         Output('p5-mobile-percentage-card', 'children'),
+         Output('p5-figure-signature', 'data')],
         [Input('p5-date-range-picker', 'start_date'),
          Input('p5-date-range-picker', 'end_date'),
          Input('p5-country-filter', 'value'),
          Input('p5-device-filter', 'value'),
          Input('p5-status-filter', 'value'),  # Added Input for Status
+         Input('p5-compare-filter', 'value'),
          Input('data-source-selector', 'value'),
-         Input('global-data-store', 'data')]
+         Input('global-data-store', 'data')],
+        [State('p5-figure-signature', 'data'),
+         State('dataset-version', 'data')]
     )
     def update_page_5_content(start_date, end_date, selected_countries, selected_devices, selected_statuses,
-                              data_source, json_data):
+                              compare_mode, data_source, json_data, figure_signature, dataset_version):
         """Updates the pie chart and summary cards based on user filters."""
 
         if json_data is None:
-            return no_update, no_update, no_update, no_update, no_update
+            return no_update, no_update, no_update, no_update, no_update, no_update
 
         df = pd.DataFrame(json_data)
 
@@ -164,21 +178,20 @@ def register_callbacks(app):
         if 'dtype' in filtered_df.columns:
             filtered_df['dtype'] = filtered_df['dtype'].astype(str).str.strip().str.title()
         else:
-            empty_fig = go.Figure().update_layout(title="Data Error: 'dtype' column missing.")
+            empty_fig = empty_figure("Data Error: 'dtype' column missing.")
             return empty_fig, \
                 create_summary_card("Total Applications", 0, "primary"), \
                 create_summary_card("Mobile Users", 0, "warning"), \
                 create_summary_card("Desktop Users", 0, "info"), \
-                create_summary_card("Mobile %", "N/A", "secondary")
+                create_summary_card("Mobile %", "N/A", "secondary"), None
 
         # --- Date Filtering ---
         if not start_date: start_date = df['application_date'].min().date()
         if not end_date: end_date = df['application_date'].max().date()
 
-        filtered_df = filtered_df[
-            (filtered_df['application_date'] >= str(start_date)) &
-            (filtered_df['application_date'] <= str(end_date))
-            ]
+        # The selected range and the comparison period are looked up together; the filters
+        # below run once over both and split_periods() separates them afterwards
+        filtered_df = period_frame(filtered_df, start_date, end_date, compare_mode, dataset_version)
 
         # --- Country Filtering ---
         if selected_countries:
@@ -195,62 +208,52 @@ def register_callbacks(app):
         if 'All' not in selected_devices and selected_devices:
             filtered_df = filtered_df[filtered_df['dtype'].isin(selected_devices)]
 
+        filtered_df, previous_df = split_periods(filtered_df, compare_mode)
+
         # --- Handle Empty Data ---
         if filtered_df.empty:
-            empty_fig = go.Figure().update_layout(title="No data available for the selected filters.")
+            empty_fig = empty_figure("No data available for the selected filters.")
             return empty_fig, \
                 create_summary_card("Total Applications", 0, "primary"), \
                 create_summary_card("Mobile Users", 0, "warning"), \
                 create_summary_card("Desktop Users", 0, "info"), \
-                create_summary_card("Mobile %", "0.00%", "secondary")
+                create_summary_card("Mobile %", "0.00%", "secondary"), None
 
         # --- Summary Cards Calculations ---
-        total_count = filtered_df.shape[0]
-        mobile_count = filtered_df[filtered_df['dtype'] == 'Mobile'].shape[0]
-        desktop_count = filtered_df[filtered_df['dtype'] == 'Desktop'].shape[0]
+        total_count = count_rows(filtered_df)
+        mobile_count = count_rows(filtered_df[filtered_df['dtype'] == 'Mobile'])
+        desktop_count = count_rows(filtered_df[filtered_df['dtype'] == 'Desktop'])
 
         mobile_percentage = (mobile_count / total_count) * 100 if total_count > 0 else 0.0
 
         suffix = "Users" if data_source == 'latest_unique' else "CVs"
 
-        def generate_device_pie_chart(df_pie, title):
-            """Generates a simple Pie Chart showing Mobile vs Desktop split."""
-            df_pie['devicetype_display'] = df_pie['dtype'].astype(str).str.title().fillna('Unknown')
-
-            color_map = {
-                'Mobile': 'orange',
-                'Desktop': 'blue',
-                'Unknown': 'grey'
-            }
-
-            fig = go.Figure(data=[go.Pie(
-                labels=df_pie['devicetype_display'],
-                values=df_pie['count'],
-                hole=0,
-                marker=dict(colors=[color_map.get(label, 'grey') for label in df_pie['devicetype_display']]),
-                textinfo='percent+label',
-                insidetextorientation='radial'
-            )])
-
-            fig.update_layout(
-                title=title,
-                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-                plot_bgcolor='white',
-                paper_bgcolor='white',
-                margin=dict(t=50, b=50, l=50, r=50),
-                height=500,
-            )
-            return fig
-
-        total_card = create_summary_card(f"Total {suffix}", total_count, "primary")
-        mobile_card = create_summary_card(f"Mobile {suffix}", mobile_count, "warning")
-        desktop_card = create_summary_card(f"Desktop {suffix}", desktop_count, "info")
-        mobile_perc_card = create_summary_card("Mobile %", f"{mobile_percentage:.2f}%", "secondary")
+        # Comparison period
+        previous_total = previous_mobile = previous_desktop = previous_percentage = None
+        if previous_df is not None:
+            previous_total = count_rows(previous_df)
+            previous_mobile = count_rows(previous_df[previous_df['dtype'] == 'Mobile'])
+            previous_desktop = count_rows(previous_df[previous_df['dtype'] == 'Desktop'])
+            previous_percentage = (previous_mobile / previous_total) * 100 if previous_total > 0 else None
+
+        total_card = create_summary_card(f"Total {suffix}", total_count, "primary",
+                                         delta_text(total_count, previous_total, compare_mode))
+        mobile_card = create_summary_card(f"Mobile {suffix}", mobile_count, "warning",
+                                          delta_text(mobile_count, previous_mobile, compare_mode))
+        desktop_card = create_summary_card(f"Desktop {suffix}", desktop_count, "info",
+                                           delta_text(desktop_count, previous_desktop, compare_mode))
+        mobile_perc_card = create_summary_card("Mobile %", f"{mobile_percentage:.2f}%", "secondary",
+                                               delta_points_text(mobile_percentage, previous_percentage,
+                                                                 compare_mode))
 
         # --- Data Aggregation for Pie Chart ---
-        device_counts = filtered_df.groupby('dtype').size().reset_index(name='count')
+        device_counts = count_rows(filtered_df, 'dtype').reset_index(name='count')
 
         # Generate Pie Chart
-        fig = generate_device_pie_chart(device_counts, 'Overall Device Type Distribution')
+        device_labels = device_counts['dtype'].astype(str).str.title().fillna('Unknown')
+        fig = pie_figure(device_labels, device_counts['count'],
+                         device_labels.map(DEVICE_COLOR_MAP).fillna('grey'),
+                         'Overall Device Type Distribution')
 
-        return fig, total_card, mobile_card, desktop_card, mobile_perc_card
\ No newline at end of file
+        fig, signature = figure_or_patch(fig, figure_signature)
+        return fig, total_card, mobile_card, desktop_card, mobile_perc_card, signature
\ No newline at end of file
@@ -1,30 +1,43 @@
 # job_portal_dashboard/Monthly_Trend.py
 
 import pandas as pd
-import plotly.graph_objects as go
-from dash import html, dcc, callback, Input, Output, no_update
+from dash import html, dcc, callback, Input, Output, State, no_update
 import dash_bootstrap_components as dbc
 
+from jobpage_status.chart_builder import figure_or_patch, status_bar_line_figure, comparison_line_trace, \
+    empty_figure, DATE_XAXIS
+from jobpage_status.period_compare import compare_control, period_frame, split_periods, shift_to_current, \
+    delta_text, comparison_name
+from jobpage_status.timeseries import cached_daily_rolling, filter_key, downsample, point_budget, \
+    rolling_overlay_control, rolling_overlay_traces, count_rows, row_weights, DAYS_PER_MONTH
+from jobpage_status.anomalies import anomaly_flags, monthly_anomaly_traces
+
 
 # --- 1. Helper Functions ---
 
-def create_summary_card(title, value, color_class="primary"):
+def create_summary_card(title, value, color_class="primary", delta=None):
+    body = [
+        html.H6(title, className="card-title", style={'opacity': '0.9', 'color': 'white'}),
+        html.H2(f"{value:,}", className="card-text",style={'fontWeight': 'bold', 'color': 'white'}),
+    ]
+    # Optional comparison with the previous period (see period_compare.delta_text)
+    if delta:
+        body.append(html.P(delta, className="card-text small mb-0", style={'color': 'white', 'opacity': '0.85'}))
     return dbc.Card(
-        dbc.CardBody([
-            html.H6(title, className="card-title", style={'opacity': '0.9', 'color': 'white'}),
-            html.H2(f"{value:,}", className="card-text",style={'fontWeight': 'bold', 'color': 'white'}),
-        ]),
+        dbc.CardBody(body),
         color=color_class, inverse=True, className=f"mb-4 shadow-sm {color_class}"
 )
 
 # --- 2. Layout ---
 layout = dbc.Container([
     html.H2("Page 2: Monthly Trend Analysis", className="text-center my-4", style={'color': '#2c3e50'}),
+    dcc.Store(id='p2-figure-signature'),  # Layout signature of the figure on screen (see figure_or_patch)
     dbc.Row([
         dbc.Col([html.Label("Select Date Range:", className="control-label"),
-                 dcc.DatePickerRange(id='p2-date-range-picker', display_format='YYYY-MM-DD')], width=6),
+                 dcc.DatePickerRange(id='p2-date-range-picker', display_format='YYYY-MM-DD')], width=4),
         dbc.Col([html.Label("Select Country:", className="control-label"),
-                 dcc.Dropdown(id='p2-country-filter', multi=True)], width=6)
+                 dcc.Dropdown(id='p2-country-filter', multi=True)], width=4),
+        dbc.Col(compare_control('p2'), width=4)
     ], className="mb-4 glass-container"),
     dbc.Row([
         dbc.Col(id='p2-total-applications-card', width=4),
@@ -35,6 +48,8 @@ layout = dbc.Container([
     #graph
         html.Div([
         # Optional: Add a Title inside the glass box
+        # Moving-average overlays
+        rolling_overlay_control('p2'),
         # The Graph
         dcc.Graph(id='p2-monthly-cv-graph', style={'height': '500px'}),
     ],className="glass-container")
@@ -52,20 +67,26 @@ def register_callbacks(app):
          Output('p2-inactive-applications-card', 'children'),
          Output('p2-date-range-picker', 'min_date_allowed'),
          Output('p2-date-range-picker', 'max_date_allowed'),
-         Output('p2-country-filter', 'options')],
+         Output('p2-country-filter', 'options'),
+         Output('p2-figure-signature', 'data')],
         [Input('p2-date-range-picker', 'start_date'),
          Input('p2-date-range-picker', 'end_date'),
          Input('p2-country-filter', 'value'),
+         Input('p2-rolling-overlay', 'value'),
+         Input('p2-compare-filter', 'value'),
          Input('data-source-selector', 'value'),
-         Input('global-data-store', 'data')]
+         Input('global-data-store', 'data')],
+        [State('p2-figure-signature', 'data'),
+         State('dataset-version', 'data')]
     )
-    def update_page_2(start_date, end_date, selected_countries,data_source, json_data):
+    def update_page_2(start_date, end_date, selected_countries, rolling_windows, compare_mode, data_source,
+                      json_data, figure_signature, dataset_version):
 
         suffix = "user" if data_source == 'latest_unique' else "cv"
 
         # 1. Check Data
         if json_data is None:
-            return no_update, no_update, no_update, no_update, no_update, no_update, []
+            return no_update, no_update, no_update, no_update, no_update, no_update, [], no_update
 
         # 2. Load Data
         df = pd.DataFrame(json_data)
@@ -79,83 +100,31 @@ def register_callbacks(app):
         if not start_date: start_date = min_date
         if not end_date: end_date = max_date
 
-        # 5. Filter
-        filtered_df = df.copy()
-        filtered_df = filtered_df[
-            (filtered_df['application_date'] >= str(start_date)) &
-            (filtered_df['application_date'] <= str(end_date))
-            ]
+        # 5. Filter (the selected range and the comparison period in one pass)
+        filtered_df = period_frame(df, start_date, end_date, compare_mode, dataset_version)
         if selected_countries:
             filtered_df = filtered_df[filtered_df['applicant_location'].isin(selected_countries)]
+        filtered_df, previous_df = split_periods(filtered_df, compare_mode)
 
         # 6. Handle Empty
         if filtered_df.empty:
-            return go.Figure(), create_summary_card("Total", 0, "primary"), \
+            return empty_figure(), create_summary_card("Total", 0, "primary"), \
                 create_summary_card(f"Active ", 0, "success"), \
                 create_summary_card("Inactive", 0, "warning"), \
-                min_date, max_date, country_options
-
-        def generate_bar_line_graph(df_pivot, x_col, title, x_title):
-            fig = go.Figure()
-
-            # 1. Add Bar Traces (Primary Y-Axis)
-            fig.add_trace(
-                go.Bar(x=df_pivot[x_col], y=df_pivot['Inactive'], name='Inactive', marker_color='#8B4513', opacity=0.9))
-            fig.add_trace(
-                go.Bar(x=df_pivot[x_col], y=df_pivot['Active'], name='Active', marker_color='#191970', opacity=0.9))
-
-            # 2. Add Scatter Trace (Secondary Y-Axis) - THIS WAS MISSING
-            if 'Active_Percent' in df_pivot.columns:
-                fig.add_trace(go.Scatter(
-                    x=df_pivot[x_col],
-                    y=df_pivot['Active_Percent'],
-                    name='Active %',
-                    mode='lines+markers+text',
-                    yaxis='y2',  # Important: Map to secondary axis
-                    line=dict(color='#3CB371', width=3),
-                    marker=dict(size=8),
-                    text=[f"{p:.0f}%" for p in df_pivot['Active_Percent']],
-                    textposition="top center",
-                    textfont=dict(color='#3CB371')
-                ))
-
-            # 3. Update Layout for Dual Axis
-            fig.update_layout(
-                title=title,
-                barmode='group',
-                xaxis=dict(title=x_title),
-                # Primary Y-Axis (Counts)
-                yaxis=dict(
-                    title=f'{suffix} Count',
-                    title_font=dict(color='#191970'),
-                    tickformat='.0f',
-                    side='left',
-                    showgrid=True,
-                    gridcolor='#e0e0e0'
-                ),
-                # Secondary Y-Axis (Percentage)
-                yaxis2=dict(
-                    title='Active %',
-                    title_font=dict(color='#3CB371'),
-                    overlaying='y',
-                    side='right',
-                    range=[0, 110],  # Slightly >100 to fit labels
-                    tickformat='.0f',
-                    showgrid=False
-                ),
-                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-                plot_bgcolor='white', paper_bgcolor='white', margin=dict(t=50, b=50, l=50, r=50)
-            )
-            return fig
-
+                min_date, max_date, country_options, None
 
         # 7. Cards Data
-        total = len(filtered_df)
-        active = len(filtered_df[filtered_df['jobpage_status'] == 'Active'])
-        inactive = len(filtered_df[filtered_df['jobpage_status'] == 'Inactive'])
+        total = count_rows(filtered_df)
+        active = count_rows(filtered_df[filtered_df['jobpage_status'] == 'Active'])
+        inactive = count_rows(filtered_df[filtered_df['jobpage_status'] == 'Inactive'])
+
+        previous_counts = {}
+        if previous_df is not None:
+            previous_counts = count_rows(previous_df, 'jobpage_status').to_dict()
+            previous_counts['Total'] = count_rows(previous_df)
 
         # 8. Graph Data Preparation
-        monthly_counts = filtered_df.groupby(['year_month', 'jobpage_status']).size().reset_index(name='count')
+        monthly_counts = count_rows(filtered_df, ['year_month', 'jobpage_status']).reset_index(name='count')
         monthly_pivot = monthly_counts.pivot(index='year_month', columns='jobpage_status', values='count').fillna(0)
 
         # Ensure columns exist
@@ -172,10 +141,47 @@ def register_callbacks(app):
 
         monthly_pivot.reset_index(inplace=True)
 
-        # 9. Generate Graph
-        fig = generate_bar_line_graph(monthly_pivot, 'year_month', f'{suffix} Monthly Trend', 'Month')
-
-        return fig, create_summary_card(f"Total {suffix}", total, "primary"), \
-            create_summary_card(f"Active {suffix}", active, "success"), \
-            create_summary_card(f"Inactive {suffix}", inactive, "warning"), \
-            min_date, max_date, country_options
\ No newline at end of file
+        # 9. Moving averages (daily series, volume shown as a monthly rate to match the bars)
+        overlays, overlay_layout = [], {}
+        if rolling_windows:
+            daily_series = cached_daily_rolling(dataset_version,
+                                                filter_key('p2', start_date, end_date, selected_countries),
+                                                filtered_df['application_date'], filtered_df['jobpage_status'],
+                                                ['Active', 'Inactive'], numerator='Active',
+                                                weights=row_weights(filtered_df))
+            daily_series, _ = downsample(daily_series, 'Total_28d', point_budget(None))
+            overlays = rolling_overlay_traces(daily_series, rolling_windows, 'Active', 'Active %',
+                                              volume_scale=DAYS_PER_MONTH, volume_label=f'{suffix} per month')
+            overlay_layout = {'xaxis': DATE_XAXIS}
+
+        # Precomputed anomaly flags for the selected countries, marked per day along the bottom
+        anomalies = monthly_anomaly_traces(anomaly_flags(dataset_version, selected_countries), start_date, end_date,
+                                           volume_label=suffix)
+        if anomalies:
+            overlays += anomalies
+            overlay_layout = {'xaxis': DATE_XAXIS}
+
+        # Comparison period totals, moved onto the matching months of the selected range
+        if previous_df is not None:
+            previous_months = shift_to_current(previous_df['application_date'], start_date, end_date,
+                                               compare_mode).dt.to_period('M').astype(str)
+            previous_totals = count_rows(previous_df, previous_months).reindex(monthly_pivot['year_month'],
+                                                                               fill_value=0)
+            overlays.append(comparison_line_trace(comparison_name(compare_mode), previous_totals,
+                                                  monthly_pivot['year_month']))
+
+        # 10. Generate Graph
+        fig = status_bar_line_figure(monthly_pivot['year_month'], monthly_pivot['Inactive'], monthly_pivot['Active'],
+                                     monthly_pivot['Active_Percent'], f'{suffix} Monthly Trend', 'Month',
+                                     f'{suffix} Count', line_name='Active %', overlays=overlays,
+                                     yaxis2={'range': [0, 110]},  # Slightly >100 to fit labels
+                                     **overlay_layout)
+
+        fig, signature = figure_or_patch(fig, figure_signature)
+        return fig, create_summary_card(f"Total {suffix}", total, "primary",
+                                        delta_text(total, previous_counts.get('Total'), compare_mode)), \
+            create_summary_card(f"Active {suffix}", active, "success",
+                                delta_text(active, previous_counts.get('Active', 0), compare_mode)), \
+            create_summary_card(f"Inactive {suffix}", inactive, "warning",
+                                delta_text(inactive, previous_counts.get('Inactive', 0), compare_mode)), \
+            min_date, max_date, country_options, signature
\ No newline at end of file
@@ -1,11 +1,15 @@
 # job_portal_dashboard/Monthly_Overview.py
 
 import pandas as pd
-import plotly.graph_objects as go
-from dash import html, dcc, callback, Input, Output, no_update
+from dash import html, dcc, callback, Input, Output, State, no_update
 import dash_bootstrap_components as dbc
 from datetime import datetime
 
+from jobpage_status.chart_builder import figure_or_patch, device_bar_line_figure, empty_figure, DATE_XAXIS
+from jobpage_status.timeseries import cached_daily_rolling, filter_key, downsample, point_budget, \
+    rolling_overlay_control, rolling_overlay_traces, count_rows, row_weights, DAYS_PER_MONTH
+from jobpage_status.anomalies import anomaly_flags, monthly_anomaly_traces
+
 
 # --- Helper Functions ---
 def create_summary_card(title, value, color_class="primary"):
@@ -21,6 +25,7 @@ def create_summary_card(title, value, color_class="primary"):
 # --- Page Layout ---
 layout = dbc.Container([
     html.H2("Page 7: Monthly Trend by Device", className="text-center my-4", style={'color': '#2c3e50'}),
+    dcc.Store(id='p7-figure-signature'),  # Layout signature of the figure on screen (see figure_or_patch)
 
     # Filters Section
     dbc.Row([
@@ -57,6 +62,8 @@ layout = dbc.Container([
 
     html.Div([
         # Optional: Add a Title inside the glass box
+        # Moving-average overlays
+        rolling_overlay_control('p7'),
         # The Graph
         dcc.Graph(id='p7-monthly-device-cv-graph', style={'height': '500px'}),
     ],className="glass-container")
@@ -110,18 +117,23 @@ def register_callbacks(app):
          Output('p7-total-applications-card', 'children'),
          Output('p7-mobile-total-card', 'children'),
          Output('p7-desktop-total-card', 'children'),
-         Output('p7-mobile-percentage-card', 'children')],
+         Output('p7-mobile-percentage-card', 'children'),
+         Output('p7-figure-signature', 'data')],
         [Input('p7-date-range-picker', 'start_date'),
          Input('p7-date-range-picker', 'end_date'),
          Input('p7-country-filter', 'value'),
          Input('p7-status-filter', 'value'),  # Added Input for Status
+         Input('p7-rolling-overlay', 'value'),
          Input('data-source-selector', 'value'),
-         Input('global-data-store', 'data')]
+         Input('global-data-store', 'data')],
+        [State('p7-figure-signature', 'data'),
+         State('dataset-version', 'data')]
     )
-    def update_page_7(start_date, end_date, selected_countries, selected_statuses, data_source, json_data):
+    def update_page_7(start_date, end_date, selected_countries, selected_statuses, rolling_windows, data_source,
+                      json_data, figure_signature, dataset_version):
 
         if json_data is None:
-            return no_update, no_update, no_update, no_update, no_update
+            return no_update, no_update, no_update, no_update, no_update, no_update
 
         df = pd.DataFrame(json_data)
 
@@ -155,58 +167,20 @@ def register_callbacks(app):
 
         # Handle Empty Data
         if filtered_df.empty:
-            empty_fig = go.Figure().update_layout(title="No data available for the selected filters.")
+            empty_fig = empty_figure("No data available for the selected filters.")
             return empty_fig, \
                 create_summary_card("Total Applications", 0, "primary"), \
                 create_summary_card("Mobile CVs", 0, "warning"), \
                 create_summary_card("Desktop CVs", 0, "info"), \
-                create_summary_card("Mobile %", "0.00%", "secondary")
+                create_summary_card("Mobile %", "0.00%", "secondary"), None
 
         # Summary Cards
-        total_applications = filtered_df.shape[0]
-        mobile_count = filtered_df[filtered_df['dtype'] == 'mobile'].shape[0]
-        desktop_count = filtered_df[filtered_df['dtype'] == 'desktop'].shape[0]
+        total_applications = count_rows(filtered_df)
+        mobile_count = count_rows(filtered_df[filtered_df['dtype'] == 'mobile'])
+        desktop_count = count_rows(filtered_df[filtered_df['dtype'] == 'desktop'])
 
         suffix = "Users" if data_source == 'latest_unique' else "CVs"
 
-        def generate_device_monthly_graph(df_pivot, x_col, title, x_title):
-            """Generates a combined Bar and Line graph for monthly Mobile vs Desktop counts."""
-            fig = go.Figure()
-
-            # Bar Traces: Mobile and Desktop counts (using lowercase names from aggregation)
-            if 'desktop' in df_pivot.columns:
-                fig.add_trace(
-                    go.Bar(x=df_pivot[x_col], y=df_pivot['desktop'], name='Desktop', marker_color='#191970',
-                           opacity=0.9))
-            if 'mobile' in df_pivot.columns:
-                fig.add_trace(
-                    go.Bar(x=df_pivot[x_col], y=df_pivot['mobile'], name='Mobile', marker_color='#FF8C00', opacity=0.9))
-
-            # Line Trace: Mobile Percentage of Total
-            if 'Mobile_Percent' in df_pivot.columns and not df_pivot['Mobile_Percent'].isnull().all():
-                fig.add_trace(go.Scatter(
-                    x=df_pivot[x_col], y=df_pivot['Mobile_Percent'], name='Mobile %', mode='lines+markers+text',
-                    yaxis='y2',
-                    line=dict(color='#3CB371', width=3), marker=dict(size=8),
-                    text=[f"{p:.0f}%" for p in df_pivot['Mobile_Percent']], textposition="top center",
-                    textfont=dict(color='#3CB371')
-                ))
-
-            fig.update_layout(
-                title=title,
-                barmode='group',
-                xaxis=dict(title=x_title),
-                yaxis=dict(title=f'{suffix} Count (Mobile/Desktop)', title_font=dict(color='#191970'), tickformat='.0f',
-                           side='left',
-                           showgrid=True, gridcolor='#e0e0e0', rangemode='tozero'),  # Ensure Y-axis starts at 0
-                yaxis2=dict(title='Mobile %', title_font=dict(color='#3CB371'), overlaying='y', side='right',
-                            range=[0, 100],
-                            tickformat='.0f', showgrid=False),
-                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-                plot_bgcolor='white', paper_bgcolor='white', margin=dict(t=50, b=50, l=50, r=50)
-            )
-            return fig
-
         total_card = create_summary_card(f"Total {suffix}", total_applications, "primary")
         mobile_card = create_summary_card(f"Mobile {suffix}", mobile_count, "warning")
         desktop_card = create_summary_card(f"Desktop {suffix}", desktop_count, "info")
@@ -215,7 +189,7 @@ def register_callbacks(app):
         mobile_perc_card = create_summary_card("Mobile %", f"{mobile_percentage:.2f}%", "secondary")
 
         # Graph Aggregation (Group by Year-Month and Device Type)
-        monthly_device_counts = filtered_df.groupby(['year_month', 'dtype']).size().reset_index(name='count')
+        monthly_device_counts = count_rows(filtered_df, ['year_month', 'dtype']).reset_index(name='count')
 
         # Pivot to get Mobile/Desktop counts per month
         monthly_pivot = monthly_device_counts.pivot_table(
@@ -238,9 +212,31 @@ def register_callbacks(app):
 
         monthly_pivot.sort_values('year_month', inplace=True)
 
+        # Moving averages (daily series, volume shown as a monthly rate to match the bars)
+        overlays, overlay_layout = [], {}
+        if rolling_windows:
+            daily_series = cached_daily_rolling(
+                dataset_version, filter_key('p7', start_date, end_date, selected_countries, selected_statuses),
+                filtered_df['application_date'], filtered_df['dtype'], ['mobile', 'desktop'], numerator='mobile',
+                weights=row_weights(filtered_df))
+            daily_series, _ = downsample(daily_series, 'Total_28d', point_budget(None))
+            overlays = rolling_overlay_traces(daily_series, rolling_windows, 'mobile', 'Mobile %',
+                                              volume_scale=DAYS_PER_MONTH, volume_label=f'{suffix} per month')
+            overlay_layout = {'xaxis': DATE_XAXIS}
+
+        # Precomputed volume anomaly flags for the selected countries (all statuses only)
+        if not selected_statuses:
+            anomalies = monthly_anomaly_traces(anomaly_flags(dataset_version, selected_countries), start_date,
+                                               end_date, include_percent=False, volume_label=suffix)
+            if anomalies:
+                overlays += anomalies
+                overlay_layout = {'xaxis': DATE_XAXIS}
+
         # Graph Generation
-        fig = generate_device_monthly_graph(monthly_pivot, 'year_month',
-                                            f'Monthly {suffix}: Mobile vs. Desktop {suffix}',
-                                            'Month')
+        fig = device_bar_line_figure(monthly_pivot['year_month'], monthly_pivot['desktop'], monthly_pivot['mobile'],
+                                     monthly_pivot['Mobile_Percent'],
+                                     f'Monthly {suffix}: Mobile vs. Desktop {suffix}', 'Month',
+                                     f'{suffix} Count (Mobile/Desktop)', overlays=overlays, **overlay_layout)
 
-        return fig, total_card, mobile_card, desktop_card, mobile_perc_card
\ No newline at end of file
+        fig, signature = figure_or_patch(fig, figure_signature)
+        return fig, total_card, mobile_card, desktop_card, mobile_perc_card, signature
\ No newline at end of file
@@ -1,12 +1,17 @@
 # job_portal_dashboard/Pie_Chart.py
 
 import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
-from dash import html, dcc, callback, Input, Output, no_update
+import numpy as np
+from dash import html, dcc, callback, Input, Output, State, Patch, ctx, no_update
 import dash_bootstrap_components as dbc
 from datetime import datetime, timedelta
 
+from jobpage_status.chart_builder import figure_or_patch, sunburst_figure, empty_figure, STATUS_COLOR_MAP, \
+    DEVICE_COLOR_MAP
+from jobpage_status.top_n import top_n_controls, register_drilldown, label_top_n, depth_title
+from jobpage_status.timeseries import filter_key, count_rows, WEIGHT_COLUMN
+from Data.dataset_cache import get_derived
+
 # Filter options (Static options)
 STATUS_OPTIONS = [
     {'label': 'All', 'value': 'All'},
@@ -14,6 +19,17 @@ STATUS_OPTIONS = [
     {'label': 'Inactive', 'value': 'Inactive'}
 ]
 
+# Country sectors hold a mix of statuses, so they get a neutral colour
+COUNTRY_SECTOR_COLOR = '#b0bec5'
+REGSOURCE_SECTOR_COLOR = '#cfd8dc'
+
+# Sunburst levels: Country -> Status -> Device -> Registration Source.
+# Only the first two are sent with the figure; deeper sectors are added when their parent is clicked.
+HIERARCHY_LEVELS = ['applicant_location', 'jobpage_status', 'dtype', 'regsource']
+INITIAL_LEVELS = 2
+COUNTRY_LEVEL = 1
+SECTOR_SEP = '/'
+
 
 # Helper functions
 def create_summary_card(title, value, color_class="primary"):
@@ -26,59 +42,132 @@ def create_summary_card(title, value, color_class="primary"):
 )
 
 
+def build_hierarchy(df, start_date, end_date, selected_countries, selected_statuses):
+    """
+    Applies the page filters and counts applications per Country -> Status -> Device -> Registration Source.
+
+    This table is small (one row per existing combination) and is all the sunburst needs: the top two
+    levels are sums over it and clicked sectors read their children from it, so it is cached per
+    dataset version and filter combination. Returns None if 'jobpage_status' is missing.
+    """
+    if 'jobpage_status' not in df.columns:
+        return None
+
+    dates = pd.to_datetime(df['application_date'])
+    # Handle default dates if inputs are None (e.g. initial load)
+    if not start_date:
+        start_date = dates.min().date()
+    if not end_date:
+        end_date = dates.max().date()
+    keep = (dates >= str(start_date)) & (dates <= str(end_date))
+
+    if selected_countries:
+        keep &= df['applicant_location'].isin(selected_countries)
+
+    filtered_df = df[keep]
+    status = filtered_df['jobpage_status'].str.strip().str.capitalize()
+
+    if not isinstance(selected_statuses, list):
+        selected_statuses = [selected_statuses]
+    if 'All' not in selected_statuses and selected_statuses:
+        in_status = status.isin(selected_statuses)
+        filtered_df, status = filtered_df[in_status], status[in_status]
+
+    def level(column):
+        if column not in filtered_df.columns:
+            return pd.Series('Unknown', index=filtered_df.index)
+        return filtered_df[column].fillna('Unknown').astype(str).str.strip()
+
+    leaves = pd.DataFrame({
+        'applicant_location': level('applicant_location'),
+        'jobpage_status': status.fillna('Unknown'),
+        'dtype': level('dtype').str.title(),
+        'regsource': level('regsource'),
+    })
+    if WEIGHT_COLUMN in filtered_df.columns:
+        leaves[WEIGHT_COLUMN] = filtered_df[WEIGHT_COLUMN]
+    return count_rows(leaves, HIERARCHY_LEVELS).reset_index(name='total_resumes')
+
+
+def display_countries(hierarchy, top_n, depth):
+    """Country label of every hierarchy row, with countries outside the top N folded into "Other"."""
+    country_totals = hierarchy.groupby('applicant_location')['total_resumes'].sum()
+    to_display = label_top_n(country_totals.index.to_numpy(), country_totals.to_numpy(), top_n, depth)
+    return to_display(hierarchy['applicant_location'])
+
+
+def sector_children(hierarchy, countries, path):
+    """
+    Child sectors of the sector at 'path' (its labels from the root, e.g. ['US', 'Active']).
+
+    Returns:
+        tuple: (ids, labels, parents, values, colors, levels) lists, ready to extend the sunburst trace.
+    """
+    match = countries.to_numpy() == path[0]
+    for column, label in zip(HIERARCHY_LEVELS[1:], path[1:]):
+        match &= hierarchy[column].to_numpy() == label
+    child_column = HIERARCHY_LEVELS[len(path)]
+    children = hierarchy[match].groupby(child_column)['total_resumes'].sum()
+
+    parent_id = SECTOR_SEP.join(path)
+    labels = children.index.astype(str).tolist()
+    if child_column == 'dtype':
+        colors = [DEVICE_COLOR_MAP.get(label, 'grey') for label in labels]
+    else:
+        colors = [REGSOURCE_SECTOR_COLOR] * len(labels)
+    return ([parent_id + SECTOR_SEP + label for label in labels], labels, [parent_id] * len(labels),
+            children.tolist(), colors, [len(path) + 1] * len(labels))
+
+
 # --- Modified generate_sunburst_chart function ---
 def generate_sunburst_chart(df_sunburst, title):
+    """
+    Builds the top two levels (Country -> Status) of the sunburst from pre-aggregated counts (no px
+    reshaping). Each sector carries its level as customdata, so a click can tell what to expand.
+    """
     # Ensure 'jobpage_status' is treated as a distinct category and handle potential NaNs
-    df_sunburst['cv_status_display'] = df_sunburst['jobpage_status'].fillna('Unknown')
-
-    # Define colors for statuses for consistency
-    color_map = {
-        'Active': 'green',
-        'Inactive': 'red',
-        'Unknown': 'grey'
-    }
-
-    # Create the sunburst chart using Plotly Express
-    fig = px.sunburst(df_sunburst,
-                      path=['applicant_location', 'cv_status_display'],  # Hierarchical path: Country -> Status
-                      values='total_resumes',
-                      title=title,
-                      color='cv_status_display',  # Color segments by status
-                      color_discrete_map=color_map,  # Apply defined colors
-                      branchvalues="total"  # Ensure values sum up correctly at each level
-                      )
-
-    fig.update_layout(
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-        plot_bgcolor='white',
-        paper_bgcolor='white',
-        margin=dict(t=50, b=50, l=50, r=50),
-        height=900,  # Adjust height as needed
-    )
-    return fig
+    status = df_sunburst['jobpage_status'].fillna('Unknown').astype(str)
+    country = df_sunburst['applicant_location'].astype(str)
+
+    # Level 1: Countries (value = sum of their statuses, as branchvalues="total" requires)
+    country_totals = df_sunburst.groupby(country)['total_resumes'].sum()
+
+    # Level 2: Country -> Status leaves
+    ids = np.concatenate([country_totals.index.to_numpy(), (country + '/' + status).to_numpy()])
+    labels = np.concatenate([country_totals.index.to_numpy(), status.to_numpy()])
+    parents = np.concatenate([np.full(len(country_totals), ''), country.to_numpy()])
+    values = np.concatenate([country_totals.to_numpy(), df_sunburst['total_resumes'].to_numpy()])
+    colors = np.concatenate([np.full(len(country_totals), COUNTRY_SECTOR_COLOR),
+                             status.map(STATUS_COLOR_MAP).fillna('grey').to_numpy()])
+    levels = np.concatenate([np.full(len(country_totals), COUNTRY_LEVEL), np.full(len(status), COUNTRY_LEVEL + 1)])
+
+    return sunburst_figure(ids, labels, parents, values, colors, title, customdata=levels)
 
 
 # Page layout
 layout = dbc.Container([
     html.H2("Page 4: Country and Status Breakdown", className="text-center my-4", style={'color': '#2c3e50'}),
+    dcc.Store(id='p4-figure-signature'),  # Layout signature of the figure on screen (see figure_or_patch)
+    dcc.Store(id='p4-expanded-sectors', data=[]),  # Sunburst sectors whose children have been added
 
     # Filters Section
     dbc.Row([
         dbc.Col([html.Label("Select Date Range:", className="control-label"),
                  dcc.DatePickerRange(id='p4-date-range-picker',
                                      display_format='YYYY-MM-DD')],
-                width=12, md=4),
+                width=12, md=3),
         dbc.Col([html.Label("Select Country:", className="control-label"),
                  dcc.Dropdown(id='p4-country-filter', value=[], multi=True,
                               placeholder="Select countries...")],
-                width=12, md=4),
+                width=12, md=3),
         dbc.Col([html.Label("Select Status:", className="control-label"),
                  dcc.Dropdown(id='p4-status-filter',
                               options=STATUS_OPTIONS,
                               value=['All'],  # Default to 'All' as a list
                               multi=True,  # Enable multi-select
                               placeholder="Select status...")],
-                width=12, md=4),
+                width=12, md=3),
+        dbc.Col(top_n_controls('p4'), width=12, md=3),
     ], className="mb-4 glass-container"),
 
     # Summary Cards
@@ -91,8 +180,10 @@ layout = dbc.Container([
     # Sunburst Chart Graph
     dbc.Row([
         dbc.Col(
-            html.Div(
-                dcc.Graph(id='p4-nested-status-sunburst'),
+            html.Div([
+                html.P("Click a status to break it down by device, then a device by registration source.",
+                       className="text-muted small mb-1"),
+                dcc.Graph(id='p4-nested-status-sunburst')],
                 style={
                     'height': '120vh',
                     'width': '100%',
@@ -137,79 +228,101 @@ def register_callbacks(app):
 
         return min_date, max_date, min_date, max_date, country_options
 
+    # Clicking the "Other" country sector drills into the next N countries ("Other" devices or sources do not)
+    register_drilldown(app, 'p4', 'p4-nested-status-sunburst', label_key='label', level=COUNTRY_LEVEL)
+
     # 2. Callback to Update Content (Triggered by Filters OR Data Load)
+    #    A click on a status or device sector only adds that sector's children (Patch)
     @app.callback(
         [Output('p4-nested-status-sunburst', 'figure'),
          Output('p4-total-applications-card', 'children'),
          Output('p4-active-applications-card', 'children'),
-         Output('p4-inactive-applications-card', 'children')],
+         Output('p4-inactive-applications-card', 'children'),
+         Output('p4-figure-signature', 'data'),
+         Output('p4-expanded-sectors', 'data')],
         [Input('p4-date-range-picker', 'start_date'),
          Input('p4-date-range-picker', 'end_date'),
          Input('p4-country-filter', 'value'),
          Input('p4-status-filter', 'value'),
+         Input('p4-top-n-filter', 'value'),
+         Input('p4-top-n-depth', 'data'),
+         Input('p4-nested-status-sunburst', 'clickData'),
          Input('data-source-selector', 'value'),
-         Input('global-data-store', 'data')]  # Add Store as Input
+         Input('global-data-store', 'data')],  # Add Store as Input
+        [State('p4-figure-signature', 'data'),
+         State('p4-expanded-sectors', 'data'),
+         State('dataset-version', 'data')]
     )
-    def update_page_4_content(start_date, end_date, selected_countries, selected_statuses,data_source, json_data):
+    def update_page_4_content(start_date, end_date, selected_countries, selected_statuses, top_n, depth,
+                              click_data, data_source, json_data, figure_signature, expanded_sectors,
+                              dataset_version):
 
         # Handle missing data
         if json_data is None:
-            return no_update, no_update, no_update, no_update
-
-        df = pd.DataFrame(json_data)
-
-        # --- Data Cleaning ---
-        if 'application_date' in df.columns:
-            df['application_date'] = pd.to_datetime(df['application_date'])
-
-        filtered_df = df.copy()
-
-        if 'jobpage_status' in filtered_df.columns:
-            filtered_df['jobpage_status'] = filtered_df['jobpage_status'].str.strip().str.capitalize()
-        else:
-            empty_fig = go.Figure().update_layout(title="Data Error: 'jobpage_status' column missing.")
+            return no_update, no_update, no_update, no_update, no_update, no_update
+
+        def hierarchy_from_store():
+            df = pd.DataFrame(json_data)
+            if 'application_date' in df.columns:
+                df['application_date'] = pd.to_datetime(df['application_date'])
+            return build_hierarchy(df, start_date, end_date, selected_countries, selected_statuses)
+
+        # Filtered Country -> Status -> Device -> Source counts, cached for these filters
+        hierarchy = get_derived(dataset_version,
+                                ('sunburst_hierarchy',) + filter_key(start_date, end_date, selected_countries,
+                                                                     selected_statuses),
+                                lambda df: build_hierarchy(df, start_date, end_date, selected_countries,
+                                                           selected_statuses))
+        if hierarchy is None:
+            hierarchy = hierarchy_from_store()
+
+        # --- Lazy Drill-Down ---
+        if ctx.triggered_id == 'p4-nested-status-sunburst':
+            point = (click_data or {}).get('points', [{}])[0]
+            sector, level = point.get('id'), point.get('customdata')
+            expanded_sectors = expanded_sectors or []
+            # Countries are handled by the "Other" drill-down; source sectors are leaves
+            expandable = isinstance(level, int) and INITIAL_LEVELS <= level < len(HIERARCHY_LEVELS)
+            if hierarchy is None or not expandable or sector in expanded_sectors:
+                return no_update, no_update, no_update, no_update, no_update, no_update
+
+            # Status and device labels never contain the separator, so split from the right
+            path = sector.rsplit(SECTOR_SEP, level - 1)
+            ids, labels, parents, values, colors, levels = sector_children(
+                hierarchy, display_countries(hierarchy, top_n, depth), path)
+
+            patch = Patch()
+            trace = patch['data'][0]
+            trace['ids'].extend(ids)
+            trace['labels'].extend(labels)
+            trace['parents'].extend(parents)
+            trace['values'].extend(values)
+            trace['marker']['colors'].extend(colors)
+            trace['customdata'].extend(levels)
+            trace['level'] = sector  # Zoom into the sector that was expanded
+            # The next filter change sends a full figure (the one on screen now has extra sectors)
+            return patch, no_update, no_update, no_update, None, expanded_sectors + [sector]
+
+        if hierarchy is None:
+            empty_fig = empty_figure("Data Error: 'jobpage_status' column missing.")
             return empty_fig, \
                 create_summary_card("Total Applications", 0, "primary"), \
                 create_summary_card("Active CVs", 0, "success"), \
-                create_summary_card("Inactive CVs", 0, "warning")
-
-        # --- Date Filtering ---
-        # Handle default dates if inputs are None (e.g. initial load)
-        if not start_date:
-            start_date = df['application_date'].min().date()
-        if not end_date:
-            end_date = df['application_date'].max().date()
-
-        # Apply Date Filter
-        # Convert string inputs to datetime for comparison
-        filtered_df = filtered_df[
-            (filtered_df['application_date'] >= str(start_date)) &
-            (filtered_df['application_date'] <= str(end_date))
-            ]
-
-        # --- Country Filtering ---
-        if selected_countries:
-            filtered_df = filtered_df[filtered_df['applicant_location'].isin(selected_countries)]
-
-        # --- Status Filtering ---
-        if not isinstance(selected_statuses, list):
-            selected_statuses = [selected_statuses]
-
-        if 'All' not in selected_statuses and selected_statuses:
-            filtered_df = filtered_df[filtered_df['jobpage_status'].isin(selected_statuses)]
+                create_summary_card("Inactive CVs", 0, "warning"), None, []
 
         # --- Handle Empty Data ---
-        if filtered_df.empty:
-            empty_fig = go.Figure().update_layout(title="No data available for the selected filters.")
+        if hierarchy.empty:
+            empty_fig = empty_figure("No data available for the selected filters.")
             return empty_fig, \
                 create_summary_card("Total Applications", 0, "primary"), \
                 create_summary_card("Active CVs", 0, "success"), \
-                create_summary_card("Inactive CVs", 0, "warning")
+                create_summary_card("Inactive CVs", 0, "warning"), None, []
 
         # --- Summary Cards ---
-        total_applications = filtered_df.shape[0]
-        active_applications = filtered_df[filtered_df['jobpage_status'] == 'Active'].shape[0]
-        inactive_applications = filtered_df[filtered_df['jobpage_status'] == 'Inactive'].shape[0]
+        status_totals = hierarchy.groupby('jobpage_status')['total_resumes'].sum()
+        total_applications = int(status_totals.sum())
+        active_applications = int(status_totals.get('Active', 0))
+        inactive_applications = int(status_totals.get('Inactive', 0))
 
         suffix = "Users" if data_source == 'latest_unique' else "CVs"
 
@@ -218,10 +331,16 @@ def register_callbacks(app):
         inactive_card = create_summary_card(f"Inactive {suffix}", inactive_applications, "warning")
 
         # --- Data Aggregation for Sunburst Chart ---
-        nested_counts = filtered_df.groupby(['applicant_location', 'jobpage_status']).size().reset_index(
-            name='total_resumes')
+        # Keep the top-N countries as sectors, fold the rest into an "Other" sector; only the
+        # Country -> Status levels are sent, deeper levels are added on click
+        nested_counts = hierarchy.groupby([display_countries(hierarchy, top_n, depth).to_numpy(),
+                                           hierarchy['jobpage_status']])['total_resumes'].sum()
+        nested_counts.index.names = ['applicant_location', 'jobpage_status']
+        nested_counts = nested_counts.reset_index()
 
         # Generate Sunburst Chart
-        fig = generate_sunburst_chart(nested_counts, 'Application Status Breakdown by Country')
+        fig = generate_sunburst_chart(nested_counts,
+                                      depth_title('Application Status Breakdown by Country', top_n, depth))
 
-        return fig, total_card, active_card, inactive_card
\ No newline at end of file
+        fig, signature = figure_or_patch(fig, figure_signature)
+        return fig, total_card, active_card, inactive_card, signature, []
@@ -1,25 +1,35 @@
 # job_portal_dashboard/Register_Source.py
 
 import pandas as pd
-import plotly.graph_objects as go
-from dash import html, dcc, callback, Input, Output, no_update
+from dash import html, dcc, callback, Input, Output, State, no_update
 import dash_bootstrap_components as dbc
 from datetime import datetime
 
+from jobpage_status.chart_builder import figure_or_patch, bar_line_figure, bar_trace, comparison_marker_trace, \
+    empty_figure, ACTIVE_COLOR
+from jobpage_status.top_n import top_n_controls, register_drilldown, fold_other, label_top_n, depth_title
+from jobpage_status.period_compare import compare_control, period_frame, split_periods, delta_text, comparison_name
+from jobpage_status.timeseries import count_rows
+
 
 # --- Helper Functions ---
-def create_summary_card(title, value, color_class="primary"):
+def create_summary_card(title, value, color_class="primary", delta=None):
+    body = [
+        html.H6(title, className="card-title", style={'opacity': '0.9', 'color': 'white'}),
+        html.H2(f"{value:,}", className="card-text",style={'fontWeight': 'bold', 'color': 'white'}),
+    ]
+    # Optional comparison with the previous period (see period_compare.delta_text)
+    if delta:
+        body.append(html.P(delta, className="card-text small mb-0", style={'color': 'white', 'opacity': '0.85'}))
     return dbc.Card(
-        dbc.CardBody([
-            html.H6(title, className="card-title", style={'opacity': '0.9', 'color': 'white'}),
-            html.H2(f"{value:,}", className="card-text",style={'fontWeight': 'bold', 'color': 'white'}),
-        ]),
+        dbc.CardBody(body),
         color=color_class, inverse=True, className=f"mb-4 shadow-sm {color_class}"
 )
 
 # --- Page Layout ---
 layout = dbc.Container([
     html.H2("Count by Registration Source", className="text-center my-4", style={'color': '#2c3e50'}),
+    dcc.Store(id='p9-figure-signature'),  # Layout signature of the figure on screen (see figure_or_patch)
 
     # Filters Section
     dbc.Row([
@@ -27,16 +37,18 @@ layout = dbc.Container([
                  dcc.DatePickerRange(
                      id='p9-date-range-filter',
                      display_format='YYYY-MM-DD'
-                 )],
-                width=12, md=4),
+                 ),
+                 html.Div(compare_control('p9'), className="mt-2")],
+                width=12, md=3),
         dbc.Col([html.Label("Select Country:", className="control-label"),
                  dcc.Dropdown(id='p9-country-filter', value=[], multi=True,
                               placeholder="Select countries...")],
-                width=12, md=4),
+                width=12, md=3),
         dbc.Col([html.Label("Select RegSource:", className="control-label"),
                  dcc.Dropdown(id='p9-regsource-filter', value=[], multi=True,
                               placeholder="Select registration sources...")],
-                width=12, md=4)
+                width=12, md=3),
+        dbc.Col(top_n_controls('p9'), width=12, md=3)
     ], className="mb-4 glass-container"),
 
     # Summary Cards
@@ -96,23 +108,33 @@ def register_callbacks(app):
 
         return min_date, max_date, min_date, max_date, country_options, regsource_options
 
+    # Clicking the "Other" bar drills into the next N sources
+    register_drilldown(app, 'p9', 'p9-cv-graph')
+
     # 2. Callback to Update Content (Triggered by Filters OR Data Load)
     @app.callback(
         [Output('p9-cv-graph', 'figure'),
          Output('p9-total-applications-card', 'children'),
          Output('p9-active-applications-card', 'children'),
-         Output('p9-inactive-applications-card', 'children')],
+         Output('p9-inactive-applications-card', 'children'),
+         Output('p9-figure-signature', 'data')],
         [Input('p9-date-range-filter', 'start_date'),
          Input('p9-date-range-filter', 'end_date'),
          Input('p9-country-filter', 'value'),
          Input('p9-regsource-filter', 'value'),
+         Input('p9-top-n-filter', 'value'),
+         Input('p9-top-n-depth', 'data'),
+         Input('p9-compare-filter', 'value'),
          Input('data-source-selector', 'value'),
-         Input('global-data-store', 'data')]  # Add Store as Input
+         Input('global-data-store', 'data')],  # Add Store as Input
+        [State('p9-figure-signature', 'data'),
+         State('dataset-version', 'data')]
     )
-    def update_page(start_date, end_date, selected_countries, selected_regsources,data_source, json_data):
+    def update_page(start_date, end_date, selected_countries, selected_regsources, top_n, depth, compare_mode,
+                    data_source, json_data, figure_signature, dataset_version):
 
         if json_data is None:
-            return no_update, no_update, no_update, no_update
+            return no_update, no_update, no_update, no_update, no_update
 
         df = pd.DataFrame(json_data)
 
@@ -120,17 +142,12 @@ def register_callbacks(app):
         if 'application_date' in df.columns:
             df['application_date'] = pd.to_datetime(df['application_date'])
 
-        filtered_df = df.copy()
-
         # Handle default dates
         if not start_date: start_date = df['application_date'].min().date()
         if not end_date: end_date = df['application_date'].max().date()
 
-        # Apply Date Filter
-        filtered_df = filtered_df[
-            (filtered_df['application_date'] >= str(start_date)) &
-            (filtered_df['application_date'] <= str(end_date))
-            ]
+        # Apply Date Filter (selected range and comparison period together, split after the other filters)
+        filtered_df = period_frame(df, start_date, end_date, compare_mode, dataset_version)
 
         # Apply Country Filter
         if selected_countries:
@@ -140,51 +157,44 @@ def register_callbacks(app):
         if selected_regsources and 'regsource' in filtered_df.columns:
             filtered_df = filtered_df[filtered_df['regsource'].isin(selected_regsources)]
 
+        filtered_df, previous_df = split_periods(filtered_df, compare_mode)
+
         # Handle Empty Data
         if filtered_df.empty:
-            empty_fig = go.Figure().update_layout(title="No data available for the selected filters.")
+            empty_fig = empty_figure("No data available for the selected filters.")
             return empty_fig, \
                 create_summary_card("Total Applications", 0, "primary"), \
                 create_summary_card("Active CVs", 0, "success"), \
-                create_summary_card("Inactive CVs", 0, "warning")
+                create_summary_card("Inactive CVs", 0, "warning"), None
 
         # Summary Cards
-        total_applications = filtered_df.shape[0]
-        active_applications = filtered_df[filtered_df['jobpage_status'] == 'Active'].shape[0]
-        inactive_applications = filtered_df[filtered_df['jobpage_status'] == 'Inactive'].shape[0]
+        total_applications = count_rows(filtered_df)
+        active_applications = count_rows(filtered_df[filtered_df['jobpage_status'] == 'Active'])
+        inactive_applications = count_rows(filtered_df[filtered_df['jobpage_status'] == 'Inactive'])
 
         suffix = "Users" if data_source == 'latest_unique' else "CVs"
 
-        def generate_bar_line_graph(df_pivot, x_col, title, x_title):
-            fig = go.Figure()
-            # Plot only the 'Total' column as requested
-            fig.add_trace(
-                go.Bar(x=df_pivot[x_col], y=df_pivot['Total'], name='Total CVs', marker_color='#191970', opacity=0.9)
-            )
-
-            fig.update_layout(
-                title=title,
-                xaxis=dict(title=x_title),
-                yaxis=dict(title=f'Total {suffix} Count', title_font=dict(color='#191970'), tickformat='.0f',
-                           side='left',
-                           showgrid=True, gridcolor='#e0e0e0'),
-                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-                plot_bgcolor='white', paper_bgcolor='white', margin=dict(t=50, b=50, l=50, r=50)
-            )
-            return fig
-
-
-        total_card = create_summary_card(f"Total {suffix}", total_applications, "primary")
-        active_card = create_summary_card(f"Active {suffix}", active_applications, "success")
-        inactive_card = create_summary_card(f"Inactive {suffix}", inactive_applications, "warning")
+        previous_counts = {}
+        if previous_df is not None:
+            previous_counts = count_rows(previous_df, 'jobpage_status').to_dict()
+            previous_counts['Total'] = count_rows(previous_df)
+
+        total_card = create_summary_card(f"Total {suffix}", total_applications, "primary",
+                                         delta_text(total_applications, previous_counts.get('Total'), compare_mode))
+        active_card = create_summary_card(f"Active {suffix}", active_applications, "success",
+                                          delta_text(active_applications, previous_counts.get('Active', 0),
+                                                     compare_mode))
+        inactive_card = create_summary_card(f"Inactive {suffix}", inactive_applications, "warning",
+                                            delta_text(inactive_applications, previous_counts.get('Inactive', 0),
+                                                       compare_mode))
 
         # Graph Aggregation
         if 'regsource' in filtered_df.columns:
-            regsource_counts = filtered_df.groupby(['regsource', 'jobpage_status']).size().reset_index(name='count')
+            regsource_counts = count_rows(filtered_df, ['regsource', 'jobpage_status']).reset_index(name='count')
             regsource_pivot = regsource_counts.pivot(index='regsource', columns='jobpage_status', values='count').fillna(0)
         else:
             # Fallback if column missing
-            regsource_pivot = pd.DataFrame(columns=['Active', 'Inactive'])
+            regsource_pivot = pd.DataFrame(columns=['Active', 'Inactive'], index=pd.Index([], name='regsource'))
 
         # Ensure 'Active' and 'Inactive' columns exist
         if 'Active' not in regsource_pivot.columns: regsource_pivot['Active'] = 0
@@ -194,9 +204,27 @@ def register_callbacks(app):
         regsource_pivot['Total'] = regsource_pivot['Active'] + regsource_pivot['Inactive']
         regsource_pivot.reset_index(inplace=True)
 
-        # Graph Generation
-        fig = generate_bar_line_graph(regsource_pivot, 'regsource',
-                                      f'Total {suffix} Count by Registration Source',
-                                      'Registration Source')
+        # Comparison period totals, bucketed like the current period's sources
+        previous_totals = None
+        if previous_df is not None and 'regsource' in previous_df.columns:
+            to_display = label_top_n(regsource_pivot['regsource'].to_numpy(), regsource_pivot['Total'].to_numpy(),
+                                     top_n, depth)
+            previous_totals = count_rows(previous_df, to_display(previous_df['regsource']))
 
-        return fig, total_card, active_card, inactive_card
\ No newline at end of file
+        # Keep the top-N sources, fold the rest into "Other"
+        regsource_pivot = fold_other(regsource_pivot, 'regsource', ['Active', 'Inactive', 'Total'], top_n, depth)
+
+        # Graph Generation
+        # Plot only the 'Total' column as requested
+        traces = [bar_trace('Total CVs', regsource_pivot['Total'], regsource_pivot['regsource'], ACTIVE_COLOR)]
+        if previous_totals is not None:
+            traces.append(comparison_marker_trace(comparison_name(compare_mode),
+                                                  previous_totals.reindex(regsource_pivot['regsource'], fill_value=0),
+                                                  regsource_pivot['regsource']))
+        fig = bar_line_figure(traces,
+                              depth_title(f'Total {suffix} Count by Registration Source', top_n, depth),
+                              'Registration Source',
+                              f'Total {suffix} Count', barmode=None)
+
+        fig, signature = figure_or_patch(fig, figure_signature)
+        return fig, total_card, active_card, inactive_card, signature
\ No newline at end of file
@@ -0,0 +1,197 @@
+# job_portal_dashboard/Top_Jobs.py
+
+import pandas as pd
+import numpy as np
+from dash import html, dcc, Input, Output, State, no_update
+import dash_bootstrap_components as dbc
+
+from jobpage_status.chart_builder import figure_or_patch, bar_line_figure, bar_trace, percent_line_trace, \
+    empty_figure, create_summary_card, MOBILE_COLOR, DESKTOP_COLOR
+from jobpage_status.heavy_hitters import JobCodes
+from jobpage_status.period_compare import window_rows, row_fingerprint
+from Data.dataset_cache import get_dataset, get_derived
+
+# Filter options (Static options)
+TOP_N_OPTIONS = [{'label': f'Top {n}', 'value': n} for n in [10, 20, 50, 100]]
+# Jobs drawn in the chart (the table lists all top N)
+CHART_TOP = 20
+LABEL_LENGTH = 30
+
+
+def job_label(ref_id, title):
+    """Axis label of a job: its title (shortened) and targetRefID."""
+    title = str(title) if title is not None and str(title) != 'nan' else ''
+    if len(title) > LABEL_LENGTH:
+        title = title[:LABEL_LENGTH - 1] + '…'
+    return f"{title} ({ref_id})" if title else str(ref_id)
+
+
+def leaderboard(df, dataset_version, start_date, end_date, selected_countries, top_n):
+    """
+    Top N jobs for the page filters, counted exactly over the window's rows with JobCodes.exact_top()
+    (the loaded rows are in memory, so no estimate is needed).
+
+    Returns:
+        tuple: (leaderboard DataFrame or None if 'targetRefID' is missing, rows in the window)
+    """
+    if 'targetRefID' not in df.columns:
+        return None, 0
+    codes = get_derived(dataset_version, ('job_codes', row_fingerprint(df['targetRefID'])),
+                        lambda _: JobCodes.from_frame(df))
+    if codes is None:
+        codes = JobCodes.from_frame(df)
+
+    rows = window_rows(df, start_date, end_date, dataset_version)
+    if selected_countries:
+        rows = rows[np.isin(df['applicant_location'].to_numpy()[rows], selected_countries)]
+    return codes.exact_top(rows, top_n), len(rows)
+
+
+def leaderboard_figure(top, suffix):
+    """Desktop / Mobile stacked bars per job with the Active % line."""
+    top = top.head(CHART_TOP)
+    labels = [job_label(ref_id, title) for ref_id, title in zip(top['targetRefID'], top['title'])]
+    mobile = np.rint(top['applications'] * top['mobile_percent'].fillna(0) / 100)
+    desktop = top['applications'] - mobile
+    traces = [bar_trace('Desktop', desktop, labels, DESKTOP_COLOR),
+              bar_trace('Mobile', mobile, labels, MOBILE_COLOR),
+              percent_line_trace('Active %', top['active_percent'].round(1), labels)]
+
+    return bar_line_figure(traces, f'Most Applied Jobs ({suffix})', 'Job', f'{suffix} Count', 'Active %',
+                           barmode='stack', xaxis={'tickangle': -35, 'automargin': True})
+
+
+def leaderboard_table(top):
+    """Rank / job / counts table for the top N jobs."""
+    table = pd.DataFrame({
+        'Rank': np.arange(1, len(top) + 1),
+        'Job ID': top['targetRefID'],
+        'Title': top['title'],
+        'Applications': [f"{count:,}" for count in top['applications']],
+        'Active %': top['active_percent'].map(lambda p: 'N/A' if pd.isna(p) else f"{p:.1f}%"),
+        'Mobile %': top['mobile_percent'].map(lambda p: 'N/A' if pd.isna(p) else f"{p:.1f}%"),
+        'Desktop %': top['mobile_percent'].map(lambda p: 'N/A' if pd.isna(p) else f"{100 - p:.1f}%"),
+    })
+    return dbc.Table.from_dataframe(table, striped=True, bordered=False, hover=True, size='sm')
+
+
+# Page layout
+layout = dbc.Container([
+    html.H2("Page 12: Top Applied Jobs", className="text-center my-4", style={'color': '#2c3e50'}),
+    dcc.Store(id='p12-figure-signature'),  # Layout signature of the figure on screen (see figure_or_patch)
+
+    # Filters Section
+    dbc.Row([
+        dbc.Col([html.Label("Select Date Range:", className="control-label"),
+                 dcc.DatePickerRange(id='p12-date-range-picker',
+                                     display_format='YYYY-MM-DD')],
+                width=12, md=4),
+        dbc.Col([html.Label("Select Country:", className="control-label"),
+                 dcc.Dropdown(id='p12-country-filter', value=[], multi=True,
+                              placeholder="Select countries...")],
+                width=12, md=5),
+        dbc.Col([html.Label("Show:", className="control-label"),
+                 dcc.Dropdown(id='p12-top-n-filter',
+                              options=TOP_N_OPTIONS,
+                              value=20,
+                              clearable=False)],
+                width=12, md=3),
+    ], className="mb-4 glass-container"),
+
+    # Summary Cards
+    dbc.Row([
+        dbc.Col(id='p12-total-jobs-card', width=12, md=4),
+        dbc.Col(id='p12-top-share-card', width=12, md=4),
+        dbc.Col(id='p12-top-job-card', width=12, md=4),
+    ], className="mb-4"),
+
+    # Graph and Table
+    dbc.Row([
+        dbc.Col(html.Div(dcc.Graph(id='p12-top-jobs-chart'), className="glass-container"), width=12)
+    ], className="mb-4"),
+    dbc.Row([
+        dbc.Col(html.Div(id='p12-top-jobs-table', className="glass-container"), width=12)
+    ])
+], fluid=True)
+
+
+# --- Callback Registration ---
+def register_callbacks(app):
+    """Registers all callbacks for Page 12 (Top Jobs)."""
+
+    # 1. Callback to Initialize Filters (Triggered by Data Load)
+    @app.callback(
+        [Output('p12-date-range-picker', 'min_date_allowed'),
+         Output('p12-date-range-picker', 'max_date_allowed'),
+         Output('p12-date-range-picker', 'start_date'),
+         Output('p12-date-range-picker', 'end_date'),
+         Output('p12-country-filter', 'options')],
+        [Input('global-data-store', 'data')]
+    )
+    def update_page_12_filters(json_data):
+        if json_data is None:
+            return no_update, no_update, no_update, no_update, []
+
+        df = pd.DataFrame(json_data)
+        dates = pd.to_datetime(df['application_date'])
+        min_date = dates.min().date()
+        max_date = dates.max().date()
+
+        country_options = [{'label': country, 'value': country} for country in
+                           sorted(df['applicant_location'].unique())]
+
+        return min_date, max_date, min_date, max_date, country_options
+
+    # 2. Callback to Update Content (Triggered by Filters OR Data Load)
+    @app.callback(
+        [Output('p12-top-jobs-chart', 'figure'),
+         Output('p12-top-jobs-table', 'children'),
+         Output('p12-total-jobs-card', 'children'),
+         Output('p12-top-share-card', 'children'),
+         Output('p12-top-job-card', 'children'),
+         Output('p12-figure-signature', 'data')],
+        [Input('p12-date-range-picker', 'start_date'),
+         Input('p12-date-range-picker', 'end_date'),
+         Input('p12-country-filter', 'value'),
+         Input('p12-top-n-filter', 'value'),
+         Input('data-source-selector', 'value'),
+         Input('global-data-store', 'data')],
+        [State('p12-figure-signature', 'data'),
+         State('dataset-version', 'data')]
+    )
+    def update_page_12_content(start_date, end_date, selected_countries, top_n, data_source, json_data,
+                               figure_signature, dataset_version):
+
+        if json_data is None:
+            return (no_update,) * 6
+
+        # The registered frame avoids rebuilding the rows from the store on every filter change
+        df = get_dataset(dataset_version)
+        if df is None:
+            df = pd.DataFrame(json_data)
+        if not start_date: start_date = pd.to_datetime(df['application_date']).min()
+        if not end_date: end_date = pd.to_datetime(df['application_date']).max()
+
+        suffix = "Users" if data_source == 'latest_unique' else "CVs"
+        top, total = leaderboard(df, dataset_version, start_date, end_date, selected_countries, top_n)
+
+        # --- Handle Missing / Empty Data ---
+        if top is None or top.empty:
+            message = "Data Error: 'targetRefID' column missing." if top is None \
+                else "No data available for the selected filters."
+            return empty_figure(message), None, create_summary_card(f"Top {top_n} {suffix}", 0, "primary"), \
+                create_summary_card(f"Share of {suffix}", "N/A", "info"), \
+                create_summary_card("Most Applied Job", "N/A", "secondary"), None
+
+        # --- Summary Cards ---
+        top_total = int(top['applications'].sum())
+        top_jobs_card = create_summary_card(f"Top {len(top)} {suffix}", top_total, "primary")
+        share_card = create_summary_card(f"Share of {suffix}",
+                                         f"{top_total / total * 100:.1f}%" if total else "N/A", "info")
+        top_job_card = create_summary_card("Most Applied Job",
+                                           job_label(top['targetRefID'].iloc[0], top['title'].iloc[0]),
+                                           "secondary")
+
+        # --- Graph and Table ---
+        fig, signature = figure_or_patch(leaderboard_figure(top, suffix), figure_signature)
+        return fig, leaderboard_table(top), top_jobs_card, share_card, top_job_card, signature
@@ -0,0 +1,300 @@
+# job_portal_dashboard/anomalies.py
+
+"""
+Daily-volume anomaly flags for the trend pages.
+
+Once per dataset version a background thread counts all rows into a zero-filled
+country x device x day cube (one np.bincount) and scores every series of the cube at
+once with a robust z-score against a seasonal baseline: the median and MAD of the same
+weekday over the previous BASELINE_WEEKS weeks. Days where the application volume or
+the Active % deviates by more than Z_THRESHOLD are kept as flags.
+
+Callbacks only read the finished flags (anomaly_flags() never computes anything), so
+filter changes do not wait for the detection; until it has finished no flags are shown.
+"""
+
+import threading
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from Data.dataset_cache import get_dataset, get_derived, peek_derived
+from jobpage_status.chart_builder import anomaly_marker_trace
+from jobpage_status.timeseries import row_weights
+
+CACHE_NAME = 'anomaly_flags'
+
+# Key of the all-countries / all-devices slices
+ALL = 'all'
+DEVICES = ['mobile', 'desktop']
+
+VOLUME = 'volume'
+ACTIVE_PERCENT = 'active_percent'
+
+# Baseline: same weekday over the previous 8 weeks, at least 4 of them inside the data
+BASELINE_WEEKS = 8
+MIN_BASELINE_WEEKS = 4
+# Series with a smaller usual daily volume are too noisy to flag
+MIN_DAILY_VOLUME = 5
+# |robust z| above which a day is flagged (Iglewicz and Hoaglin's cut-off)
+Z_THRESHOLD = 3.5
+# Scales a MAD to a standard deviation for normally distributed data
+MAD_TO_SIGMA = 1.4826
+# Smallest spread (percentage points) assumed for Active %
+MIN_PERCENT_SCALE = 1.0
+
+_running = set()
+_running_lock = threading.Lock()
+
+
+# --- Detection ---
+
+def build_cube(df):
+    """
+    Counts rows (summary rows by their application counts) per country, device and calendar day.
+
+    Returns:
+        tuple: (countries, devices, days, total, active). 'total' and 'active' have the shape
+               (len(countries), len(devices), len(days)); the last country and the last device
+               are the ALL slices (rows with an unknown country or device only count there).
+    """
+    days = pd.to_datetime(df['application_date'], errors='coerce').to_numpy().astype('datetime64[D]')
+    valid = ~np.isnat(days)
+    if not valid.any():
+        return [ALL], DEVICES + [ALL], np.array([], dtype='datetime64[D]'), np.zeros((1, 3, 0)), np.zeros((1, 3, 0))
+
+    country_codes, countries = pd.factorize(df['applicant_location'])
+    n_countries = len(countries)
+    country_codes = np.where(country_codes < 0, n_countries, country_codes)  # unknown country slot
+
+    if 'dtype' in df.columns:
+        device_codes = pd.Categorical(df['dtype'].astype(str).str.lower().str.strip(), categories=DEVICES).codes
+    else:
+        device_codes = np.full(len(df), -1)
+    n_devices = len(DEVICES)
+    device_codes = np.where(device_codes < 0, n_devices, device_codes)  # other device slot
+
+    first, last = days[valid].min(), days[valid].max()
+    n_days = int((last - first).astype(np.int64)) + 1
+    offsets = (days[valid] - first).astype(np.int64)
+
+    # One bincount per measure over (country, device, day), reshaped to the cube
+    flat = (country_codes[valid] * (n_devices + 1) + device_codes[valid]) * n_days + offsets
+    size = (n_countries + 1) * (n_devices + 1) * n_days
+    weights = row_weights(df)
+    weights = np.ones(len(df)) if weights is None else weights.astype(float)
+    is_active = (df['jobpage_status'].to_numpy() == 'Active')
+    total = np.bincount(flat, weights=weights[valid], minlength=size).reshape(n_countries + 1, n_devices + 1, n_days)
+    active = np.bincount(flat, weights=(weights * is_active)[valid], minlength=size).reshape(total.shape)
+
+    def with_all(cube):
+        # Replace the unknown slots by the totals over each axis
+        cube = np.concatenate([cube[:, :n_devices], cube.sum(axis=1, keepdims=True)], axis=1)
+        return np.concatenate([cube[:n_countries], cube.sum(axis=0, keepdims=True)], axis=0)
+
+    return (list(countries) + [ALL], DEVICES + [ALL], np.arange(first, last + 1),
+            with_all(total).astype(float), with_all(active).astype(float))
+
+
+def seasonal_baseline(values):
+    """
+    Median and MAD of the same weekday over the previous BASELINE_WEEKS weeks, for every day
+    of every series (last axis = days). NaN values are ignored.
+
+    Returns:
+        tuple: (median, mad, weeks) with the shape of 'values'; 'weeks' counts the usable weeks.
+    """
+    lagged = np.full(values.shape + (BASELINE_WEEKS,), np.nan)
+    for week in range(1, BASELINE_WEEKS + 1):
+        lag = 7 * week
+        if lag < values.shape[-1]:
+            lagged[..., lag:, week - 1] = values[..., :-lag]
+
+    weeks = np.count_nonzero(~np.isnan(lagged), axis=-1)
+    with warnings.catch_warnings():
+        # The first weeks of a series have no baseline (all-NaN slices)
+        warnings.simplefilter('ignore', RuntimeWarning)
+        median = np.nanmedian(lagged, axis=-1)
+        mad = np.nanmedian(np.abs(lagged - median[..., None]), axis=-1)
+    return median, mad, weeks
+
+
+def robust_scores(total, active):
+    """
+    Robust z-scores of the daily volume and Active % for every series of the cube.
+
+    The spread is the MAD scaled to a standard deviation, but never below the sampling noise
+    (Poisson for counts, binomial for the percentage), so quiet series do not flag every wobble.
+
+    Returns:
+        dict: {metric: (value, baseline, z, flagged)} arrays with the shape of the cube.
+    """
+    scores = {}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        median, mad, weeks = seasonal_baseline(total)
+        scale = np.maximum(MAD_TO_SIGMA * mad, np.sqrt(np.maximum(median, 1)))
+        z = (total - median) / scale
+        flagged = (weeks >= MIN_BASELINE_WEEKS) & (median >= MIN_DAILY_VOLUME) & (np.abs(z) >= Z_THRESHOLD)
+        scores[VOLUME] = (total, median, z, flagged)
+
+        # Active % is only scored on days with enough applications to be meaningful
+        percent = np.where(total >= MIN_DAILY_VOLUME, active / total * 100, np.nan)
+        median, mad, weeks = seasonal_baseline(percent)
+        share = median / 100
+        binomial = np.sqrt(share * (1 - share) / np.maximum(total, 1)) * 100
+        scale = np.maximum(np.maximum(MAD_TO_SIGMA * mad, binomial), MIN_PERCENT_SCALE)
+        z = (percent - median) / scale
+        flagged = (weeks >= MIN_BASELINE_WEEKS) & ~np.isnan(z) & (np.abs(z) >= Z_THRESHOLD)
+        scores[ACTIVE_PERCENT] = (percent, median, z, flagged)
+    return scores
+
+
+def detect_anomalies(df):
+    """
+    Flags anomalous days for every country x device slice of a dataset.
+
+    Returns:
+        dict: {(country, device): DataFrame[date, metric, value, baseline, z]} for the slices
+              with at least one flagged day (country / device may be ALL).
+    """
+    started = time.perf_counter()
+    countries, devices, days, total, active = build_cube(df)
+
+    tables = []
+    for metric, (value, baseline, z, flagged) in robust_scores(total, active).items():
+        country_idx, device_idx, day_idx = np.nonzero(flagged)
+        tables.append(pd.DataFrame({
+            'country': np.asarray(countries, dtype=object)[country_idx],
+            'device': np.asarray(devices, dtype=object)[device_idx],
+            'date': pd.to_datetime(days[day_idx]),
+            'metric': metric,
+            'value': value[flagged],
+            'baseline': baseline[flagged],
+            'z': z[flagged],
+        }))
+    table = pd.concat(tables, ignore_index=True)
+
+    flags = {key: group.drop(columns=['country', 'device']).reset_index(drop=True)
+             for key, group in table.groupby(['country', 'device'], sort=False)}
+    print(f"Anomaly detection: {len(table)} flags over {total.shape[0] * total.shape[1]} series "
+          f"x {total.shape[2]} days in {time.perf_counter() - started:.2f}s.")
+    return flags
+
+
+def _detect_or_empty(df):
+    try:
+        return detect_anomalies(df)
+    except Exception as e:
+        # Cache the failure as "no flags" rather than retrying on every callback
+        print(f"Anomaly detection failed: {e}")
+        return {}
+
+
+def _run(dataset_version):
+    try:
+        get_derived(dataset_version, CACHE_NAME, _detect_or_empty)
+    finally:
+        with _running_lock:
+            _running.discard(dataset_version)
+
+
+def start_anomaly_detection(dataset_version):
+    """Runs the detection for a registered dataset version in a background thread (once per version)."""
+    if get_dataset(dataset_version) is None or peek_derived(dataset_version, CACHE_NAME) is not None:
+        return
+    with _running_lock:
+        if dataset_version in _running:
+            return
+        _running.add(dataset_version)
+    threading.Thread(target=_run, args=(dataset_version,), name=f'anomalies-{dataset_version}', daemon=True).start()
+
+
+# --- Reading Flags ---
+
+def anomaly_flags(dataset_version, countries=None, device=ALL):
+    """
+    Precomputed flags for the selected countries (all countries if none are selected) and device.
+
+    Returns:
+        pd.DataFrame or None: Columns 'country', 'date', 'metric', 'value', 'baseline', 'z';
+                              None while the detection for this version has not finished.
+    """
+    flags = peek_derived(dataset_version, CACHE_NAME)
+    if flags is None:
+        # Not started yet, or dropped from the cache: detect again in the background
+        start_anomaly_detection(dataset_version)
+        return None
+
+    frames = [flags[(country, device)].assign(country=country)
+              for country in (countries or [ALL]) if (country, device) in flags]
+    if not frames:
+        return pd.DataFrame(columns=['country', 'date', 'metric', 'value', 'baseline', 'z'])
+    return pd.concat(frames, ignore_index=True)
+
+
+def _hover_text(flags, volume_label):
+    """One hover line per flag, joined per day (several countries can be flagged on the same day)."""
+    country = flags['country'].where(flags['country'] != ALL, 'All countries')
+    if flags['metric'].iloc[0] == VOLUME:
+        detail = (flags['value'].map('{:,.0f}'.format) + f' {volume_label} vs usual '
+                  + flags['baseline'].map('{:,.0f}'.format))
+    else:
+        detail = ('Active ' + flags['value'].map('{:.1f}%'.format) + ' vs usual '
+                  + flags['baseline'].map('{:.1f}%'.format))
+    lines = (flags['date'].dt.strftime('%Y-%m-%d') + ' ' + country + ': ' + detail
+             + ' (z ' + flags['z'].map('{:+.1f}'.format) + ')')
+    return lines.groupby(flags['date']).agg('<br>'.join)
+
+
+def daily_anomaly_traces(flags, series, numerator=None, volume_label='Volume'):
+    """
+    Markers for the flagged days of a daily chart, placed on the plotted value of that day.
+
+    Args:
+        flags (pd.DataFrame or None): From anomaly_flags().
+        series (pd.DataFrame): The page's zero-filled daily series ('date', 'Total' and 'numerator'),
+                               before downsampling; only flags inside its dates are drawn.
+        numerator (str): Column whose share is plotted on the % axis ('Active'); None skips
+                         the Active % flags.
+    """
+    if flags is None or flags.empty or series.empty:
+        return []
+    by_date = series.set_index('date')
+    flags = flags[flags['date'].isin(by_date.index)]
+
+    traces = []
+    volume = flags[flags['metric'] == VOLUME]
+    if not volume.empty:
+        text = _hover_text(volume, volume_label)
+        traces.append(anomaly_marker_trace('Volume anomaly', by_date['Total'].reindex(text.index), text.index, text))
+    percent = flags[flags['metric'] == ACTIVE_PERCENT]
+    if numerator and not percent.empty:
+        text = _hover_text(percent, volume_label)
+        days = by_date.reindex(text.index)
+        traces.append(anomaly_marker_trace('Active % anomaly', days[numerator] / days['Total'] * 100, text.index,
+                                           text, yaxis='y2'))
+    return traces
+
+
+def monthly_anomaly_traces(flags, start_date, end_date, include_percent=True, volume_label='Volume'):
+    """
+    Markers for the flagged days of a monthly chart: daily values do not fit the monthly bars,
+    so the days are marked along the bottom of the chart (the hover text has the details).
+    The chart needs a date x-axis (DATE_XAXIS).
+    """
+    if flags is None or flags.empty:
+        return []
+    in_range = (flags['date'] >= pd.Timestamp(start_date).normalize()) & \
+               (flags['date'] <= pd.Timestamp(end_date).normalize())
+    flags = flags[in_range]
+
+    traces = []
+    for metric, name in ((VOLUME, 'Volume anomaly'), (ACTIVE_PERCENT, 'Active % anomaly')):
+        selected = flags[flags['metric'] == metric]
+        if selected.empty or (metric == ACTIVE_PERCENT and not include_percent):
+            continue
+        text = _hover_text(selected, volume_label)
+        traces.append(anomaly_marker_trace(name, np.zeros(len(text)), text.index, text))
+    return traces
@@ -0,0 +1,387 @@
+# job_portal_dashboard/chart_builder.py
+
+"""
+Shared figure builders for the dashboard pages.
+
+Figures are returned as plain dicts (the JSON that Plotly.js consumes) instead of
+go.Figure objects, so callbacks skip plotly's per-property validation. Layouts are
+precomputed once at import time and only the per-call fields (titles, data) are
+filled in. Data labels use 'texttemplate' so no per-point strings are built in Python.
+
+Line traces pick their rendering from the number of points: SVG with a label on every
+point for short series, thinned labels for medium ones, and WebGL (scattergl) without
+labels for long ones (see WEBGL_POINT_THRESHOLD).
+"""
+
+import hashlib
+import json
+import math
+import os
+
+import numpy as np
+import plotly.io as pio
+import dash_bootstrap_components as dbc
+from dash import html, Patch
+
+# --- Colours (shared by all pages) ---
+INACTIVE_COLOR = '#8B4513'
+ACTIVE_COLOR = '#191970'
+PERCENT_COLOR = '#3CB371'
+MOBILE_COLOR = '#FF8C00'
+DESKTOP_COLOR = '#191970'
+
+ROLLING_VOLUME_COLOR = '#555555'
+COMPARISON_COLOR = '#7f8c8d'
+ANOMALY_COLOR = '#c0392b'
+# Line style per moving-average window (days)
+ROLLING_DASH = {7: 'dot', 28: 'dash'}
+
+STATUS_COLOR_MAP = {'Active': 'green', 'Inactive': 'red', 'Unknown': 'grey'}
+DEVICE_COLOR_MAP = {'Mobile': 'orange', 'Desktop': 'blue', 'Unknown': 'grey'}
+
+PERCENT_TEXTTEMPLATE = '%{y:.0f}%'
+
+# --- Rendering Density ---
+# Line traces with more points than this are drawn with WebGL (scattergl) and without data labels.
+# Override with the WEBGL_POINT_THRESHOLD environment variable.
+WEBGL_POINT_THRESHOLD = int(os.getenv('WEBGL_POINT_THRESHOLD', 500))
+# Maximum data labels per SVG line trace; longer traces label every k-th point
+MAX_TEXT_LABELS = 40
+
+# The default plotly template, serialised once. go.Figure() embeds it in every figure,
+# so keeping it here leaves the look of the charts unchanged.
+PLOTLY_TEMPLATE = pio.templates[pio.templates.default].to_plotly_json()
+
+_LEGEND = {'orientation': 'h', 'yanchor': 'bottom', 'y': 1.02, 'xanchor': 'right', 'x': 1}
+_MARGIN = {'t': 50, 'b': 50, 'l': 50, 'r': 50}
+
+# --- Precomputed Layout Templates ---
+BAR_LINE_LAYOUT = {
+    'template': PLOTLY_TEMPLATE,
+    'barmode': 'group',
+    'xaxis': {},
+    'yaxis': {'title': {'font': {'color': ACTIVE_COLOR}}, 'tickformat': '.0f', 'side': 'left',
+              'showgrid': True, 'gridcolor': '#e0e0e0'},
+    'yaxis2': {'title': {'font': {'color': PERCENT_COLOR}}, 'overlaying': 'y', 'side': 'right',
+               'range': [0, 100], 'tickformat': '.0f', 'showgrid': False},
+    'legend': _LEGEND,
+    'plot_bgcolor': 'white',
+    'paper_bgcolor': 'white',
+    'margin': _MARGIN,
+}
+
+SUNBURST_LAYOUT = {
+    'template': PLOTLY_TEMPLATE,
+    'legend': _LEGEND,
+    'plot_bgcolor': 'white',
+    'paper_bgcolor': 'white',
+    'margin': _MARGIN,
+    'height': 900,
+}
+
+PIE_LAYOUT = {
+    'template': PLOTLY_TEMPLATE,
+    'legend': _LEGEND,
+    'plot_bgcolor': 'white',
+    'paper_bgcolor': 'white',
+    'margin': _MARGIN,
+    'height': 500,
+}
+
+HEATMAP_LAYOUT = {
+    'template': PLOTLY_TEMPLATE,
+    'coloraxis': {'colorscale': 'Blues', 'colorbar': {'title': {'text': 'Count'}}},
+    'plot_bgcolor': 'white',
+    'paper_bgcolor': 'white',
+    'margin': _MARGIN,
+    'height': 450,
+}
+# Horizontal gap between side-by-side heatmap panels (fraction of the plot width)
+HEATMAP_PANEL_GAP = 0.04
+
+# Calendar-date axis used by the daily pages
+DATE_XAXIS = {'type': 'date'}
+
+
+# --- Helper Functions ---
+
+def _merge(template, overrides):
+    """
+    Returns a copy of 'template' with 'overrides' applied.
+    Nested dicts are merged rather than replaced; a None value removes the key.
+    """
+    merged = dict(template)
+    for key, value in overrides.items():
+        if value is None:
+            merged.pop(key, None)
+        elif isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def _values(data):
+    """Unwraps pandas objects to numpy arrays; the JSON encoder handles arrays directly."""
+    return data.to_numpy() if hasattr(data, 'to_numpy') else data
+
+
+def bar_trace(name, y, x, color, opacity=0.9):
+    """Builds a bar trace dict."""
+    return {'type': 'bar', 'x': _values(x), 'y': _values(y), 'name': name,
+            'marker': {'color': color}, 'opacity': opacity}
+
+
+def _fit_density(trace):
+    """
+    Adapts a line trace to its number of points:
+    - up to MAX_TEXT_LABELS points: unchanged (every point labelled)
+    - up to WEBGL_POINT_THRESHOLD points: SVG, only every k-th point labelled
+    - above: WebGL (scattergl); labelled traces drop their labels and shrink their markers
+    """
+    n_points = len(trace['x'])
+    has_text = 'texttemplate' in trace
+    if n_points > WEBGL_POINT_THRESHOLD:
+        trace['type'] = 'scattergl'
+        if has_text:
+            trace['mode'] = 'lines+markers'
+            trace['marker']['size'] = 4
+            for key in ('texttemplate', 'textposition', 'textfont'):
+                trace.pop(key, None)
+    elif has_text and n_points > MAX_TEXT_LABELS:
+        step = math.ceil(n_points / MAX_TEXT_LABELS)
+        labels = np.full(n_points, '', dtype=object)
+        labels[::step] = trace['texttemplate']
+        trace['texttemplate'] = labels
+    return trace
+
+
+def percent_line_trace(name, y, x, color=PERCENT_COLOR, line_width=3, text_color=True, opacity=None):
+    """Builds the 'lines+markers+text' percentage trace drawn on the secondary y-axis."""
+    trace = {
+        'type': 'scatter', 'x': _values(x), 'y': _values(y), 'name': name,
+        'mode': 'lines+markers+text', 'yaxis': 'y2',
+        'line': {'color': color, 'width': line_width},
+        'marker': {'size': 8},
+        'texttemplate': PERCENT_TEXTTEMPLATE, 'textposition': 'top center',
+    }
+    if text_color:
+        trace['textfont'] = {'color': color}
+    else:
+        trace['marker']['color'] = color
+    if opacity is not None:
+        trace['opacity'] = opacity
+    return _fit_density(trace)
+
+
+def rolling_line_trace(name, y, x, color, window, yaxis=None):
+    """Builds a plain moving-average line (no markers or labels), dashed according to the window."""
+    trace = {
+        'type': 'scatter', 'x': _values(x), 'y': _values(y), 'name': name, 'mode': 'lines',
+        'line': {'color': color, 'width': 2, 'dash': ROLLING_DASH.get(window, 'dot')},
+    }
+    if yaxis:
+        trace['yaxis'] = yaxis
+    return _fit_density(trace)
+
+
+def comparison_line_trace(name, y, x):
+    """Dashed line for the comparison period's totals on a trend chart."""
+    return _fit_density({
+        'type': 'scatter', 'x': _values(x), 'y': _values(y), 'name': name, 'mode': 'lines+markers',
+        'line': {'color': COMPARISON_COLOR, 'width': 2, 'dash': 'dash'}, 'marker': {'size': 6},
+    })
+
+
+def comparison_marker_trace(name, y, x):
+    """Horizontal tick per category marking the comparison period's total next to the bars."""
+    return {
+        'type': 'scatter', 'x': _values(x), 'y': _values(y), 'name': name, 'mode': 'markers',
+        'marker': {'symbol': 'line-ew-open', 'size': 24, 'color': COMPARISON_COLOR, 'line': {'width': 3}},
+    }
+
+
+def anomaly_marker_trace(name, y, x, text, yaxis=None):
+    """Flagged days (see anomalies.py) as red crosses; the hover text explains each flag."""
+    trace = {
+        'type': 'scatter', 'x': _values(x), 'y': _values(y), 'name': name, 'mode': 'markers',
+        'text': _values(text), 'hovertemplate': '%{text}<extra></extra>',
+        'marker': {'symbol': 'x', 'size': 11, 'color': ANOMALY_COLOR, 'line': {'width': 1, 'color': 'white'}},
+    }
+    if yaxis:
+        trace['yaxis'] = yaxis
+    return trace
+
+
+def bar_line_figure(traces, title, x_title, y_title, y2_title=None, **layout_overrides):
+    """
+    Builds a bar (+ percentage line) figure from the precomputed BAR_LINE_LAYOUT.
+
+    Args:
+        traces (list): Trace dicts from bar_trace() / percent_line_trace().
+        layout_overrides: Extra layout keys; nested dicts are merged into the template.
+    """
+    overrides = {
+        'title': {'text': title},
+        'xaxis': {'title': {'text': x_title}},
+        'yaxis': {'title': {'text': y_title}},
+    }
+    # No secondary axis unless a percentage line is drawn on it
+    overrides['yaxis2'] = {'title': {'text': y2_title}} if y2_title is not None else None
+    layout = _merge(_merge(BAR_LINE_LAYOUT, overrides), layout_overrides)
+    return {'data': traces, 'layout': layout}
+
+
+def status_bar_line_figure(x, inactive, active, active_percent, title, x_title, y_title,
+                           line_name='Active%', overlays=None, **layout_overrides):
+    """Inactive/Active grouped bars with the Active % line (status pages), plus optional overlay traces."""
+    traces = [bar_trace('Inactive', inactive, x, INACTIVE_COLOR),
+              bar_trace('Active', active, x, ACTIVE_COLOR)]
+    if active_percent is not None:
+        traces.append(percent_line_trace(line_name, active_percent, x))
+    traces.extend(overlays or [])
+    return bar_line_figure(traces, title, x_title, y_title, 'Active %', **layout_overrides)
+
+
+def device_bar_line_figure(x, desktop, mobile, mobile_percent, title, x_title, y_title, overlays=None,
+                           **layout_overrides):
+    """Desktop/Mobile grouped bars with the Mobile % line (device pages), plus optional overlay traces."""
+    traces = [bar_trace('Desktop', desktop, x, DESKTOP_COLOR),
+              bar_trace('Mobile', mobile, x, MOBILE_COLOR)]
+    if mobile_percent is not None:
+        traces.append(percent_line_trace('Mobile %', mobile_percent, x))
+    traces.extend(overlays or [])
+    return bar_line_figure(traces, title, x_title, y_title, 'Mobile %',
+                           **_merge({'yaxis': {'rangemode': 'tozero'}}, layout_overrides))
+
+
+def sunburst_figure(ids, labels, parents, values, colors, title, customdata=None, **layout_overrides):
+    """
+    Builds a sunburst from flat ids/labels/parents/values arrays (branchvalues='total').
+    Callers aggregate the hierarchy themselves, which avoids px.sunburst's dataframe reshaping.
+    'customdata' (one value per sector) is returned in the graph's clickData.
+    """
+    trace = {
+        'type': 'sunburst', 'ids': _values(ids), 'labels': _values(labels), 'parents': _values(parents),
+        'values': _values(values), 'branchvalues': 'total', 'marker': {'colors': _values(colors)},
+        'hovertemplate': '%{label}<br>Count: %{value}<extra></extra>',
+    }
+    if customdata is not None:
+        trace['customdata'] = _values(customdata)
+    layout = _merge(SUNBURST_LAYOUT, _merge({'title': {'text': title}}, layout_overrides))
+    return {'data': [trace], 'layout': layout}
+
+
+def pie_figure(labels, values, colors, title, **layout_overrides):
+    """Builds a pie chart from the precomputed PIE_LAYOUT."""
+    trace = {
+        'type': 'pie', 'labels': _values(labels), 'values': _values(values), 'hole': 0,
+        'marker': {'colors': _values(colors)}, 'textinfo': 'percent+label', 'insidetextorientation': 'radial',
+    }
+    layout = _merge(PIE_LAYOUT, _merge({'title': {'text': title}}, layout_overrides))
+    return {'data': [trace], 'layout': layout}
+
+
+def heatmap_figure(panels, x, y, title, x_title=None, tick_step=1, **layout_overrides):
+    """
+    Builds side-by-side heatmaps sharing one colour scale, one panel per (name, z) pair.
+
+    Args:
+        panels (list): (name, z) pairs; z has one row per y label and one column per x label.
+        x, y (list): Column and row labels (categories), rows drawn top to bottom.
+        tick_step (int): Label every tick_step-th column.
+    """
+    width = (1 - HEATMAP_PANEL_GAP * (len(panels) - 1)) / len(panels)
+    traces, overrides = [], {'title': {'text': title}}
+    for i, (name, z) in enumerate(panels):
+        suffix = '' if i == 0 else str(i + 1)
+        traces.append({
+            'type': 'heatmap', 'z': _values(z), 'x': _values(x), 'y': _values(y), 'name': name,
+            'xaxis': f'x{suffix}', 'yaxis': f'y{suffix}', 'coloraxis': 'coloraxis',
+            'hovertemplate': f'{name}<br>%{{y}} %{{x}}<br>Count: %{{z:,}}<extra></extra>',
+        })
+        start = i * (width + HEATMAP_PANEL_GAP)
+        axis_title = f'{name}: {x_title}' if x_title and len(panels) > 1 else (x_title or name)
+        overrides[f'xaxis{suffix}'] = {'domain': [start, start + width], 'anchor': f'y{suffix}',
+                                       'title': {'text': axis_title}, 'tickmode': 'array',
+                                       'tickvals': list(x)[::tick_step]}
+        overrides[f'yaxis{suffix}'] = {'anchor': f'x{suffix}', 'autorange': 'reversed', 'showticklabels': i == 0}
+    layout = _merge(HEATMAP_LAYOUT, _merge(overrides, layout_overrides))
+    return {'data': traces, 'layout': layout}
+
+
+def empty_figure(title=None):
+    """Placeholder figure used when there is no data to plot."""
+    layout = {'template': PLOTLY_TEMPLATE}
+    if title:
+        layout['title'] = {'text': title}
+    return {'data': [], 'layout': layout}
+
+
+def create_summary_card(title, value, color_class="primary"):
+    """Coloured summary card shown above a page's charts. Integer values get thousands separators."""
+    text = f"{value:,}" if isinstance(value, (int, np.integer)) else str(value)
+    return dbc.Card(
+        dbc.CardBody([
+            html.H6(title, className="card-title", style={'opacity': '0.9', 'color': 'white'}),
+            html.H2(text, className="card-text", style={'fontWeight': 'bold', 'color': 'white'}),
+        ]),
+        color=color_class, inverse=True, className=f"mb-4 shadow-sm {color_class}"
+    )
+
+
+# --- Partial Updates (dash.Patch) ---
+
+def _is_data(value):
+    """Arrays are trace data; everything else (names, colours, axes) is figure structure."""
+    return isinstance(value, (np.ndarray, list, tuple))
+
+
+def _split(node, path=()):
+    """Splits a trace dict into its structure (non-array values) and a {path: array} map of its data."""
+    structure, data = {}, {}
+    for key, value in node.items():
+        if isinstance(value, dict):
+            sub_structure, sub_data = _split(value, path + (key,))
+            structure[key] = sub_structure
+            data.update(sub_data)
+        elif _is_data(value):
+            structure[key] = '<data>'
+            data[path + (key,)] = value
+        else:
+            structure[key] = value
+    return structure, data
+
+
+def figure_signature(fig):
+    """
+    Hash of a figure's layout and trace structure, ignoring the trace data arrays.
+    Two figures with the same signature differ only in x/y/text (etc.) values.
+    """
+    layout = {key: value for key, value in fig['layout'].items() if key != 'template'}
+    structure = [_split(trace)[0] for trace in fig['data']]
+    payload = json.dumps([layout, structure], sort_keys=True, default=str)
+    return hashlib.md5(payload.encode('utf-8')).hexdigest()
+
+
+def figure_or_patch(fig, previous_signature):
+    """
+    Returns (figure_or_patch, signature) for a content callback.
+
+    When the browser already shows a figure with the same signature (same layout, axes,
+    colours and traces) only the data arrays are sent, as a dash.Patch. Otherwise the
+    full figure is returned. The signature is kept in a per-page dcc.Store, which is reset
+    whenever the page layout is rendered, so the full layout is sent once per page visit.
+    """
+    signature = figure_signature(fig)
+    if signature != previous_signature:
+        return fig, signature
+
+    patch = Patch()
+    for index, trace in enumerate(fig['data']):
+        for path, values in _split(trace)[1].items():
+            target = patch['data'][index]
+            for key in path[:-1]:
+                target = target[key]
+            target[path[-1]] = values
+    return patch, signature
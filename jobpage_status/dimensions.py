@@ -0,0 +1,148 @@
+# job_portal_dashboard/dimensions.py
+
+"""
+Shared aggregation for the categorical dimension pages.
+
+A dimension is any categorical column of the loaded data, configured in DIMENSIONS.
+For each dimension one count table is built per dataset version: the number of rows per
+day x country x dimension value x status x device, stored sparsely and sorted by day.
+A filter combination then selects its rows (binary search on the day, mask on the
+country) and sums them with one np.bincount, so changing the dates, countries or split
+never goes back to the raw rows.
+
+Adding a dimension is one DIMENSIONS entry.
+"""
+
+import numpy as np
+import pandas as pd
+
+from Data.dataset_cache import get_derived
+from jobpage_status.timeseries import pack_keys, unpack_keys, day_range, row_weights
+
+# Column -> display settings of each configured dimension
+DIMENSIONS = {
+    'trafficSource': {'label': 'Traffic Source'},
+    'dataSource': {'label': 'Data Source'},
+    'regsource': {'label': 'Registration Source'},
+    'siteInstanceID': {'label': 'Site'},
+}
+
+STATUSES = ['Active', 'Inactive']
+DEVICES = ['Desktop', 'Mobile', 'Unknown']
+MISSING_LABEL = 'Unknown'
+
+
+def dimension_options(columns):
+    """Dropdown options for the configured dimensions present in the data."""
+    return [{'label': config['label'], 'value': column} for column, config in DIMENSIONS.items()
+            if column in columns]
+
+
+def _labels(series):
+    """String labels of a categorical column; missing / blank values become MISSING_LABEL."""
+    labels = series.astype(str).str.strip()
+    return labels.mask(series.isna() | labels.isin(['', 'nan', 'None']), MISSING_LABEL)
+
+
+class DimensionCounts:
+    """
+    Sparse count table of one dimension.
+
+    'table' holds numpy arrays of equal length sorted by day: 'day' (days since epoch),
+    'country', 'value', 'status', 'device' codes and 'count'. 'countries' / 'values' hold the
+    labels of the country and value codes.
+    """
+
+    def __init__(self, table, countries, values):
+        self.table = table
+        self.countries = countries
+        self.values = values
+
+    @classmethod
+    def from_frame(cls, df, column):
+        """Builds the table from a loaded DataFrame; None if the column is missing."""
+        if df is None or column not in df.columns:
+            return None
+
+        country_codes, countries = pd.factorize(df['applicant_location'].astype(str), sort=True)
+        value_codes, values = pd.factorize(_labels(df[column]), sort=True)
+        status_codes = np.where(df['jobpage_status'].to_numpy() == 'Active', 0, 1)
+        device_codes = pd.Categorical(_labels(df['dtype']).str.title() if 'dtype' in df.columns
+                                      else pd.Series(MISSING_LABEL, index=df.index),
+                                      categories=DEVICES).codes.astype(np.int64)
+        device_codes[device_codes < 0] = DEVICES.index(MISSING_LABEL)
+        days = pd.to_datetime(df['application_date'], errors='coerce').to_numpy().astype('datetime64[D]')
+
+        sizes = [max(len(countries), 1), max(len(values), 1), len(STATUSES), len(DEVICES)]
+        valid = ~np.isnat(days) & (country_codes >= 0) & (value_codes >= 0)
+        key = pack_keys(days[valid], [codes[valid] for codes in
+                                      (country_codes, value_codes, status_codes, device_codes)], sizes)
+        # Summary rows count with their number of applications
+        weights = row_weights(df)
+        if weights is None:
+            keys, counts = np.unique(key, return_counts=True)
+        else:
+            keys, inverse = np.unique(key, return_inverse=True)
+            counts = np.bincount(inverse, weights=weights[valid], minlength=len(keys))
+
+        # Decode the sorted keys back into columns (so the table is sorted by day)
+        table = unpack_keys(keys, ['country', 'value', 'status', 'device'], sizes)
+        table['count'] = counts.astype(np.int64)
+        return cls(table, list(countries), list(values))
+
+    def aggregate(self, start_date=None, end_date=None, selected_countries=None, selected_values=None):
+        """
+        Counts per dimension value x status x device for a filter combination.
+
+        Returns:
+            np.ndarray: Shape (len(values), len(STATUSES), len(DEVICES)).
+        """
+        lo, hi = day_range(self.table['day'], start_date, end_date)
+
+        mask = np.ones(hi - lo, dtype=bool)
+        if selected_countries:
+            wanted = [i for i, country in enumerate(self.countries) if country in set(selected_countries)]
+            mask &= np.isin(self.table['country'][lo:hi], wanted)
+        if selected_values:
+            wanted = [i for i, value in enumerate(self.values) if value in set(selected_values)]
+            mask &= np.isin(self.table['value'][lo:hi], wanted)
+
+        cells = len(STATUSES) * len(DEVICES)
+        flat = (self.table['value'][lo:hi][mask].astype(np.int64) * len(STATUSES)
+                + self.table['status'][lo:hi][mask]) * len(DEVICES) + self.table['device'][lo:hi][mask]
+        counts = np.bincount(flat, weights=self.table['count'][lo:hi][mask],
+                             minlength=max(len(self.values), 1) * cells).astype(np.int64)
+        return counts.reshape(-1, len(STATUSES), len(DEVICES))[:len(self.values)]
+
+
+def dimension_counts(dataset_version, column, json_data=None):
+    """Count table of a dimension, cached per dataset version (built from the store rows if the version is unknown)."""
+    counts = get_derived(dataset_version, ('dimension_counts', column),
+                         lambda df: DimensionCounts.from_frame(df, column))
+    if counts is None and json_data is not None:
+        counts = DimensionCounts.from_frame(pd.DataFrame(json_data), column)
+    return counts
+
+
+def split_pivot(counts, values, split):
+    """
+    Pivot of aggregate() for the chart: one row per value with 'Total' and, per split,
+    one column per status ('status') or device ('device').
+
+    Returns:
+        tuple: (pd.DataFrame with a 'value' column, list of the split columns)
+    """
+    pivot = pd.DataFrame({'value': values, 'Total': counts.sum(axis=(1, 2))})
+    if split == 'status':
+        columns = STATUSES
+        parts = counts.sum(axis=2)
+    elif split == 'device':
+        # Only the device columns that occur
+        present = counts.sum(axis=(0, 1)) > 0
+        columns = [device for device, shown in zip(DEVICES, present) if shown]
+        parts = counts.sum(axis=1)[:, present]
+    else:
+        return pivot[pivot['Total'] > 0].reset_index(drop=True), []
+    for i, column in enumerate(columns):
+        pivot[column] = parts[:, i]
+    return pivot[pivot['Total'] > 0].reset_index(drop=True), columns
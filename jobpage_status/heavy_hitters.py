@@ -0,0 +1,76 @@
+# job_portal_dashboard/heavy_hitters.py
+
+"""
+Most-applied jobs (targetRefID) without sorting the rows.
+
+JobCodes holds an integer code per row for its targetRefID, plus the job title and the Active /
+Mobile flags, built once per dataset version. Counts for a filtered window are one np.bincount
+over the window's codes and the top N is taken with np.argpartition, so a filter change costs
+O(rows in the window) and the counts are exact.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class JobCodes:
+    """Per-row targetRefID codes with each job's title, and the row flags the leaderboard splits by."""
+
+    def __init__(self, codes, ref_ids, titles, active, mobile):
+        self.codes = codes
+        self.ref_ids = ref_ids
+        self.titles = titles
+        self.active = active
+        self.mobile = mobile
+
+    @classmethod
+    def from_frame(cls, df):
+        """Builds the codes from a loaded DataFrame; None if it has no 'targetRefID' column."""
+        if df is None or 'targetRefID' not in df.columns:
+            return None
+        codes, ref_ids = pd.factorize(df['targetRefID'])
+        codes = codes.astype(np.int64)
+
+        # Title of each job = title of its first row
+        first_row = np.full(len(ref_ids), -1, dtype=np.int64)
+        rows = np.arange(len(codes))[::-1]
+        valid = codes[::-1] >= 0
+        first_row[codes[::-1][valid]] = rows[valid]
+        titles = df['job_title'].to_numpy()[first_row] if 'job_title' in df.columns \
+            else np.full(len(ref_ids), '', dtype=object)
+
+        active = (df['jobpage_status'] == 'Active').to_numpy()
+        mobile = (df['dtype'].astype(str).str.strip().str.lower() == 'mobile').to_numpy() \
+            if 'dtype' in df.columns else np.zeros(len(df), dtype=bool)
+        return cls(codes, np.asarray(ref_ids), titles, active, mobile)
+
+    def exact_top(self, rows, n):
+        """
+        Exact leaderboard over the given row positions: one bincount per measure and an
+        argpartition for the top n (no sort of the rows).
+        """
+        codes = self.codes[rows]
+        valid = codes >= 0
+        codes = codes[valid]
+        counts = np.bincount(codes, minlength=len(self.ref_ids))
+        n = min(n, int(np.count_nonzero(counts)))
+        if n == 0:
+            return self._table(np.array([], dtype=np.int64), *(np.array([], dtype=np.int64),) * 3)
+
+        top = np.argpartition(-counts, n - 1)[:n]
+        top = top[np.argsort(-counts[top], kind='stable')]
+        active = np.bincount(codes, weights=self.active[rows][valid], minlength=len(self.ref_ids))
+        mobile = np.bincount(codes, weights=self.mobile[rows][valid], minlength=len(self.ref_ids))
+        return self._table(top, counts[top], active[top], mobile[top])
+
+    def _table(self, codes, counts, active, mobile):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            active_share = np.where(counts > 0, active / counts * 100, np.nan)
+            mobile_share = np.where(counts > 0, mobile / counts * 100, np.nan)
+        return pd.DataFrame({
+            'targetRefID': self.ref_ids[codes] if len(codes) else [],
+            'title': self.titles[codes] if len(codes) else [],
+            'applications': np.asarray(counts, dtype=np.int64),
+            'active_percent': active_share,
+            'mobile_percent': mobile_share,
+        })
@@ -0,0 +1,196 @@
+# job_portal_dashboard/latency_sketch.py
+
+"""
+Mergeable quantile sketches of the profile update latency (timeUpdatedUTC - timeCreatedUTC).
+
+Each sketch is a histogram over fixed logarithmic buckets (as in DDSketch): a latency x lands
+in bucket ceil(log_gamma(x)), so every quantile read from the buckets is within
+RELATIVE_ACCURACY of the true value. Because all sketches share the same buckets, merging
+sketches is adding their bucket counts.
+
+One sketch is kept per day x country x device x registration source, stored sparsely as a
+table sorted by day. A filter combination selects its rows (binary search on the day,
+masks on the other codes) and merges them with one np.bincount, instead of sorting the raw
+latencies again. The table is built chunk by chunk, so only one chunk of timestamps is
+converted at a time and none are kept afterwards.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from jobpage_status.timeseries import pack_keys, unpack_keys, day_range
+
+RELATIVE_ACCURACY = 0.02
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+# Latencies are clipped to [1 second, 10 years]
+MAX_LATENCY_SECONDS = 10 * 365 * 86400
+# Bucket 0 holds profiles never updated after creation (latency 0)
+ZERO_BUCKET = 0
+N_BUCKETS = math.ceil(math.log(MAX_LATENCY_SECONDS) / math.log(GAMMA)) + 2
+
+# Rows converted per chunk while building the sketches
+CHUNK_ROWS = 500_000
+
+DIMENSIONS = ['country', 'device', 'regsource']
+
+
+def bucket_index(seconds):
+    """Bucket of each latency (seconds): 0 for no update, otherwise 1 + ceil(log_gamma(x)), x >= 1 second."""
+    seconds = np.asarray(seconds, dtype=float)
+    clipped = np.clip(seconds, 1, MAX_LATENCY_SECONDS)
+    index = np.ceil(np.log(clipped) / np.log(GAMMA)).astype(np.int64) + 1
+    return np.where(seconds > 0, index, ZERO_BUCKET)
+
+
+def bucket_value(index):
+    """Representative latency (seconds) of bucket 'index' (>= 1), within RELATIVE_ACCURACY of any value in it."""
+    return 2 * GAMMA ** (np.asarray(index, dtype=float) - 1) / (GAMMA + 1)
+
+
+def quantiles(counts, qs):
+    """
+    Latency quantiles of merged sketches, ignoring profiles that were never updated.
+
+    Args:
+        counts (np.ndarray): Bucket counts, shape (N_BUCKETS,) or (groups, N_BUCKETS).
+        qs (list): Quantiles in [0, 1], e.g. [0.5, 0.9, 0.99].
+
+    Returns:
+        np.ndarray: Seconds, shape (len(qs),) or (groups, len(qs)); NaN where a sketch is empty.
+    """
+    single = np.ndim(counts) == 1
+    counts = np.atleast_2d(counts)[:, ZERO_BUCKET + 1:]
+    cumulative = np.cumsum(counts, axis=1)
+    total = cumulative[:, -1]
+    result = np.full((len(counts), len(qs)), np.nan)
+    for column, q in enumerate(qs):
+        # First bucket whose cumulative count passes the rank q * (n - 1)
+        rank = q * np.maximum(total - 1, 0)
+        index = np.argmax(cumulative > rank[:, None], axis=1) + ZERO_BUCKET + 1
+        result[:, column] = np.where(total > 0, bucket_value(index), np.nan)
+    return result[0] if single else result
+
+
+def histogram(counts, max_bins=40):
+    """
+    Re-bins a merged sketch (zero bucket excluded) into at most 'max_bins' bars.
+
+    Returns:
+        tuple: (lower-edge seconds of each bar, count of each bar).
+    """
+    counts = np.asarray(counts)[ZERO_BUCKET + 1:]
+    nonzero = np.flatnonzero(counts)
+    if not len(nonzero):
+        return np.array([]), np.array([], dtype=np.int64)
+    first, last = nonzero[0], nonzero[-1] + 1
+    step = max(1, math.ceil((last - first) / max_bins))
+    starts = np.arange(first, last, step)
+    return bucket_value(starts + ZERO_BUCKET + 1), np.add.reduceat(counts[first:last], starts - first)
+
+
+def format_duration(seconds):
+    """Short human-readable duration, e.g. '45s', '12m', '3.4h', '5.2d'."""
+    if seconds is None or np.isnan(seconds):
+        return "N/A"
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f}m"
+    if seconds < 86400:
+        return f"{seconds / 3600:.1f}h"
+    return f"{seconds / 86400:.1f}d"
+
+
+class LatencySketches:
+    """
+    Sparse table of per-day, per-dimension latency sketches.
+
+    Columns (numpy arrays of equal length, sorted by day): 'day' (days since epoch), one code
+    per DIMENSIONS entry, 'bucket' and 'count'. 'labels' maps each dimension to its values.
+    """
+
+    def __init__(self, table, labels):
+        self.table = table
+        self.labels = labels
+
+    @classmethod
+    def from_frame(cls, df, chunk_rows=CHUNK_ROWS):
+        """Builds the sketches from a loaded DataFrame (needs timeCreatedUTC and timeUpdatedUTC)."""
+        if df is None or 'timeCreatedUTC' not in df.columns or 'timeUpdatedUTC' not in df.columns:
+            return None
+
+        # Dimension codes for the whole frame (small integers); timestamps are converted per chunk
+        columns = {
+            'country': df['applicant_location'].astype(str),
+            'device': df['dtype'].astype(str).str.strip().str.title() if 'dtype' in df.columns
+            else pd.Series('Unknown', index=df.index),
+            'regsource': df['regsource'].astype(str).str.strip() if 'regsource' in df.columns
+            else pd.Series('Unknown', index=df.index),
+        }
+        codes, labels = {}, {}
+        for name in DIMENSIONS:
+            codes[name], uniques = pd.factorize(columns[name], sort=True)
+            labels[name] = list(uniques)
+        sizes = [max(len(labels[name]), 1) for name in DIMENSIONS]
+        days = pd.to_datetime(df['application_date'], errors='coerce').to_numpy().astype('datetime64[D]')
+
+        # Each (day, dimensions, bucket) combination as one int64 key; chunks are reduced to
+        # (key, count) pairs and the pairs are summed at the end (sketch merge = addition)
+        keys, counts = [], []
+        for start in range(0, len(df), chunk_rows):
+            stop = start + chunk_rows
+            created = pd.to_datetime(df['timeCreatedUTC'].iloc[start:stop], errors='coerce')
+            updated = pd.to_datetime(df['timeUpdatedUTC'].iloc[start:stop], errors='coerce')
+            latency = (updated - created).dt.total_seconds().to_numpy()
+            day = days[start:stop]
+            valid = (latency >= 0) & ~np.isnat(day)
+
+            key = pack_keys(day[valid], [codes[name][start:stop][valid] for name in DIMENSIONS] +
+                            [bucket_index(latency[valid])], sizes + [N_BUCKETS])
+            chunk_keys, chunk_counts = np.unique(key, return_counts=True)
+            keys.append(chunk_keys)
+            counts.append(chunk_counts)
+
+        if not sum(len(k) for k in keys):
+            columns = ['day'] + DIMENSIONS + ['bucket', 'count']
+            return cls({name: np.array([], dtype=np.int64) for name in columns}, labels)
+        all_keys, inverse = np.unique(np.concatenate(keys), return_inverse=True)
+        all_counts = np.bincount(inverse, weights=np.concatenate(counts)).astype(np.int64)
+
+        # Decode the keys back into columns (keys are sorted, so the table is sorted by day)
+        table = unpack_keys(all_keys, DIMENSIONS + ['bucket'], sizes + [N_BUCKETS])
+        table['bucket'] = table['bucket'].astype(np.int16)
+        table['count'] = all_counts
+        print(f"Built latency sketches: {len(all_keys)} sketch buckets from {len(df)} rows.")
+        return cls(table, labels)
+
+    def merge(self, start_date=None, end_date=None, by=None, **selected):
+        """
+        Merges the sketches of a filter combination.
+
+        Args:
+            start_date, end_date: Inclusive date range (None for the full range).
+            by (str): Optional dimension to group by; one merged sketch per value.
+            selected: Dimension name -> list of selected values (empty / None for all).
+
+        Returns:
+            np.ndarray: Bucket counts, shape (N_BUCKETS,), or (len(labels[by]), N_BUCKETS) with 'by'.
+        """
+        lo, hi = day_range(self.table['day'], start_date, end_date)
+
+        mask = np.ones(hi - lo, dtype=bool)
+        for name, values in selected.items():
+            if values:
+                wanted = [self.labels[name].index(value) for value in values if value in self.labels[name]]
+                mask &= np.isin(self.table[name][lo:hi], wanted)
+
+        bucket = self.table['bucket'][lo:hi][mask]
+        weights = self.table['count'][lo:hi][mask]
+        if by is None:
+            return np.bincount(bucket, weights=weights, minlength=N_BUCKETS).astype(np.int64)
+        groups = len(self.labels[by])
+        flat = self.table[by][lo:hi][mask] * N_BUCKETS + bucket
+        merged = np.bincount(flat, weights=weights, minlength=groups * N_BUCKETS).astype(np.int64)
+        return merged.reshape(groups, N_BUCKETS)
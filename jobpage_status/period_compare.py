@@ -0,0 +1,162 @@
+# job_portal_dashboard/period_compare.py
+
+"""
+Period-over-period comparison for the summary cards and trend charts.
+
+The selected date range (current period) and its comparison period (the previous period
+of the same length, or the same range one year earlier) are looked up together with
+np.searchsorted on a sorted day index, which is built once per dataset version. Both
+windows are tagged in one frame, so the page filters run once over both periods
+instead of running the whole pipeline twice.
+"""
+
+import hashlib
+
+import numpy as np
+import pandas as pd
+from dash import html, dcc
+
+from Data.dataset_cache import get_derived
+from jobpage_status.timeseries import calendar_day
+
+PERIOD_COL = '_period'
+CURRENT, PREVIOUS = 0, 1
+
+COMPARE_NONE = 'none'
+COMPARE_OPTIONS = [
+    {'label': 'No comparison', 'value': COMPARE_NONE},
+    {'label': 'Previous period', 'value': 'previous'},
+    {'label': 'Same period last year', 'value': 'previous_year'},
+]
+COMPARE_LABELS = {'previous': 'previous period', 'previous_year': 'last year'}
+
+
+def compare_control(prefix):
+    """Comparison-period selector shown in a page's filter row."""
+    return [
+        html.Label("Compare With:", className="control-label"),
+        dcc.Dropdown(id=f'{prefix}-compare-filter', options=COMPARE_OPTIONS, value=COMPARE_NONE, clearable=False),
+    ]
+
+
+def comparison_range(start_date, end_date, mode):
+    """
+    Returns (start, end) of the comparison period as numpy days, or None.
+    'previous' is the same number of days right before start_date;
+    'previous_year' is the same calendar range one year earlier.
+    """
+    if not mode or mode == COMPARE_NONE:
+        return None
+    start, end = pd.Timestamp(start_date).normalize(), pd.Timestamp(end_date).normalize()
+    if mode == 'previous_year':
+        return calendar_day(start - pd.DateOffset(years=1)), calendar_day(end - pd.DateOffset(years=1))
+    length = end - start + pd.Timedelta(days=1)
+    return calendar_day(start - length), calendar_day(start - pd.Timedelta(days=1))
+
+
+def sorted_day_index(dates):
+    """Sorts rows by calendar day once. Returns (sorted day numbers, row order)."""
+    days = pd.to_datetime(pd.Series(dates), errors='coerce').to_numpy().astype('datetime64[D]')
+    order = np.argsort(days, kind='stable')
+    return days[order], order
+
+
+def _window(sorted_days, order, start, end):
+    """Row positions with start <= day <= end (both inclusive), found by binary search."""
+    lo = np.searchsorted(sorted_days, start, side='left')
+    hi = np.searchsorted(sorted_days, end, side='right')
+    return order[lo:hi]
+
+
+def row_fingerprint(values):
+    """
+    Hash of a column's values row by row, in order. Caches built from a frame's rows are keyed
+    by it, so they are only reused for a frame with the same values in the same row order.
+    """
+    row_hashes = pd.util.hash_pandas_object(values, index=False).to_numpy()
+    return hashlib.sha1(row_hashes.tobytes()).hexdigest()
+
+
+def day_index(df, dataset_version=None):
+    """Sorted day index of df (see sorted_day_index()), cached per dataset version and date column."""
+    dates = df['application_date']
+    index = get_derived(dataset_version, ('sorted_day_index', row_fingerprint(dates)),
+                        lambda _: sorted_day_index(dates))
+    if index is None:
+        index = sorted_day_index(dates)
+    return index
+
+
+def window_rows(df, start_date, end_date, dataset_version=None):
+    """Row positions of df with start_date <= day <= end_date, in day order (a slice of the cached index)."""
+    sorted_days, order = day_index(df, dataset_version)
+    return _window(sorted_days, order, calendar_day(start_date), calendar_day(end_date))
+
+
+def period_frame(df, start_date, end_date, mode, dataset_version=None):
+    """
+    Rows of the current period and, if 'mode' is set, of the comparison period, tagged in PERIOD_COL
+    (CURRENT / PREVIOUS). Apply the page's other filters to the result once, then use split_periods().
+    """
+    sorted_days, order = day_index(df, dataset_version)
+
+    rows = [_window(sorted_days, order, calendar_day(start_date), calendar_day(end_date))]
+    tags = [np.full(len(rows[0]), CURRENT, dtype=np.int8)]
+    previous_range = comparison_range(start_date, end_date, mode)
+    if previous_range is not None:
+        rows.append(_window(sorted_days, order, *previous_range))
+        tags.append(np.full(len(rows[1]), PREVIOUS, dtype=np.int8))
+
+    rows, tags = np.concatenate(rows), np.concatenate(tags)
+    # Keep the original row order within the frame
+    keep = np.argsort(rows, kind='stable')
+    frame = df.iloc[rows[keep]].copy()
+    frame[PERIOD_COL] = tags[keep]
+    return frame
+
+
+def has_comparison(mode):
+    return bool(mode) and mode != COMPARE_NONE
+
+
+def split_periods(frame, mode):
+    """Splits a filtered period_frame() into (current, previous); previous is None without a comparison."""
+    is_previous = frame[PERIOD_COL].to_numpy() == PREVIOUS
+    current = frame[~is_previous]
+    previous = frame[is_previous] if has_comparison(mode) else None
+    return current, previous
+
+
+def comparison_name(mode):
+    """Legend name of the comparison-period trace."""
+    return f"Total ({COMPARE_LABELS.get(mode, mode)})"
+
+
+def shift_to_current(dates, start_date, end_date, mode):
+    """Moves comparison-period dates onto the current period, so both can share a time axis."""
+    dates = pd.to_datetime(pd.Series(dates))
+    if mode == 'previous_year':
+        return dates + pd.DateOffset(years=1)
+    previous_start = comparison_range(start_date, end_date, mode)[0]
+    return dates + (pd.Timestamp(start_date).normalize() - pd.Timestamp(previous_start))
+
+
+def delta_text(current, previous, mode):
+    """Card footnote comparing a count with the comparison period, e.g. '▲ 12.5% vs last year (1,234)'."""
+    if previous is None or not has_comparison(mode):
+        return None
+    label = COMPARE_LABELS.get(mode, mode)
+    if previous == 0:
+        return f"no data for {label}" if current == 0 else f"▲ new vs {label} (0)"
+    change = (current - previous) / previous * 100
+    arrow = '▲' if change > 0 else '▼' if change < 0 else '■'
+    return f"{arrow} {abs(change):.1f}% vs {label} ({previous:,})"
+
+
+def delta_points_text(current_percent, previous_percent, mode):
+    """Card footnote for a percentage, as a difference in percentage points."""
+    if previous_percent is None or not has_comparison(mode):
+        return None
+    change = current_percent - previous_percent
+    arrow = '▲' if change > 0 else '▼' if change < 0 else '■'
+    return f"{arrow} {abs(change):.2f} pts vs {COMPARE_LABELS.get(mode, mode)} ({previous_percent:.2f}%)"
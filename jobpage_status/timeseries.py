@@ -0,0 +1,296 @@
+# job_portal_dashboard/timeseries.py
+
+"""
+Calendar-day time series for the daily pages.
+
+Rows are bucketed to real calendar days (not day-of-month, so the 5th of March and the 5th
+of April stay separate) with np.bincount, and days without applications are zero-filled.
+Long ranges are downsampled server-side with Largest-Triangle-Three-Buckets (LTTB) to a
+point budget derived from the browser width, so a multi-year daily view sends a few
+hundred points instead of one per day.
+
+The 7/28-day moving averages are computed in O(n) from cumulative sums over the
+zero-filled series and cached per dataset version and filter combination.
+
+The day-number and key-packing helpers are shared with the sparse per-day count tables of
+dimensions.py and latency_sketch.py, and calendar_day() with period_compare.py.
+"""
+
+import numpy as np
+import pandas as pd
+from dash import dcc
+
+from Data.dataset_cache import get_derived
+from jobpage_status.chart_builder import rolling_line_trace, PERCENT_COLOR, ROLLING_VOLUME_COLOR
+
+# Point budget: roughly one bar every PX_PER_POINT pixels of chart width
+PX_PER_POINT = 3
+DEFAULT_POINT_BUDGET = 400
+MIN_POINT_BUDGET = 100
+MAX_POINT_BUDGET = 1000
+
+MONTH_NAMES = {1: 'January', 2: 'February', 3: 'March', 4: 'April', 5: 'May', 6: 'June',
+               7: 'July', 8: 'August', 9: 'September', 10: 'October', 11: 'November', 12: 'December'}
+
+
+def year_month_options(year_months):
+    """Dropdown options for 'YYYY-MM' values, labelled e.g. 'November 2024'."""
+    options = []
+    for ym in sorted(ym for ym in pd.unique(year_months) if pd.notna(ym)):
+        year, month = str(ym).split('-')[:2]
+        options.append({'label': f"{MONTH_NAMES.get(int(month), month)} {year}", 'value': ym})
+    return options
+
+
+# --- Row Weights ---
+# Frames of the 'summary' source (Data.datasetsql.load_summary_data) hold one row per summary key
+# with its number of applications in WEIGHT_COLUMN; raw frames stand for one application per row.
+WEIGHT_COLUMN = 'applications'
+
+
+def row_weights(df):
+    """Applications each row of df stands for (the summary counts, or None for raw rows)."""
+    return df[WEIGHT_COLUMN].to_numpy() if WEIGHT_COLUMN in df.columns else None
+
+
+def count_rows(df, by=None):
+    """
+    Number of applications in df, or per group of 'by' (like df.groupby(by).size()),
+    summing the summary counts of a 'summary' frame instead of counting its rows.
+    """
+    if WEIGHT_COLUMN not in df.columns:
+        return len(df) if by is None else df.groupby(by).size()
+    if by is None:
+        return int(df[WEIGHT_COLUMN].sum())
+    return df.groupby(by)[WEIGHT_COLUMN].sum()
+
+
+def daily_counts(dates, categories, labels, weights=None):
+    """
+    Counts rows per calendar day and category.
+
+    Args:
+        dates (array-like): Row dates (strings or datetimes).
+        categories (array-like): Row category (e.g. jobpage_status or dtype).
+        labels (list): Categories to count; each becomes a column. Other values are ignored.
+        weights (array-like, optional): Applications per row (see row_weights()); 1 per row if None.
+
+    Returns:
+        pd.DataFrame: 'date' column covering every day from the first to the last row
+                      (gaps zero-filled) plus one integer column per label.
+    """
+    days = pd.to_datetime(pd.Series(dates), errors='coerce').to_numpy().astype('datetime64[D]')
+    valid = ~np.isnat(days)
+    codes = pd.Categorical(np.asarray(categories), categories=labels).codes
+    valid &= codes >= 0
+    if not valid.any():
+        return pd.DataFrame({'date': pd.Series([], dtype='datetime64[ns]'),
+                             **{label: np.array([], dtype=np.int64) for label in labels}})
+
+    first, last = days[valid].min(), days[valid].max()
+    n_days = int((last - first).astype(np.int64)) + 1
+    offsets = (days[valid] - first).astype(np.int64)
+
+    # One bincount over (day, category) pairs, reshaped to a day x category matrix
+    counts = np.bincount(offsets * len(labels) + codes[valid], minlength=n_days * len(labels),
+                         weights=None if weights is None else np.asarray(weights)[valid]).astype(np.int64)
+    counts = counts.reshape(n_days, len(labels))
+
+    result = pd.DataFrame(counts, columns=labels)
+    result.insert(0, 'date', pd.to_datetime(np.arange(first, last + 1)))
+    return result
+
+
+# --- Day Numbers and Sparse Keys ---
+# The pre-aggregated tables (dimensions.py, latency_sketch.py) store one row per day x category codes,
+# sorted by day; a filter picks its day range by binary search on the day numbers.
+
+def calendar_day(value):
+    """Calendar day (numpy datetime64[D]) of a date, string or timestamp."""
+    return np.datetime64(pd.Timestamp(value).normalize().date(), 'D')
+
+
+def day_number(value):
+    """Days since the epoch of a date, as stored in the 'day' column of the sparse tables."""
+    return calendar_day(value).astype(np.int64)
+
+
+def pack_keys(days, codes, sizes):
+    """
+    Packs each row's day and category codes into one int64 key (day first, then the codes in order),
+    so sorting the keys sorts the rows by day. codes[i] must lie in [0, sizes[i]).
+    """
+    key = np.asarray(days).astype(np.int64)
+    for code, size in zip(codes, sizes):
+        key = key * size + code
+    return key
+
+
+def unpack_keys(keys, names, sizes):
+    """Inverse of pack_keys(): {'day': day numbers, name: codes} columns (int32) of the keys."""
+    columns = {}
+    for name, size in reversed(list(zip(names, sizes))):
+        columns[name] = (keys % size).astype(np.int32)
+        keys = keys // size
+    columns['day'] = keys.astype(np.int32)
+    return columns
+
+
+def day_range(days, start_date=None, end_date=None):
+    """(lo, hi) row range of a day-sorted 'day' column with start_date <= day <= end_date (None: open)."""
+    lo = 0 if start_date is None else np.searchsorted(days, day_number(start_date), side='left')
+    hi = len(days) if end_date is None else np.searchsorted(days, day_number(end_date), side='right')
+    return lo, hi
+
+
+def keep_year_months(series, selected_year_months):
+    """Drops zero-filled days that fall outside the selected months (the gap between two picked months)."""
+    if not selected_year_months:
+        return series
+    return series[series['date'].dt.strftime('%Y-%m').isin(selected_year_months)].reset_index(drop=True)
+
+
+def point_budget(viewport_width):
+    """Number of points to send for a chart spanning the given browser width (pixels)."""
+    if not viewport_width:
+        return DEFAULT_POINT_BUDGET
+    return int(np.clip(int(viewport_width) // PX_PER_POINT, MIN_POINT_BUDGET, MAX_POINT_BUDGET))
+
+
+def lttb_indices(y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: indices of 'n_out' points that preserve the visual
+    shape of y (evenly spaced x). The first and last points are always kept.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.arange(n, dtype=float)
+    # Bucket edges for the n_out - 2 middle buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        # Average of the next bucket (or the last point) is the third triangle vertex
+        next_start, next_stop = stop, edges[bucket + 2] if bucket + 2 < len(edges) else n
+        avg_x = x[next_start:next_stop].mean()
+        avg_y = y[next_start:next_stop].mean()
+
+        area = np.abs((x[previous] - avg_x) * (y[start:stop] - y[previous])
+                      - (x[previous] - x[start:stop]) * (avg_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        indices[bucket + 1] = previous
+    return indices
+
+
+def downsample(series, value_col, budget):
+    """
+    Returns (series, downsampled) where 'series' has at most 'budget' rows, picked by LTTB on 'value_col'.
+    All columns are taken from the same rows so stacked/grouped traces stay aligned.
+    """
+    if len(series) <= budget:
+        return series, False
+    return series.iloc[lttb_indices(series[value_col].to_numpy(), budget)].reset_index(drop=True), True
+
+
+def downsample_note(shown, total):
+    """Title suffix shown when a series was downsampled."""
+    return f" ({shown} of {total} days shown)"
+
+
+# --- Rolling Averages ---
+
+ROLLING_WINDOWS = (7, 28)
+ROLLING_OPTIONS = [{'label': ' 7-day average', 'value': 7},
+                   {'label': ' 28-day average', 'value': 28}]
+
+# Scales a per-day average to a per-month rate on the monthly pages
+DAYS_PER_MONTH = 365.25 / 12
+
+
+def rolling_sum(values, window):
+    """
+    Trailing sum over 'window' days in O(n), from one cumulative sum.
+    The first window - 1 days sum over the days available so far.
+    """
+    cumulative = np.concatenate(([0.0], np.cumsum(np.asarray(values, dtype=float))))
+    end = np.arange(1, len(cumulative))
+    start = np.maximum(end - window, 0)
+    return cumulative[end] - cumulative[start]
+
+
+def add_rolling(series, numerator=None, windows=ROLLING_WINDOWS):
+    """
+    Adds moving-average columns to a zero-filled daily series with a 'Total' column:
+    'Total_{w}d' (average rows per day) and, if 'numerator' is given, '{numerator}_Percent_{w}d'
+    (share of the window's rows, i.e. a ratio of sums rather than an average of daily ratios).
+    """
+    days_in_window = np.arange(1, len(series) + 1)
+    for window in windows:
+        total_sum = rolling_sum(series['Total'], window)
+        series[f'Total_{window}d'] = total_sum / np.minimum(days_in_window, window)
+        if numerator:
+            numerator_sum = rolling_sum(series[numerator], window)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                series[f'{numerator}_Percent_{window}d'] = np.where(total_sum > 0,
+                                                                    numerator_sum / total_sum * 100, np.nan)
+    return series
+
+
+def cached_daily_rolling(dataset_version, cache_key, dates, categories, labels, numerator=None, weights=None):
+    """
+    Zero-filled daily series of 'labels' counts with 'Total' and the rolling columns of add_rolling().
+    'weights' are the rows' application counts (see row_weights()).
+
+    The result is cached per dataset version under 'cache_key' (the page and its filter values),
+    so re-rendering the same filters (e.g. toggling an overlay) reuses it. A copy is returned,
+    callers may add columns. Without a known dataset version it is computed uncached.
+    """
+    def build(_df):
+        series = daily_counts(dates, categories, labels, weights)
+        series['Total'] = series[labels].sum(axis=1)
+        return add_rolling(series, numerator)
+
+    cached = get_derived(dataset_version, ('daily_rolling',) + tuple(cache_key), build)
+    return (cached if cached is not None else build(None)).copy()
+
+
+def filter_key(*values):
+    """Hashable cache key from callback filter values (lists become sorted tuples)."""
+    key = []
+    for value in values:
+        if isinstance(value, (list, tuple, set)):
+            key.append(tuple(sorted(map(str, value))))
+        else:
+            key.append(value)
+    return tuple(key)
+
+
+def rolling_overlay_control(prefix):
+    """Checklist that turns the moving-average overlays on a trend page on and off."""
+    return dcc.Checklist(id=f'{prefix}-rolling-overlay', options=ROLLING_OPTIONS, value=[], inline=True,
+                         inputStyle={"marginRight": "5px", "marginLeft": "15px"})
+
+
+def rolling_overlay_traces(series, windows, numerator=None, percent_label='Active %', volume_scale=1.0,
+                           volume_label='Volume'):
+    """
+    Moving-average overlay traces for the selected windows: volume on the count axis (scaled by
+    'volume_scale', e.g. DAYS_PER_MONTH on the monthly pages) and the percentage on the % axis.
+    """
+    traces = []
+    for window in sorted(windows or []):
+        if f'Total_{window}d' not in series.columns:
+            continue
+        traces.append(rolling_line_trace(f'{volume_label} ({window}d avg)', series[f'Total_{window}d'] * volume_scale,
+                                         series['date'], ROLLING_VOLUME_COLOR, window))
+        if numerator:
+            traces.append(rolling_line_trace(f'{percent_label} ({window}d avg)',
+                                             series[f'{numerator}_Percent_{window}d'], series['date'],
+                                             PERCENT_COLOR, window, yaxis='y2'))
+    return traces
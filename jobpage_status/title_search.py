@@ -0,0 +1,151 @@
+# job_portal_dashboard/title_search.py
+
+"""
+Typeahead search over job titles.
+
+The job-title dropdown no longer receives every distinct title as options. It sends what
+the user typed ('search_value') and gets back the top-k matching titles, ranked by how
+many applications they have. The index is built once per dataset version (see
+Data.dataset_cache) and answers each keystroke without scanning the dataset.
+"""
+
+import re
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+ALL_TITLES_OPTION = {'label': 'All Jobs', 'value': 'all'}
+DEFAULT_LIMIT = 20
+MIN_TRIGRAM_QUERY = 3
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_title(title):
+    """Lower-cases a title and collapses whitespace, so 'Data  Analyst ' matches 'data analyst'."""
+    return _WHITESPACE.sub(' ', str(title)).strip().lower()
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TitleIndex:
+    """
+    Prefix + trigram index over the distinct job titles of one dataset.
+
+    - Queries shorter than 3 characters use a sorted array of title words and binary
+      search (np.searchsorted) for titles with a word starting with the query.
+    - Longer queries intersect the trigram posting lists (rarest first) and confirm the
+      candidates with a substring check.
+
+    Matches are ranked: title starts with the query, then a word starts with it, then any
+    other substring match; ties are broken by frequency (most applications first).
+    """
+
+    def __init__(self, titles):
+        counts = pd.Series(titles).dropna().value_counts()
+
+        # One entry per distinct raw title (the value the page filters on), matched on its normalized form.
+        # Title ids follow value_counts() order, so a lower id means a more frequent title.
+        self.titles = counts.index.to_numpy(dtype=object)
+        self.frequency = counts.to_numpy(dtype=np.int64)
+        self.normalized = [normalize_title(t) for t in self.titles]
+
+        # Word-prefix index: all (word, title id, is first word) entries sorted by word
+        words, word_ids, word_first = [], [], []
+        postings = defaultdict(list)
+        for title_id, norm in enumerate(self.normalized):
+            title_words = norm.split(' ')
+            for position, word in enumerate(title_words):
+                if word not in title_words[:position]:
+                    words.append(word)
+                    word_ids.append(title_id)
+                    word_first.append(position == 0)
+            for gram in _trigrams(norm):
+                postings[gram].append(title_id)
+        order = np.argsort(np.array(words, dtype=object), kind='stable')
+        self.words = np.array(words, dtype=object)[order]
+        self.word_ids = np.array(word_ids, dtype=np.int64)[order]
+        self.word_first = np.array(word_first, dtype=bool)[order]
+        self.trigrams = {gram: np.array(ids, dtype=np.int64) for gram, ids in postings.items()}
+
+    @classmethod
+    def from_frame(cls, df, column='job_title'):
+        return cls(df[column].to_numpy() if column in df.columns else [])
+
+    def __len__(self):
+        return len(self.normalized)
+
+    def _word_prefix_matches(self, query):
+        """Titles with a word starting with 'query'; rank 0 if it is the first word, else 1."""
+        start = np.searchsorted(self.words, query, side='left')
+        # Every word with this prefix sorts before query + the highest code point
+        stop = np.searchsorted(self.words, query + '\U0010ffff', side='left')
+        ids, inverse = np.unique(self.word_ids[start:stop], return_inverse=True)
+        title_starts = np.zeros(len(ids), dtype=bool)
+        title_starts[inverse[self.word_first[start:stop]]] = True
+        return ids, np.where(title_starts, 0, 1)
+
+    def _trigram_matches(self, query):
+        """Titles containing 'query'; rank 0 at the start, 1 at a word start, 2 elsewhere."""
+        postings = [self.trigrams.get(gram) for gram in _trigrams(query)]
+        if any(p is None for p in postings):
+            return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+        postings.sort(key=len)
+        candidates = postings[0]
+        for posting in postings[1:]:
+            candidates = np.intersect1d(candidates, posting, assume_unique=True)
+            if not len(candidates):
+                break
+
+        ids, rank = [], []
+        for title_id in candidates:
+            norm = self.normalized[title_id]
+            position = norm.find(query)
+            if position < 0:
+                continue
+            ids.append(title_id)
+            rank.append(0 if position == 0 else 1 if f' {query}' in norm else 2)
+        return np.array(ids, dtype=np.int64), np.array(rank, dtype=np.int64)
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        """
+        Returns up to 'limit' raw titles matching 'query', best first.
+        An empty query returns the most frequent titles.
+        """
+        query = normalize_title(query or '')
+        if not query:
+            ids = np.arange(len(self))
+            rank = np.zeros(len(ids), dtype=np.int64)
+        elif len(query) < MIN_TRIGRAM_QUERY:
+            ids, rank = self._word_prefix_matches(query)
+        else:
+            ids, rank = self._trigram_matches(query)
+
+        if not len(ids):
+            return []
+
+        # Rank class first, then frequency (ids are already in descending frequency order)
+        order = np.lexsort((ids, rank))[:limit]
+        return list(self.titles[ids[order]])
+
+
+def title_options(index, search_value, selected=None, limit=DEFAULT_LIMIT):
+    """
+    Dropdown options for a search: 'All Jobs', the currently selected title (so the
+    dropdown keeps showing it) and the top matches.
+    """
+    options = [ALL_TITLES_OPTION]
+    seen = {ALL_TITLES_OPTION['value']}
+    if selected and selected not in seen:
+        options.append({'label': str(selected), 'value': selected})
+        seen.add(selected)
+    if index is None:
+        return options
+    for title in index.search(search_value, limit):
+        if title not in seen:
+            options.append({'label': str(title), 'value': title})
+            seen.add(title)
+    return options
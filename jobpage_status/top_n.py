@@ -0,0 +1,156 @@
+# job_portal_dashboard/top_n.py
+
+"""
+Top-N selection with an "Other" bucket for high-cardinality categories
+(countries, registration sources, ...).
+
+Pages show the N leading categories and fold the tail into a single "Other (N more)" bar or
+sector; the count keeps it apart from a real category named "Other". Clicking it drills down
+one level: the next N categories are shown, with a new "Other" for whatever is still left.
+The drill-down depth lives in a per-page dcc.Store.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+from dash import html, dcc, ctx, Input, Output, State, no_update
+
+OTHER_LABEL = 'Other ({count:,} more)'
+OTHER_PATTERN = re.compile(r'Other \([\d,]+ more\)')
+DEFAULT_TOP_N = 20
+
+TOP_N_OPTIONS = [
+    {'label': 'Top 10', 'value': 10},
+    {'label': 'Top 20', 'value': 20},
+    {'label': 'Top 30', 'value': 30},
+    {'label': 'Top 50', 'value': 50},
+    {'label': 'All', 'value': 0},
+]
+
+
+def select_top_n(labels, totals, n, depth=0):
+    """
+    Ranks categories by total and picks the slice shown at the given drill-down depth.
+
+    Args:
+        labels (array-like): Category labels.
+        totals (array-like): Total count per label.
+        n (int): Categories per level. 0 or None shows everything.
+        depth (int): Drill-down level; level d shows ranks [d*n, (d+1)*n).
+
+    Returns:
+        tuple: (shown, tail) label arrays. 'shown' is in descending order of total;
+               'tail' holds the labels ranked below 'shown' (the "Other" bucket).
+    """
+    labels = np.asarray(labels)
+    totals = np.asarray(totals)
+    if not n or len(labels) <= n:
+        order = np.lexsort((labels, -totals))
+        return labels[order], labels[:0]
+
+    # Clamp the depth so a shrinking dataset never drills past the last level
+    depth = min(int(depth or 0), (len(labels) - 1) // n)
+    k = min((depth + 1) * n, len(labels))
+
+    # argpartition finds the k leading categories in O(len); only those k are sorted
+    if k < len(labels):
+        leading = np.argpartition(-totals, k - 1)[:k]
+    else:
+        leading = np.arange(len(labels))
+    leading = leading[np.lexsort((labels[leading], -totals[leading]))]
+
+    in_leading = np.zeros(len(labels), dtype=bool)
+    in_leading[leading] = True
+    tail = labels[~in_leading]
+    return labels[leading[depth * n:]], tail
+
+
+def other_label(count):
+    """Label of the "Other" bucket holding 'count' categories."""
+    return OTHER_LABEL.format(count=count)
+
+
+def is_other(label):
+    """True if a clicked label is an "Other" bucket (see other_label())."""
+    return isinstance(label, str) and OTHER_PATTERN.fullmatch(label) is not None
+
+
+def fold_other(pivot, label_col, value_cols, n, depth=0, rank_col='Total'):
+    """
+    Applies select_top_n() to an aggregated pivot: keeps the shown rows in rank order and
+    appends one "Other" row holding the summed value columns of the tail.
+    Ratio columns (percentages) must be recomputed by the caller afterwards.
+    """
+    shown, tail = select_top_n(pivot[label_col].to_numpy(), pivot[rank_col].to_numpy(), n, depth)
+    indexed = pivot.set_index(label_col)
+    result = indexed.loc[shown, value_cols]
+    if len(tail):
+        result.loc[other_label(len(tail))] = indexed.loc[tail, value_cols].sum()
+    result.index.name = label_col
+    return result.reset_index()
+
+
+def label_top_n(labels, totals, n, depth=0):
+    """
+    Returns a function mapping raw labels to display labels: shown labels map to themselves,
+    tail labels to "Other", and labels ranked above the current drill-down level to NaN
+    (so groupby drops them).
+    """
+    shown, tail = select_top_n(labels, totals, n, depth)
+    mapping = dict.fromkeys(tail, other_label(len(tail)))
+    mapping.update(zip(shown, shown))
+    return lambda series: pd.Series(series).map(mapping)
+
+
+def next_depth(click_data, current_depth, label_key='x', level=None):
+    """
+    Drill one level deeper when the clicked point is the "Other" bucket. With 'level', only a
+    point whose customdata is that level counts (a sunburst has "Other"-labelled sectors deeper down).
+    """
+    if not click_data or not click_data.get('points'):
+        return None
+    point = click_data['points'][0]
+    if level is not None and point.get('customdata') != level:
+        return None
+    if is_other(point.get(label_key)):
+        return (current_depth or 0) + 1
+    return None
+
+
+def depth_title(title, n, depth):
+    """Appends the rank range to a chart title when drilled into "Other"."""
+    if not depth or not n:
+        return title
+    return f"{title} (ranks {depth * n + 1}-{(depth + 1) * n})"
+
+
+def top_n_controls(prefix):
+    """Top-N selector, drill-down reset button and depth store used by the location/source pages."""
+    return [
+        html.Label("Show:", className="control-label"),
+        dcc.Dropdown(id=f'{prefix}-top-n-filter', options=TOP_N_OPTIONS, value=DEFAULT_TOP_N, clearable=False),
+        html.Button("Back to top categories", id=f'{prefix}-top-n-reset', n_clicks=0,
+                    className="btn btn-sm btn-outline-secondary mt-2"),
+        dcc.Store(id=f'{prefix}-top-n-depth', data=0),
+    ]
+
+
+def register_drilldown(app, prefix, graph_id, label_key='x', level=None):
+    """
+    Registers the drill-down callback for a page using top_n_controls(prefix).
+    Clicking "Other" goes one level deeper; changing N or pressing the reset button goes back to the top.
+    'level' restricts the drill-down to points of that level (see next_depth()).
+    """
+    @app.callback(
+        Output(f'{prefix}-top-n-depth', 'data'),
+        [Input(graph_id, 'clickData'),
+         Input(f'{prefix}-top-n-filter', 'value'),
+         Input(f'{prefix}-top-n-reset', 'n_clicks')],
+        [State(f'{prefix}-top-n-depth', 'data')]
+    )
+    def update_drilldown_depth(click_data, top_n, reset_clicks, depth):
+        if ctx.triggered_id == graph_id:
+            new_depth = next_depth(click_data, depth, label_key, level)
+            return no_update if new_depth is None else new_depth
+        return 0
@@ -1,12 +1,14 @@
 # job_portal_dashboard/app.py
 
-import pandas as pd
 import dash
-from dash import html, dcc, callback, Input, Output
+from dash import html, dcc, callback, ctx, Input, Output, State
 import dash_bootstrap_components as dbc
 
 # Import data loading
-from Data.datasetsql import load_data, load_unique_most_recent_data
+from Data.datasetsql import load_data, load_unique_most_recent_data, load_summary_data
+from Data.dataset_cache import register_dataset, register_partitions, all_sites_version, get_dataset, ALL_SITES, \
+    MISSING_SITE
+from jobpage_status.anomalies import start_anomaly_detection
 
 # Import pages
 from jobpage_status.Daily_Overview import layout as page1_layout, register_callbacks as register_page1_callbacks
@@ -19,11 +21,18 @@ from jobpage_status.Monthly_Trend_Device import layout as page7_layout, register
 from jobpage_status.Device_Location import layout as page8_layout, register_callbacks as register_page8_callbacks
 from jobpage_status.Registrysource_bargraph import layout as page9_layout, \
     register_callbacks as register_page9_callbacks
+from jobpage_status.Activity_Heatmap import layout as page10_layout, register_callbacks as register_page10_callbacks
+from jobpage_status.Latency_Distribution import layout as page11_layout, \
+    register_callbacks as register_page11_callbacks
+from jobpage_status.Top_Jobs import layout as page12_layout, register_callbacks as register_page12_callbacks
+from jobpage_status.Dimension_Breakdown import layout as page13_layout, \
+    register_callbacks as register_page13_callbacks
 
 # --- Data Source Selection Options ---
 DATA_SOURCE_OPTIONS = [
     {'label': 'Active vs Inactive Based on CV', 'value': 'full'},
-    {'label': 'Active vs Inactive Based on Users', 'value': 'latest_unique'}
+    {'label': 'Active vs Inactive Based on Users', 'value': 'latest_unique'},
+    {'label': 'Daily Summary (all CVs)', 'value': 'summary'}
 ]
 
 # Initialize App with Bootstrap and FontAwesome (for the icon)
@@ -74,6 +83,10 @@ def create_navbar():
                     ),
 
                     dbc.NavItem(dbc.NavLink("Registry Source", href="/page-9")),
+                    dbc.NavItem(dbc.NavLink("Activity Heatmap", href="/page-10")),
+                    dbc.NavItem(dbc.NavLink("Time to Update", href="/page-11")),
+                    dbc.NavItem(dbc.NavLink("Top Jobs", href="/page-12")),
+                    dbc.NavItem(dbc.NavLink("Dimensions", href="/page-13")),
 
                 ], className="ms-auto", navbar=True),
                 id="navbar-collapse",
@@ -91,7 +104,10 @@ def create_navbar():
 app.layout = html.Div([
     dcc.Location(id='url', refresh=False),
     dcc.Store(id='global-data-store', data=None),
+    dcc.Store(id='dataset-version', data=None),  # Key of the loaded DataFrame in Data.dataset_cache
+    dcc.Store(id='viewport-width', data=None),  # Browser width in pixels, sets the daily charts' point budget
     dcc.Store(id='trigger-initial-load', data='full'),
+    dcc.Store(id='site-versions', data=None),  # Source, id window, site -> partition version, all-sites version
 
     # Navbar
     create_navbar(),
@@ -110,7 +126,20 @@ app.layout = html.Div([
                         inputStyle={"marginRight": "5px"}
                     )
                 ], className="glass-container")  # Applies glass effect
-            ], width=12)
+            ], width=12, md=8),
+            dbc.Col([
+                html.Div([
+                    html.Label("Select Site:", style={'fontWeight': 'bold', 'marginBottom': '5px'}),
+                    dbc.Row([
+                        dbc.Col(dcc.Dropdown(id='site-selector',
+                                             options=[{'label': 'All Sites', 'value': ALL_SITES}],
+                                             value=ALL_SITES,
+                                             clearable=False)),
+                        dbc.Col(html.Button("Refresh", id='site-refresh-button', n_clicks=0,
+                                            className="btn btn-sm btn-outline-secondary"), width="auto"),
+                    ], className="g-2 align-items-center")
+                ], className="glass-container")
+            ], width=12, md=4)
         ], className="mb-3"),
 
         # Page Content
@@ -128,6 +157,10 @@ register_page6_callbacks(app)
 register_page7_callbacks(app)
 register_page8_callbacks(app)
 register_page9_callbacks(app)
+register_page10_callbacks(app)
+register_page11_callbacks(app)
+register_page12_callbacks(app)
+register_page13_callbacks(app)
 
 
 # --- 2. DATA LOADING CALLBACKS ---
@@ -140,23 +173,85 @@ def set_load_trigger(selected_source):
 
 
 @callback(
-    Output('global-data-store', 'data'),
-    Input('trigger-initial-load', 'data')
+    [Output('site-versions', 'data'),
+     Output('site-selector', 'options')],
+    [Input('trigger-initial-load', 'data'),
+     Input('site-refresh-button', 'n_clicks')],
+    [State('site-selector', 'value'),
+     State('site-versions', 'data')]
 )
-def load_global_data(data_source_type):
-    print(f"Initial Data Load Triggered. Source: {data_source_type}")
-    if data_source_type == 'latest_unique':
-        try:
-            df_result = load_unique_most_recent_data()
-        except Exception:
-            return pd.DataFrame().to_dict('records')
+def load_global_data(data_source_type, refresh_clicks, selected_site, site_versions):
+    # The refresh button reloads only the selected site; the other sites keep their partitions and caches
+    refresh_site = ctx.triggered_id == 'site-refresh-button' and selected_site not in (None, ALL_SITES) \
+        and bool(site_versions) and site_versions.get('source') == data_source_type
+    site_ids = [None if selected_site == MISSING_SITE else selected_site] if refresh_site else None
+
+    print(f"Initial Data Load Triggered. Source: {data_source_type}" +
+          (f", site: {selected_site}" if refresh_site else ""))
+    all_sites_option = [{'label': 'All Sites', 'value': ALL_SITES}]
+    # 'latest_unique' keeps each user's newest row: per site in the site partitions, and again over
+    # the concatenated partitions for all sites (so a user seen on several sites is counted once)
+    dedup = load_unique_most_recent_data if data_source_type == 'latest_unique' else None
+    # A refreshed site is re-read over the id window of the full load, so all sites keep covering
+    # the same rows (the summary's window is the same for all sites already)
+    since_id = site_versions.get('since_id') if refresh_site else None
+    df_result = load_summary_data(site_ids) if data_source_type == 'summary' else load_data(site_ids, since_id)
+    if df_result is None:
+        return None, all_sites_option
+    if not refresh_site:
+        since_id = int(df_result['id'].min()) if 'id' in df_result.columns and not df_result.empty else None
+
+    # Only the site partitions are kept server-side; the all-sites view is built from them when selected
+    sites = register_partitions(df_result, data_source_type, site_versions['sites'] if refresh_site else None,
+                                prepare=dedup)
+    if sites:
+        all_version = all_sites_version(sites, data_source_type, combine=dedup)
     else:
-        df_result = load_data()
+        all_version = register_dataset(dedup(df_result) if dedup else df_result, data_source_type)
 
-    if df_result is not None and 'application_date' in df_result.columns:
-        df_result['application_date'] = df_result['application_date'].astype(str)
+    site_options = all_sites_option + [{'label': f"Site {site}" if site != MISSING_SITE else "No Site",
+                                        'value': site}
+                                       for site in sorted(sites, key=lambda site: (len(site), site))]
+    return {'source': data_source_type, 'since_id': since_id, 'sites': sites, ALL_SITES: all_version}, \
+        site_options
+
+
+@callback(
+    [Output('global-data-store', 'data'),
+     Output('dataset-version', 'data')],
+    [Input('site-selector', 'value'),
+     Input('site-versions', 'data')]
+)
+def select_site(selected_site, site_versions):
+    if not site_versions:
+        return [], None
 
-    return df_result.to_dict('records') if df_result is not None else []
+    # Pages only see the selected site's rows and version, so their caches are scoped to that partition
+    version = site_versions['sites'].get(selected_site, site_versions[ALL_SITES])
+    df_result = get_dataset(version)
+    if df_result is None:
+        return [], None
+
+    # Daily-volume anomaly flags are computed in the background; the trend pages show them once ready
+    start_anomaly_detection(version)
+
+    records = df_result.copy()
+    if 'application_date' in records.columns:
+        records['application_date'] = records['application_date'].astype(str)
+
+    return records.to_dict('records'), version
+
+
+# Browser width, read client-side whenever the page changes
+app.clientside_callback(
+    """
+    function(pathname) {
+        return window.innerWidth;
+    }
+    """,
+    Output('viewport-width', 'data'),
+    Input('url', 'pathname')
+)
 
 
 # --- 3. ROUTING CALLBACK ---
@@ -183,6 +278,14 @@ def display_page(pathname):
         return page8_layout
     elif pathname == '/page-9':
         return page9_layout
+    elif pathname == '/page-10':
+        return page10_layout
+    elif pathname == '/page-11':
+        return page11_layout
+    elif pathname == '/page-12':
+        return page12_layout
+    elif pathname == '/page-13':
+        return page13_layout
     else:
         return page1_layout
 
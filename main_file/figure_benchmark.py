@@ -0,0 +1,77 @@
+#benchmarking the figure builders
+#Compares the old plotly.graph_objects path (go.Figure + add_trace + update_layout,
+#per-point label strings) with the dict builders in jobpage_status/chart_builder.py.
+#Both paths are timed up to the JSON that Dash sends to the browser.
+#Run from the repository root: python -m main_file.figure_benchmark
+
+import timeit
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.io.json import to_json_plotly
+
+from jobpage_status.chart_builder import status_bar_line_figure
+
+REPEATS = 20
+
+
+def make_pivot(n_points):
+    """Synthetic Active/Inactive pivot shaped like the page aggregations."""
+    rng = np.random.default_rng(0)
+    pivot = pd.DataFrame({
+        'x': np.arange(1, n_points + 1),
+        'Active': rng.integers(0, 500, n_points).astype(float),
+        'Inactive': rng.integers(0, 500, n_points).astype(float),
+    })
+    pivot['Total'] = pivot['Active'] + pivot['Inactive']
+    pivot['Active_Percent'] = pivot['Active'] / pivot['Total'] * 100
+    return pivot
+
+
+def go_figure(df_pivot):
+    """The figure code as it was written in the pages before chart_builder."""
+    fig = go.Figure()
+    fig.add_trace(
+        go.Bar(x=df_pivot['x'], y=df_pivot['Inactive'], name='Inactive', marker_color='#8B4513', opacity=0.9))
+    fig.add_trace(
+        go.Bar(x=df_pivot['x'], y=df_pivot['Active'], name='Active', marker_color='#191970', opacity=0.9))
+    fig.add_trace(go.Scatter(
+        x=df_pivot['x'], y=df_pivot['Active_Percent'], name='Active%', mode='lines+markers+text',
+        yaxis='y2',
+        line=dict(color='#3CB371', width=3), marker=dict(size=8),
+        text=[f"{p:.0f}%" for p in df_pivot['Active_Percent']], textposition="top center",
+        textfont=dict(color='#3CB371')
+    ))
+    fig.update_layout(
+        title='Benchmark', barmode='group', xaxis=dict(title='X'),
+        yaxis=dict(title='Count', title_font=dict(color='#191970'), tickformat='.0f', side='left',
+                   showgrid=True, gridcolor='#e0e0e0'),
+        yaxis2=dict(title='Active %', title_font=dict(color='#3CB371'), overlaying='y', side='right',
+                    range=[0, 100], tickformat='.0f', showgrid=False),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        plot_bgcolor='white', paper_bgcolor='white', margin=dict(t=50, b=50, l=50, r=50)
+    )
+    return fig
+
+
+def dict_figure(df_pivot):
+    return status_bar_line_figure(df_pivot['x'], df_pivot['Inactive'], df_pivot['Active'],
+                                  df_pivot['Active_Percent'], 'Benchmark', 'X', 'Count')
+
+
+def time_ms(func):
+    return min(timeit.repeat(func, number=REPEATS, repeat=3)) / REPEATS * 1000
+
+
+if __name__ == '__main__':
+    print(f"{'points':>8} | {'go build':>9} | {'go +json':>9} | {'dict build':>10} | {'dict +json':>10} | speedup")
+    print("=" * 72)
+    for n_points in (31, 75, 365, 1000):
+        pivot = make_pivot(n_points)
+        go_build = time_ms(lambda: go_figure(pivot))
+        go_total = time_ms(lambda: to_json_plotly(go_figure(pivot)))
+        dict_build = time_ms(lambda: dict_figure(pivot))
+        dict_total = time_ms(lambda: to_json_plotly(dict_figure(pivot)))
+        print(f"{n_points:>8} | {go_build:>7.2f}ms | {go_total:>7.2f}ms | {dict_build:>8.3f}ms | "
+              f"{dict_total:>8.2f}ms | {go_total / dict_total:>5.1f}x")
@@ -0,0 +1,307 @@
+"""
+Ingestion plumbing shared by sql_connector.py and mongoconnector.py.
+
+- TYPE_MAP and the batch validator: a chunk of CSV rows is cast column by column, with integer
+  and date columns parsed as numpy arrays (fast_ints / fast_dates). Each connector supplies its
+  own cast_column(), which sends the values the fast path does not accept through its safe_cast,
+  so every accept/reject decision and error message is the same as casting cell by cell.
+- FailureLog: rejected rows, written as they are found.
+- Checkpoint / ChunkTracker: per-file progress of a load, so a rerun resumes after the leading
+  chunks that are written.
+"""
+
+import csv
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from itertools import islice
+
+import numpy as np
+
+# --- Type Map Definition ---
+# THIS IS CRITICAL: Define the expected Python type for each column header
+# that exists in your database schema.
+TYPE_MAP = {
+    'id': int, 'dateUTC': 'date', 'siteInstanceID': int, 'countryCode': str,
+    'status': str, 'dataSource': str, 'targetRefID': str, 'title': str,
+    'userID': int, 'userEmail': str, 'trafficSource': str, 'registerSource': str,
+    'isSearchable': int, 'hasJbeAlert': int, 'isDataFromCV': int, 'deviceType': str,
+    'timeCreatedUTC': 'datetime', 'timeUpdatedUTC': 'datetime', 'timeModifiedDB': 'datetime',
+    'row_num': int
+}
+
+# Batch validator fast path: longer integers fall back to safe_cast
+MAX_INT_DIGITS = 18
+DAYS_IN_MONTH = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+
+# --- Batch Validator ---
+
+def _char_codes(texts):
+    """Code points of a list of strings as an (n, width) uint32 matrix, zero-padded on the right."""
+    array = np.array(texts, dtype=str)
+    width = array.dtype.itemsize // 4
+    return array.view(np.uint32).reshape(len(texts), width)
+
+
+def _digits(codes, positions):
+    """Number formed by the digit characters at 'positions' of each row (-1 if any is not a digit)."""
+    value = np.zeros(len(codes), dtype=np.int64)
+    valid = np.ones(len(codes), dtype=bool)
+    for position in positions:
+        digit = codes[:, position].astype(np.int64) - ord('0')
+        valid &= (digit >= 0) & (digit <= 9)
+        value = value * 10 + digit
+    return np.where(valid, value, -1)
+
+
+def fast_ints(texts, lengths):
+    """
+    Vectorized int(): (accepted mask, values) for plain decimal integers, i.e. an optional sign and
+    1 to MAX_INT_DIGITS ASCII digits. Everything else is left to safe_cast.
+    """
+    codes = _char_codes(texts)
+    width = codes.shape[1]
+    if not width:
+        return np.zeros(len(texts), dtype=bool), np.zeros(len(texts), dtype=np.int64)
+    signed = (codes[:, 0] == ord('-')) | (codes[:, 0] == ord('+'))
+    start = signed.astype(np.int64)
+    columns = np.arange(width)
+    in_number = (columns >= start[:, None]) & (columns < lengths[:, None])
+    is_digit = (codes >= ord('0')) & (codes <= ord('9'))
+    accepted = (lengths - start >= 1) & (lengths - start <= MAX_INT_DIGITS) & np.all(is_digit | ~in_number, axis=1)
+
+    value = np.zeros(len(texts), dtype=np.int64)
+    for column in range(min(width, MAX_INT_DIGITS + 1)):
+        digit = codes[:, column].astype(np.int64) - ord('0')
+        value = np.where(in_number[:, column] & accepted, value * 10 + digit, value)
+    return accepted, np.where(codes[:, 0] == ord('-'), -value, value)
+
+
+def fast_dates(texts, lengths, with_time):
+    """
+    Vectorized strptime() check of 'YYYY-MM-DD' (and ' HH:MM:SS' with 'with_time'): every field is
+    read from the character matrix and range-checked, including the days of each month.
+    Returns (accepted mask, year, month, day, hour, minute, second).
+    """
+    expected = 19 if with_time else 10
+    codes = _char_codes(texts)
+    if codes.shape[1] < expected:
+        codes = np.pad(codes, ((0, 0), (0, expected - codes.shape[1])))
+    year, month, day = _digits(codes, [0, 1, 2, 3]), _digits(codes, [5, 6]), _digits(codes, [8, 9])
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    month_days = DAYS_IN_MONTH[np.clip(month, 0, 12)] + (leap & (month == 2))
+    accepted = ((lengths == expected) & (codes[:, 4] == ord('-')) & (codes[:, 7] == ord('-'))
+                & (year >= 1) & (month >= 1) & (month <= 12) & (day >= 1) & (day <= month_days))
+
+    hour = minute = second = np.zeros(len(texts), dtype=np.int64)
+    if with_time:
+        hour, minute, second = _digits(codes, [11, 12]), _digits(codes, [14, 15]), _digits(codes, [17, 18])
+        accepted &= ((codes[:, 10] == ord(' ')) & (codes[:, 13] == ord(':')) & (codes[:, 16] == ord(':'))
+                     & (hour >= 0) & (hour <= 23) & (minute >= 0) & (minute <= 59)
+                     & (second >= 0) & (second <= 59))
+    return accepted, year, month, day, hour, minute, second
+
+
+def validate_chunk(row_dicts, valid_columns, first_row, cast_column):
+    """
+    Validates a chunk of CSV rows column by column with the connector's
+    cast_column(values, target_type, column_name, first_row).
+
+    Returns:
+        tuple: (list of value tuples of the valid rows, list of (row index, row dict, column, message)
+               for the rejected rows; a row is reported for its first failing column, in column order)
+    """
+    columns = []
+    rejected = {}
+    for col_name in valid_columns:
+        cast, errors = cast_column([row.get(col_name, '') for row in row_dicts], TYPE_MAP[col_name], col_name,
+                                   first_row)
+        columns.append(cast)
+        for position, message in errors.items():
+            rejected.setdefault(position, (col_name, message))
+
+    valid = [values for position, values in enumerate(zip(*columns)) if position not in rejected]
+    failures = [(first_row + position + 1, row_dicts[position], col_name, message)
+                for position, (col_name, message) in sorted(rejected.items())]
+    return valid, failures
+
+
+def read_valid_chunks(csv_reader, valid_columns, failure_log, cast_column, chunk_size, first_row=0,
+                      batch_sizer=None):
+    """
+    Generator over (index of the chunk's first CSV row, number of CSV rows, valid value tuples).
+    Each chunk has 'chunk_size' CSV rows, or the batch sizer's current size if one is given. Rows
+    failing validation are written to the failure log and skipped. 'first_row' is the index of the
+    reader's next row (rows already skipped on a resumed run).
+    """
+    while True:
+        row_dicts = list(islice(csv_reader, batch_sizer.size if batch_sizer else chunk_size))
+        if not row_dicts:
+            break
+        valid, failures = validate_chunk(row_dicts, valid_columns, first_row, cast_column)
+        for row_index, row_dict, col_name, message in failures:
+            print(f"Data Validation Error in Row {row_index} (Column '{col_name}'): {message}")
+            failure_log.add(row_dict)
+        yield first_row, len(row_dicts), valid
+        first_row += len(row_dicts)
+
+
+def skip_rows(csv_reader, rows, valid_columns, failure_log, cast_column, chunk_size):
+    """
+    Skips the first 'rows' CSV rows, already written by an interrupted run. The failure log is
+    rewritten on every run, so the skipped rows are validated again (not written) to log their
+    rejects once more; they have no write failures, since a chunk with failures is never skipped.
+    Returns the number of rows skipped.
+    """
+    skipped = 0
+    for _, csv_rows, _ in read_valid_chunks(islice(csv_reader, rows), valid_columns, failure_log, cast_column,
+                                            chunk_size):
+        skipped += csv_rows
+    return skipped
+
+
+# --- Failure Log ---
+
+def _log_value(value, target_type):
+    """Formats a cast value back to its CSV text for the failure log."""
+    if value is None:
+        return ''
+    if target_type == 'date' and isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d')
+    if target_type == 'datetime' and isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return value
+
+
+class FailureLog:
+    """
+    Writes rejected rows to the failure log as soon as they are found, so failures are not
+    kept in memory. The file is only created once the first row is rejected.
+    """
+
+    def __init__(self, path, fieldnames):
+        self.path = path
+        self.fieldnames = fieldnames
+        self.count = 0
+        self._file = None
+        self._writer = None
+        self._lock = threading.Lock()  # Validation and the writer threads all log failures
+
+    def add(self, row_dict):
+        with self._lock:
+            if self._writer is None:
+                self._file = open(self.path, mode='w', newline='', encoding='utf-8')
+                self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames, extrasaction='ignore')
+                self._writer.writeheader()
+            self._writer.writerow(row_dict)
+            self.count += 1
+
+    def add_document(self, document):
+        """Logs a row of cast values (e.g. a document the database rejected) as CSV text."""
+        self.add({col: _log_value(value, TYPE_MAP.get(col)) for col, value in document.items()})
+
+    def close(self):
+        if self._file:
+            self._file.close()
+
+
+# --- Checkpoints ---
+
+def file_hash(path, block_size=1 << 20):
+    """SHA-256 of a file's content, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, mode='rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Checkpoint:
+    """
+    Progress of a load, kept in a small JSON file per input file and target: the CSV's content
+    hash, 'chunks_done', the number of leading chunks that are written, and 'rows_done', the CSV
+    rows they cover (chunk sizes may vary). A rerun on the same content resumes after those rows;
+    a changed file starts from row 0.
+    """
+
+    def __init__(self, path, csv_path, csv_hash, chunks_done=0, rows_done=0, complete=False):
+        self.path = path
+        self.csv_path = csv_path
+        self.csv_hash = csv_hash
+        self.chunks_done = chunks_done
+        self.rows_done = rows_done
+        self.complete = complete
+
+    @classmethod
+    def load(cls, path, csv_path):
+        csv_hash = file_hash(csv_path)
+        try:
+            with open(path, mode='r', encoding='utf-8') as file:
+                saved = json.load(file)
+        except (OSError, ValueError):
+            return cls(path, csv_path, csv_hash)
+        if saved.get('csv_hash') != csv_hash:
+            print(f"Checkpoint '{path}' belongs to another version of the file; starting from the beginning.")
+            return cls(path, csv_path, csv_hash)
+        return cls(path, csv_path, csv_hash, saved.get('chunks_done', 0), saved.get('rows_done', 0),
+                   saved.get('complete', False))
+
+    def save(self, chunks_done, rows_done, complete=False):
+        """Records the progress (written to a temp file first, so a crash never leaves half a checkpoint)."""
+        self.chunks_done = chunks_done
+        self.rows_done = rows_done
+        self.complete = complete
+        state = {'csv_file': self.csv_path, 'csv_hash': self.csv_hash, 'chunks_done': chunks_done,
+                 'rows_done': rows_done, 'complete': complete,
+                 'updated': datetime.now().isoformat(timespec='seconds')}
+        with open(f"{self.path}.tmp", mode='w', encoding='utf-8') as file:
+            json.dump(state, file)
+        os.replace(f"{self.path}.tmp", self.path)
+
+
+class ChunkTracker:
+    """
+    Per-chunk write accounting shared by the writer threads.
+
+    Chunks finish out of order when several workers write at once; 'committed_through' is the
+    number of leading chunks that are all fully written (committed), i.e. the point a rerun can
+    safely start from, and 'rows_through' the CSV rows they cover. Both are saved to the
+    checkpoint whenever they advance. A chunk with failed rows (a DB error or a lost connection)
+    stops them, so a rerun retries from the first such chunk; the chunks written after it are
+    written again, which is safe because resumed runs upsert. 'batches' keeps one entry per
+    timed chunk for the run summary.
+    """
+
+    def __init__(self, first_chunk=0, first_row=0, checkpoint=None):
+        self.inserted = 0
+        self.committed = 0
+        self.failed = 0
+        self.failed_documents = 0
+        self.committed_through = first_chunk
+        self.rows_through = first_row
+        self.checkpoint = checkpoint
+        self.batches = []
+        self._finished = {}  # Finished chunk number -> CSV rows, until the leading chunks catch up
+        self._lock = threading.Lock()
+
+    def finish(self, chunk_no, csv_rows, inserted, failed=0, seconds=None, first_row=None):
+        with self._lock:
+            self.inserted += inserted
+            self.failed_documents += failed
+            if seconds is not None:
+                self.batches.append({'chunk': chunk_no, 'first_row': first_row, 'documents': inserted + failed,
+                                     'written': inserted, 'failed': failed, 'seconds': round(seconds, 4)})
+            if failed:
+                self.failed += 1
+                return
+            self.committed += 1
+            self._finished[chunk_no] = csv_rows
+            advanced = self.committed_through in self._finished
+            while self.committed_through in self._finished:
+                self.rows_through += self._finished.pop(self.committed_through)
+                self.committed_through += 1
+            if advanced and self.checkpoint:
+                self.checkpoint.save(self.committed_through, self.rows_through)
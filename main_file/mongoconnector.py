@@ -1,25 +1,60 @@
-import pymongo
-from pymongo import MongoClient, errors
+from pymongo import MongoClient, UpdateOne, ASCENDING, DESCENDING, errors
+import bson
 import csv
+import os
+import queue
+import threading
+import time
+from collections import Counter
 from datetime import datetime
 import sys
 
+import numpy as np
+
+from main_file.ingest_common import (TYPE_MAP, Checkpoint, ChunkTracker, FailureLog, fast_dates, fast_ints,
+                                     read_valid_chunks, skip_rows)
+
 # --- Configuration ---
 # MongoDB Connection String (Standard local URI)
 MONGO_URI = "mongodb://localhost:27017/"
 DB_NAME = "job_database"
 COLLECTION_NAME = "job_data"
 CSV_FILE_PATH = 'jobseeker_dashboard_updated2.csv'
-
-# --- Type Map Definition ---
-TYPE_MAP = {
-    'id': int, 'dateUTC': 'date', 'siteInstanceID': int, 'countryCode': str,
-    'status': str, 'dataSource': str, 'targetRefID': str, 'title': str,
-    'userID': int, 'userEmail': str, 'trafficSource': str, 'registerSource': str,
-    'isSearchable': int, 'hasJbeAlert': int, 'isDataFromCV': int, 'deviceType': str,
-    'timeCreatedUTC': 'datetime', 'timeUpdatedUTC': 'datetime', 'timeModifiedDB': 'datetime',
-    'row_num': int
-}
+FAILED_LOG_PATH = 'failed_inserts_log.csv'
+BATCH_REPORT_PATH = 'mongo_batch_report.csv'  # One line per written batch (see print_batch_summary)
+
+# --- Streaming Settings ---
+CHUNK_SIZE = 500  # Starting batch size in CSV rows; BatchSizer tunes it from the measured writes
+MAX_PENDING_CHUNKS = 8  # Validated chunks waiting for the writers; bounds memory regardless of file size
+WORKERS = 4  # Batches in flight: parallel writer threads, each write on its own pooled connection
+
+# --- Batch Sizing (see BatchSizer) ---
+MIN_BATCH_SIZE = 100
+MAX_BATCH_SIZE = 100_000  # Server limit of operations in one bulk write (maxWriteBatchSize)
+MAX_BATCH_BYTES = 16 * 1024 * 1024  # Keeps a batch's documents within the 16MB BSON limit
+TARGET_BATCH_SECONDS = 0.5  # Aimed duration of one bulk write
+SIZE_SAMPLE = 20  # Documents of each batch encoded to estimate the document size
+
+# --- Checkpoint Settings (resumable runs, see Checkpoint) ---
+CHECKPOINT_PATH = f"{CSV_FILE_PATH}.mongo.checkpoint"
+
+# --- Index Settings (see ensure_indexes) ---
+# Compound indexes for the dashboard's access patterns: equality fields first, then the sort
+# field, then the range field.
+ID_INDEX = [('id', ASCENDING)]  # Unique, like the MySQL primary key: inserting an existing id fails
+INDEXES = [
+    ID_INDEX,  # Upserts by id; newest rows first (sort by id)
+    [('dateUTC', ASCENDING), ('countryCode', ASCENDING), ('status', ASCENDING)],  # Date-range counts (covering)
+    [('countryCode', ASCENDING), ('dateUTC', ASCENDING), ('status', ASCENDING)],  # One country over a date range
+    [('siteInstanceID', ASCENDING), ('id', DESCENDING)],  # One site, newest first
+    [('userID', ASCENDING), ('id', DESCENDING)],  # Latest row per user
+]
+BACKFILL_MIN_BYTES = 50 * 1024 * 1024  # Loading a CSV this large into an empty collection builds the indexes afterwards
+
+# --- Daily Summary (counts per day x site x country x status x device x source, see summary_updates) ---
+SUMMARY_COLLECTION = "jobseeker_daily_summary"
+SUMMARY_KEY = ['dateUTC', 'siteInstanceID', 'countryCode', 'status', 'deviceType', 'registerSource']
+SUMMARY_DEFAULTS = {'siteInstanceID': 0}  # Missing key values are counted as 0 / '', as in the MySQL table
 
 
 # ---------------------------
@@ -50,19 +85,382 @@ def safe_cast(value, target_type, column_name):
         raise Exception(f"Casting error for '{column_name}': {e}")
 
 
-def insert_data_from_csv_dynamic():
+def cast_column(values, target_type, column_name, first_row=0):
+    """
+    Casts one column of a chunk at once.
+
+    Integers and dates are parsed as arrays (fast_ints / fast_dates, dates built straight from the
+    parsed fields); only the values the fast path does not accept go through safe_cast, so every
+    accept/reject decision and error message is the same as casting cell by cell.
+
+    Returns:
+        tuple: (list of cast values, {position in chunk: error message})
+    """
+    if target_type not in (int, 'date', 'datetime'):
+        return [value if value and value.strip() else None for value in values], {}
+
+    texts = [value if value else '' for value in values]
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+    cast = [None] * len(values)
+    if target_type == int:
+        fast, numbers = fast_ints(texts, lengths)
+        cast = np.where(fast, numbers, 0).tolist()
+    else:
+        fast, *fields = fast_dates(texts, lengths, target_type == 'datetime')
+        positions = fast.nonzero()[0].tolist()
+        for position, parts in zip(positions, zip(*(field[fast].tolist() for field in fields))):
+            cast[position] = datetime(*parts)
+
+    errors = {}
+    for position in (~fast).nonzero()[0].tolist():
+        try:
+            cast[position] = safe_cast(values[position], target_type, column_name)
+        except (ValueError, Exception) as e:
+            errors[position] = str(e)
+    return cast, errors
+
+
+def read_valid_documents(csv_reader, valid_columns, failure_log, batch_sizer=None, first_row=0):
+    """
+    Generator over (index of the chunk's first CSV row, number of CSV rows, valid documents), with
+    chunks of the batch sizer's current size (see read_valid_chunks).
+    """
+    for first_row, csv_rows, valid in read_valid_chunks(csv_reader, valid_columns, failure_log, cast_column,
+                                                        CHUNK_SIZE, first_row, batch_sizer):
+        yield first_row, csv_rows, [dict(zip(valid_columns, values)) for values in valid]
+
+
+class BatchSizer:
+    """
+    Picks the number of CSV rows per chunk from the writes so far: as many documents as one
+    bulk write handles in TARGET_BATCH_SECONDS at the measured rate, capped by MAX_BATCH_SIZE
+    operations and MAX_BATCH_BYTES at the measured document size. Each write moves the size
+    by at most 2x, so one slow write does not collapse it.
+    """
+
+    def __init__(self, size=None):
+        self.size = size or CHUNK_SIZE
+        self.document_bytes = None
+        self._lock = threading.Lock()
+
+    def record(self, chunk, seconds):
+        sample = chunk[:SIZE_SAMPLE]
+        document_bytes = sum(len(bson.encode(document)) for document in sample) / len(sample)
+        with self._lock:
+            self.document_bytes = document_bytes if self.document_bytes is None \
+                else 0.8 * self.document_bytes + 0.2 * document_bytes
+            target = len(chunk) / max(seconds, 1e-3) * TARGET_BATCH_SECONDS
+            target = min(max(target, self.size / 2), self.size * 2)
+            limit = min(MAX_BATCH_SIZE, int(MAX_BATCH_BYTES // self.document_bytes))
+            self.size = int(min(max(target, MIN_BATCH_SIZE), limit))
+
+
+def print_batch_summary(tracker, elapsed):
+    """
+    Prints the throughput and failures of the written batches and writes one line per batch
+    (size, duration, failures) to BATCH_REPORT_PATH.
+    """
+    batches = sorted(tracker.batches, key=lambda batch: batch['chunk'])
+    if not batches:
+        return
+    with open(BATCH_REPORT_PATH, mode='w', newline='', encoding='utf-8') as report:
+        writer = csv.DictWriter(report, fieldnames=list(batches[0]) + ['docs_per_sec'])
+        writer.writeheader()
+        for batch in batches:
+            writer.writerow({**batch, 'docs_per_sec': round(batch['documents'] / batch['seconds'])
+                             if batch['seconds'] else ''})
+
+    sizes = np.array([batch['documents'] for batch in batches])
+    seconds = np.array([batch['seconds'] for batch in batches])
+    print(f"\n--- BATCH SUMMARY ({len(batches)} batches) ---")
+    print(f"Batch size: min {sizes.min()}, median {int(np.median(sizes))}, max {sizes.max()} documents")
+    print(f"Write time: median {np.median(seconds):.3f}s, max {seconds.max():.3f}s per batch "
+          f"({sizes.sum() / seconds.sum() if seconds.sum() else 0:.0f} docs/sec per writer, "
+          f"{tracker.inserted / elapsed if elapsed else 0:.0f} docs/sec overall)")
+    failed = [batch for batch in batches if batch['failed']]
+    print(f"Batches with failures: {len(failed)} ({tracker.failed_documents} documents)")
+    for batch in failed[:10]:
+        print(f"  chunk {batch['chunk']} (CSV row {batch['first_row'] + 1}): "
+              f"{batch['failed']} of {batch['documents']} documents failed")
+    print(f"Per-batch report written to '{BATCH_REPORT_PATH}'")
+    print("--------------------------------------------------")
+
+
+def ensure_indexes(collection, indexes=INDEXES):
+    """
+    Creates the 'indexes' that are missing. ID_INDEX is unique; an existing non-unique id index
+    is rebuilt as unique (which fails, keeping the old index, while the collection has duplicate ids).
+    """
+    existing = {tuple(info['key']): (name, info.get('unique', False))
+                for name, info in collection.index_information().items()}
+    created = []
+    for keys in indexes:
+        unique = keys == ID_INDEX
+        name, is_unique = existing.get(tuple(keys), (None, False))
+        if name is not None and is_unique == unique:
+            continue
+        if name is not None:
+            collection.drop_index(name)
+        try:
+            created.append(collection.create_index(keys, unique=unique))
+        except errors.OperationFailure:
+            if name is not None:
+                collection.create_index(keys)
+            raise
+    if created:
+        print(f"Created indexes: {', '.join(created)}")
+    return created
+
+
+def summary_updates(documents):
+    """
+    Daily summary increments of written documents: one upserting $inc per SUMMARY_KEY
+    combination. Documents without a dateUTC are not counted (the dashboard drops them).
+    """
+    counts = Counter(tuple(document.get(field) for field in SUMMARY_KEY)
+                     for document in documents if document.get('dateUTC') is not None)
+    return [UpdateOne({field: SUMMARY_DEFAULTS.get(field, '') if value is None else value
+                       for field, value in zip(SUMMARY_KEY, key)},
+                      {'$inc': {'applications': count}}, upsert=True)
+            for key, count in counts.items()]
+
+
+def ensure_summary_index(db):
+    """Unique index on the summary key: upserted increments and rebuild_summary's $merge match on it."""
+    db[SUMMARY_COLLECTION].create_index([(field, ASCENDING) for field in SUMMARY_KEY], unique=True)
+
+
+def rebuild_summary(db, start_date=None, end_date=None):
+    """
+    Recounts the daily summary from COLLECTION_NAME, for the dates between 'start_date' and
+    'end_date' only if given. Used after upserts (which may change documents that were already
+    counted) and as the --rebuild-summary command for existing data.
+    """
+    ensure_summary_index(db)
+    dates = {'$type': 'date'}
+    if start_date is not None:
+        dates.update({'$gte': start_date, '$lte': end_date})
+        db[SUMMARY_COLLECTION].delete_many({'dateUTC': {'$gte': start_date, '$lte': end_date}})
+    else:
+        db[SUMMARY_COLLECTION].delete_many({})
+    db[COLLECTION_NAME].aggregate([
+        {'$match': {'dateUTC': dates}},
+        {'$group': {'_id': {field: {'$ifNull': [f'${field}', SUMMARY_DEFAULTS.get(field, '')]}
+                            for field in SUMMARY_KEY},
+                    'applications': {'$sum': 1}}},
+        {'$project': {'_id': 0, **{field: f'$_id.{field}' for field in SUMMARY_KEY}, 'applications': 1}},
+        {'$merge': {'into': SUMMARY_COLLECTION, 'on': SUMMARY_KEY,
+                    'whenMatched': 'replace', 'whenNotMatched': 'insert'}},
+    ], allowDiskUse=True)
+    rows = db[SUMMARY_COLLECTION].count_documents({'dateUTC': dates})
+    print(f"Daily summary rebuilt ({rows} summary documents"
+          + (f" for {start_date:%Y-%m-%d} to {end_date:%Y-%m-%d})." if start_date is not None else ")."))
+
+
+def dashboard_queries(collection):
+    """
+    The dashboard's access patterns as (name, kind, arguments): 'find' queries as (filter,
+    projection, sort, limit), the latest-per-user dedup as an aggregation pipeline. Dates are the
+    last 30 days of data; site and country are those of the newest document, and the id window
+    starts at the lowest id of the newest 20000 documents.
+    """
+    newest = collection.find_one(sort=[('dateUTC', DESCENDING)]) or {}
+    window = list(collection.find({}, {'id': 1}).sort('id', DESCENDING).skip(19999).limit(1))
+    since_id = window[0]['id'] if window else 0
+    end = newest.get('dateUTC') or datetime.now()
+    start = datetime.fromordinal(end.toordinal() - 29)
+    dates = {'$gte': start, '$lte': end}
+    return [
+        ('Latest rows (load)', 'find', ({}, None, [('id', DESCENDING)], 20000)),
+        ('One site over the loaded id window (site refresh)', 'find',
+         ({'siteInstanceID': newest.get('siteInstanceID'), 'id': {'$gte': since_id}}, None,
+          [('id', DESCENDING)], 0)),
+        ('Counts by date / country / status', 'find',
+         ({'dateUTC': dates}, {'_id': 0, 'dateUTC': 1, 'countryCode': 1, 'status': 1}, None, 0)),
+        ('One country over a date range', 'find',
+         ({'countryCode': newest.get('countryCode'), 'dateUTC': dates},
+          {'_id': 0, 'dateUTC': 1, 'status': 1}, None, 0)),
+        ('Latest row per user', 'aggregate',
+         [{'$sort': {'userID': 1, 'id': -1}}, {'$group': {'_id': '$userID', 'id': {'$first': '$id'}}}]),
+    ]
+
+
+def _plan_summary(explain):
+    """Stages, index names and execution counters found anywhere in an explain() result."""
+    summary = {'stages': [], 'indexes': [], 'docs': 0, 'keys': 0, 'millis': 0}
+
+    def walk(node):
+        if isinstance(node, dict):
+            if 'stage' in node:
+                summary['stages'].append(node['stage'])
+            if 'indexName' in node:
+                summary['indexes'].append(node['indexName'])
+            if 'executionStats' in node and 'totalDocsExamined' in node['executionStats']:
+                stats = node['executionStats']
+                summary['docs'] += stats.get('totalDocsExamined', 0)
+                summary['keys'] += stats.get('totalKeysExamined', 0)
+                summary['millis'] += stats.get('executionTimeMillis', 0)
+            for key, value in node.items():
+                if key not in ('rejectedPlans', 'allPlansExecution'):
+                    walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+
+    walk(explain)
+    return summary
+
+
+def explain_queries(collection):
+    """Runs explain() (executionStats) on each dashboard query. Returns {name: plan summary}."""
+    plans = {}
+    for name, kind, arguments in dashboard_queries(collection):
+        if kind == 'find':
+            query_filter, projection, sort, limit = arguments
+            cursor = collection.find(query_filter, projection, limit=limit)
+            if sort:
+                cursor = cursor.sort(sort)
+            explain = cursor.explain()
+        else:
+            explain = collection.database.command('explain', {'aggregate': collection.name, 'pipeline': arguments,
+                                                              'cursor': {}}, verbosity='executionStats')
+        plans[name] = _plan_summary(explain)
+    return plans
+
+
+def index_report(collection):
+    """
+    Compares the query plans of the dashboard queries before and after ensure_indexes(): the
+    plan stages (COLLSCAN = collection scan, IXSCAN / DISTINCT_SCAN = index), the index used,
+    documents and keys examined and the execution time.
+    """
+    before = explain_queries(collection)
+    created = ensure_indexes(collection)
+    after = explain_queries(collection) if created else before
+
+    print(f"\n--- INDEX REPORT ({DB_NAME}.{COLLECTION_NAME}, {len(created)} indexes created) ---")
+    for name in before:
+        print(name)
+        for label, plan in (('before', before[name]), ('after', after[name])):
+            scan = 'COLLSCAN' if 'COLLSCAN' in plan['stages'] else \
+                '/'.join(sorted({stage for stage in plan['stages'] if 'SCAN' in stage})) or '-'
+            covered = ' (covered)' if 'FETCH' not in plan['stages'] and 'IXSCAN' in plan['stages'] else ''
+            print(f"  {label:>6}: {scan}{covered}, index: {', '.join(dict.fromkeys(plan['indexes'])) or 'none'}, "
+                  f"docs examined: {plan['docs']}, keys examined: {plan['keys']}, {plan['millis']} ms")
+    print("--------------------------------------------------")
+
+
+def write_chunks(worker_no, collection, chunk_queue, failure_log, tracker, batch_sizer, upsert=False,
+                 summary=None):
+    """
+    Writer thread: writes each chunk from the queue as one unordered bulk write until it receives
+    None. A bad document does not stop the rest of its chunk: each document the server rejects is
+    reported and written to the failure log. With 'upsert' each document replaces the fields of
+    the document with the same id (or is inserted), so writing a chunk twice is harmless.
+
+    With a 'summary' collection, the documents that were written increment the daily summary
+    after each chunk.
+    """
+    while True:
+        item = chunk_queue.get()
+        if item is None:
+            break
+        chunk_no, first_row, csv_rows, chunk = item
+        failed = []
+        started = time.perf_counter()
+        try:
+            if upsert:
+                collection.bulk_write([UpdateOne({'id': document['id']}, {'$set': document}, upsert=True)
+                                       for document in chunk], ordered=False)
+            else:
+                # insert_many is the MongoDB equivalent of executemany
+                collection.insert_many(chunk, ordered=False)
+        except errors.BulkWriteError as bwe:
+            # Unordered writes carry on past errors: only the documents in writeErrors were not written
+            for write_error in bwe.details.get('writeErrors', []):
+                document = chunk[write_error['index']]
+                print(f"Write Error for document id {document.get('id')} (chunk {chunk_no}): "
+                      f"{write_error.get('errmsg')}")
+                failed.append(document)
+        except Exception as e:
+            print(f"General Error in chunk {chunk_no}: {e}")
+            failed = chunk
+        seconds = time.perf_counter() - started
+
+        if summary is not None and len(failed) < len(chunk):
+            failed_ids = {id(document) for document in failed}
+            updates = summary_updates([document for document in chunk if id(document) not in failed_ids])
+            try:
+                if updates:
+                    summary.bulk_write(updates, ordered=False)
+            except errors.PyMongoError as e:
+                # The documents are written; python -m main_file.mongoconnector --rebuild-summary recounts them
+                print(f"Summary update failed for chunk {chunk_no}: {e}")
+
+        for document in failed:
+            failure_log.add_document(document)
+        if len(failed) < len(chunk):
+            batch_sizer.record(chunk, seconds)
+        tracker.finish(chunk_no, csv_rows, len(chunk) - len(failed), len(failed), seconds, first_row)
+        print(f"Worker {worker_no}: chunk {chunk_no} ({len(chunk)} documents from CSV row {first_row + 1}) "
+              f"written in {seconds:.2f}s, {len(failed)} failed; next batch size {batch_sizer.size}.")
+
+
+def insert_data_from_csv_dynamic(workers=WORKERS, upsert=False, restart=False):
+    """
+    Streams the CSV into MongoDB: chunks of rows are validated column-wise and put on a bounded
+    queue; 'workers' writer threads write the chunks while the next ones are validated. Chunks
+    start at CHUNK_SIZE rows and BatchSizer adapts them to the measured write times. At most
+    MAX_PENDING_CHUNKS chunks wait in memory, whatever the size of the file.
+
+    Progress is checkpointed to CHECKPOINT_PATH. A rerun on the same file skips the written
+    chunks (validating them again, so the rewritten failure log still lists their rejects) and
+    upserts the rest, since chunks after the checkpoint may already have been written by other
+    workers. 'upsert' does so for a full run too; 'restart' ignores the checkpoint.
+
+    Inserted documents increment the daily summary (SUMMARY_COLLECTION) chunk by chunk. An
+    upsert can replace documents that were already counted, so upsert runs instead recount the
+    summary for the dates they loaded once the load is done.
+    """
     client = None
-    successful_inserts = 0
-    failed_records = []
+    failure_log = None
+    tracker = ChunkTracker()
+    batch_sizer = BatchSizer()
+    started = time.perf_counter()
 
     try:
-        # 1. Connect to MongoDB
-        client = MongoClient(MONGO_URI)
+        # 0. Resume point of this file's content
+        checkpoint = Checkpoint.load(CHECKPOINT_PATH, CSV_FILE_PATH)
+        if restart:
+            checkpoint.chunks_done, checkpoint.rows_done, checkpoint.complete = 0, 0, False
+        if checkpoint.complete:
+            print(f"'{CSV_FILE_PATH}' was already loaded completely (see '{CHECKPOINT_PATH}'); "
+                  f"use --restart to load it again.")
+            return
+        skip_chunks = checkpoint.chunks_done
+        if skip_chunks:
+            upsert = True
+            print(f"Resuming from checkpoint: skipping {skip_chunks} written chunks "
+                  f"({checkpoint.rows_done} rows), upserting the rest.")
+        tracker = ChunkTracker(skip_chunks, checkpoint.rows_done, checkpoint)
+
+        # 1. Connect to MongoDB (the client pools one connection per concurrent writer)
+        client = MongoClient(MONGO_URI, maxPoolSize=max(workers, 1) + 2)
         db = client[DB_NAME]
         collection = db[COLLECTION_NAME]
         print("Connection to MongoDB successful.")
-
-        # 2. Read CSV and process data
+        # Indexes: maintained during the load, unless this is a large backfill into an empty
+        # collection, where one build afterwards is much cheaper than updating them per insert
+        defer_indexes = os.path.getsize(CSV_FILE_PATH) >= BACKFILL_MIN_BYTES \
+            and collection.estimated_document_count() == 0
+        if defer_indexes:
+            print("Large backfill into an empty collection: secondary indexes are built after the load.")
+            ensure_indexes(collection, [ID_INDEX])  # Rejects duplicate ids; each upsert looks its document up by id
+        else:
+            ensure_indexes(collection)
+        ensure_summary_index(db)
+
+        # 2. Read CSV and stream the data
         with open(CSV_FILE_PATH, mode='r', encoding='utf-8') as file:
             csv_reader = csv.DictReader(file)
 
@@ -79,58 +477,59 @@ def insert_data_from_csv_dynamic():
             # Dynamically determine valid columns
             VALID_COLUMNS = [col for col in COLUMNS if col in TYPE_MAP]
 
-            data_to_insert = []
-
-            for row_index, row_dict in enumerate(csv_reader, 1):
-                document = {}
-                is_row_valid = True
-
-                for col_name in VALID_COLUMNS:
-                    csv_value = row_dict.get(col_name, '')
-                    target_type = TYPE_MAP[col_name]
-
-                    try:
-                        casted_value = safe_cast(csv_value, target_type, col_name)
-                        # Build the dictionary (Document)
-                        document[col_name] = casted_value
-                    except (ValueError, Exception) as e:
-                        print(f"Data Validation Error in Row {row_index} (Column '{col_name}'): {e}")
-                        failed_records.append({'row': row_index, 'data': row_dict, 'error': str(e)})
-                        is_row_valid = False
-                        break
-
-                if is_row_valid:
-                    data_to_insert.append(document)
-
-            # 3. Execute batch insert (Chunking)
-            # MongoDB can handle large batches, but chunking is still good for memory management.
-            CHUNK_SIZE = 500
-
-            if data_to_insert:
-                print(f"Found {len(data_to_insert)} records to process.")
-
-                for i in range(0, len(data_to_insert), CHUNK_SIZE):
-                    chunk = data_to_insert[i:i + CHUNK_SIZE]
-                    try:
-                        # insert_many is the MongoDB equivalent of executemany
-                        # ordered=False allows the batch to continue even if one doc fails (optional)
-                        collection.insert_many(chunk, ordered=True)
-
-                        successful_inserts += len(chunk)
-                        print(f"Inserted chunk ending at row index {i + len(chunk)}.")
-
-                    except errors.BulkWriteError as bwe:
-                        # Handle partial batch failures
-                        print(f"\n--- MONGODB WRITE ERROR in CHUNK starting at {i} ---")
-                        print(bwe.details)
-                        # Add failed docs to log
-                        failed_records.append({'row': 'Chunk Error', 'data': 'See Mongo Logs', 'error': str(bwe)})
-                    except Exception as e:
-                        print(f"General Error in chunk: {e}")
-                        failed_records.append({'row': 'Chunk Error', 'data': 'Unknown', 'error': str(e)})
-
-            else:
+            failure_log = FailureLog(FAILED_LOG_PATH, COLUMNS)
+            first_row = skip_rows(csv_reader, checkpoint.rows_done, VALID_COLUMNS, failure_log, cast_column, CHUNK_SIZE)
+
+            # 3. Validate and write concurrently (bounded queue between the reader and the workers)
+            chunk_queue = queue.Queue(maxsize=MAX_PENDING_CHUNKS)
+            writers = [threading.Thread(target=write_chunks,
+                                        args=(worker_no, collection, chunk_queue, failure_log, tracker, batch_sizer,
+                                              upsert, None if upsert else db[SUMMARY_COLLECTION]),
+                                        daemon=True)
+                       for worker_no in range(1, max(workers, 1) + 1)]
+            for writer in writers:
+                writer.start()
+
+            queued_rows = 0
+            chunk_no = skip_chunks
+            loaded_dates = []  # Date range of the upserted documents, for the summary recount
+            try:
+                for chunk_no, (first_row, csv_rows, chunk) in enumerate(
+                        read_valid_documents(csv_reader, VALID_COLUMNS, failure_log, batch_sizer, first_row),
+                        skip_chunks + 1):
+                    if chunk:
+                        # Blocks while the writers are behind
+                        chunk_queue.put((chunk_no - 1, first_row, csv_rows, chunk))
+                        dates = [document['dateUTC'] for document in chunk if document.get('dateUTC') is not None]
+                        if upsert and dates:
+                            loaded_dates = [min(dates + loaded_dates[:1]), max(dates + loaded_dates[1:])]
+                    else:
+                        tracker.finish(chunk_no - 1, csv_rows, 0)
+                    queued_rows += len(chunk)
+            finally:
+                for _ in writers:
+                    chunk_queue.put(None)
+                for writer in writers:
+                    writer.join()
+
+            # Only a run in which every chunk was fully written marks the file as loaded
+            if tracker.committed_through == chunk_no and not tracker.failed:
+                checkpoint.save(chunk_no, tracker.rows_through, complete=True)
+            if defer_indexes:
+                built = time.perf_counter()
+                ensure_indexes(collection)
+                print(f"Indexes built in {time.perf_counter() - built:.1f}s.")
+            if loaded_dates:
+                rebuild_summary(db, *loaded_dates)
+
+            if not queued_rows:
                 print("No valid records found in CSV to insert.")
+            else:
+                print(f"{tracker.committed} of {chunk_no - skip_chunks} chunks fully written, "
+                      f"{tracker.failed} with failures "
+                      f"(chunks 0-{tracker.committed_through - 1} all written).")
+                if tracker.failed:
+                    print(f"Run the script again to retry from chunk {tracker.committed_through}.")
 
     except FileNotFoundError:
         print(f"\nERROR: CSV file not found at path: {CSV_FILE_PATH}")
@@ -149,26 +548,36 @@ def insert_data_from_csv_dynamic():
             client.close()
             print("MongoDB connection closed.")
 
-        if failed_records:
-            print(f"\n--- FAILED RECORDS SUMMARY ({len(failed_records)} total) ---")
-            try:
-                with open('failed_inserts_log.csv', mode='w', newline='', encoding='utf-8') as outfile:
-                    # Handle cases where 'data' might be a string (from chunk error) or dict
-                    first_data = failed_records[0]['data']
-                    fieldnames = first_data.keys() if isinstance(first_data, dict) else ['Error_Details']
-
-                    writer = csv.DictWriter(outfile, fieldnames=fieldnames)
-                    writer.writeheader()
-                    for record in failed_records:
-                        if isinstance(record['data'], dict):
-                            writer.writerow(record['data'])
-                        else:
-                            outfile.write(f"{record}\n")
-                print(f"Details of failed records written to 'failed_inserts_log.csv'")
-            except Exception as log_err:
-                print(f"Could not write log file: {log_err}")
-            print("--------------------------------------------------")
+        elapsed = time.perf_counter() - started
+        print(f"Inserted {tracker.inserted} documents in {elapsed:.1f}s "
+              f"({tracker.inserted / elapsed if elapsed else 0:.0f} docs/sec).")
+        print_batch_summary(tracker, elapsed)
+
+        if failure_log:
+            failure_log.close()
+            if failure_log.count:
+                print(f"\n--- FAILED RECORDS SUMMARY ({failure_log.count} total) ---")
+                print(f"Details of failed records written to '{FAILED_LOG_PATH}'")
+                print("--------------------------------------------------")
 
 
 if __name__ == "__main__":
-    insert_data_from_csv_dynamic()
\ No newline at end of file
+    # python -m main_file.mongoconnector [--workers N] [--upsert] [--restart]
+    # python -m main_file.mongoconnector --index-report  (create the indexes, comparing query plans before and after)
+    # python -m main_file.mongoconnector --rebuild-summary  (recount jobseeker_daily_summary from the loaded documents)
+    args = sys.argv[1:]
+    if '--rebuild-summary' in args:
+        summary_client = MongoClient(MONGO_URI)
+        try:
+            rebuild_summary(summary_client[DB_NAME])
+        finally:
+            summary_client.close()
+    elif '--index-report' in args:
+        report_client = MongoClient(MONGO_URI)
+        try:
+            index_report(report_client[DB_NAME][COLLECTION_NAME])
+        finally:
+            report_client.close()
+    else:
+        workers = int(args[args.index('--workers') + 1]) if '--workers' in args else WORKERS
+        insert_data_from_csv_dynamic(workers, '--upsert' in args, '--restart' in args)
\ No newline at end of file
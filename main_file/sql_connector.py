@@ -1,8 +1,20 @@
 import pymysql
 from pymysql import Error
 import csv
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
 from datetime import datetime
 
+import numpy as np
+
+from main_file.ingest_common import (TYPE_MAP, Checkpoint, ChunkTracker, FailureLog, fast_dates, fast_ints,
+                                     read_valid_chunks, skip_rows)
+
 # --- Configuration ---
 DB_HOST = "127.0.0.1"
 DB_PORT = 3306
@@ -11,28 +23,53 @@ DB_PASSWORD = ""  # Set your XAMPP root password here if it's not empty
 DB_NAME = "jobdatabase"
 TABLE_NAME = "jobseeker_data"
 CSV_FILE_PATH = 'jobseeker_dashboard_updated2.csv'
+FAILED_LOG_PATH = 'failed_inserts_log.csv'
 
-# --- Type Map Definition ---
-# THIS IS CRITICAL: Define the expected Python type for each column header
-# that exists in your database schema.
-TYPE_MAP = {
-    'id': int, 'dateUTC': 'date', 'siteInstanceID': int, 'countryCode': str,
-    'status': str, 'dataSource': str, 'targetRefID': str, 'title': str,
-    'userID': int, 'userEmail': str, 'trafficSource': str, 'registerSource': str,
-    'isSearchable': int, 'hasJbeAlert': int, 'isDataFromCV': int, 'deviceType': str,
-    'timeCreatedUTC': 'datetime', 'timeUpdatedUTC': 'datetime', 'timeModifiedDB': 'datetime',
-    'row_num': int
-}
+# --- Streaming Settings ---
+CHUNK_SIZE = 500  # Commit every 500 rows
+MAX_PENDING_CHUNKS = 8  # Validated chunks waiting for the writers; bounds memory regardless of file size
+WORKERS = 4  # Parallel writer threads, each with its own MySQL connection
+
+# --- Checkpoint Settings (resumable runs, see Checkpoint) ---
+CHECKPOINT_PATH = f"{CSV_FILE_PATH}.mysql.checkpoint"
+
+# --- Daily Summary (counts per day x site x country x status x device x source, see summary_rows) ---
+SUMMARY_TABLE = "jobseeker_daily_summary"
+SUMMARY_KEY = ['dateUTC', 'siteInstanceID', 'countryCode', 'status', 'deviceType', 'registerSource']
+SUMMARY_TABLE_SQL = f"""
+CREATE TABLE IF NOT EXISTS {SUMMARY_TABLE} (
+    dateUTC DATE NOT NULL,
+    siteInstanceID INT NOT NULL DEFAULT 0,
+    countryCode VARCHAR(50) NOT NULL DEFAULT '',
+    status VARCHAR(50) NOT NULL DEFAULT '',
+    deviceType VARCHAR(50) NOT NULL DEFAULT '',
+    registerSource VARCHAR(100) NOT NULL DEFAULT '',
+    applications INT NOT NULL,
+    PRIMARY KEY (dateUTC, siteInstanceID, countryCode, status, deviceType, registerSource)
+)
+"""
+# Missing key values are stored as 0 / '' (primary key columns cannot be NULL)
+SUMMARY_DEFAULTS = {'siteInstanceID': 0}
+SUMMARY_UPSERT_SQL = (f"INSERT INTO {SUMMARY_TABLE} ({', '.join(SUMMARY_KEY)}, applications) "
+                      f"VALUES ({', '.join(['%s'] * (len(SUMMARY_KEY) + 1))}) "
+                      f"ON DUPLICATE KEY UPDATE applications = applications + VALUES(applications)")
+LOCK_RETRIES = 3  # Retries of a chunk whose summary update hit a deadlock / lock wait timeout
+LOCK_ERRORS = (1205, 1213)
+
+# --- Bulk Load Settings (LOAD DATA LOCAL INFILE, see bulk_load_from_csv) ---
+STAGING_TABLE = f"{TABLE_NAME}_staging"
 
 
 # ---------------------------
 
 def safe_cast(value, target_type, column_name, row_num):
     """Safely casts a string value to the required type (int, date, datetime)."""
-    # Treat empty strings as NULL, unless it's the ID column
+    # Treat empty strings as NULL, unless it's the ID column or the partitioning date (see sql_schema.py)
     if not value:
         if target_type == int and column_name == 'id':
             raise ValueError(f"ID cannot be empty.")
+        if column_name == 'dateUTC':
+            raise ValueError(f"dateUTC cannot be empty (the table is partitioned by it).")
         return None
 
     try:
@@ -53,24 +90,205 @@ def safe_cast(value, target_type, column_name, row_num):
         raise Exception(f"Casting error for '{column_name}': {e}")
 
 
-def insert_data_from_csv_dynamic():
-    cnx = None
-    successful_inserts = 0
-    failed_records = []
+def cast_column(values, target_type, column_name, first_row):
+    """
+    Casts one column of a chunk at once.
+
+    Integers and dates are parsed as arrays (fast_ints / fast_dates); only the values the fast
+    path does not accept go through safe_cast, so every accept/reject decision and error message
+    is the same as casting cell by cell.
+
+    Returns:
+        tuple: (list of cast values, {position in chunk: error message})
+    """
+    if target_type not in (int, 'date', 'datetime'):
+        return [value if value else None for value in values], {}
+
+    texts = [value if value else '' for value in values]
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+    if target_type == int:
+        fast, numbers = fast_ints(texts, lengths)
+        cast = np.where(fast, numbers, 0).tolist()
+    else:
+        fast = fast_dates(texts, lengths, target_type == 'datetime')[0]
+        cast = list(values)  # MySQL takes the validated text as is
+
+    errors = {}
+    for position in (~fast).nonzero()[0].tolist():
+        try:
+            cast[position] = safe_cast(values[position], target_type, column_name, first_row + position + 1)
+        except (ValueError, Exception) as e:
+            errors[position] = str(e)
+    return cast, errors
+
+
+def read_valid_rows(csv_reader, valid_columns, failure_log):
+    """Generator over the valid CSV rows as value tuples (see read_valid_chunks)."""
+    for _, _, valid in read_valid_chunks(csv_reader, valid_columns, failure_log, cast_column, CHUNK_SIZE):
+        yield from valid
+
+
+def summary_rows(chunk, valid_columns):
+    """
+    Daily summary increments of a chunk of value tuples: one (key values..., count) row per
+    SUMMARY_KEY combination, sorted so concurrent writers lock the summary rows in the same order.
+    """
+    positions = [valid_columns.index(col) if col in valid_columns else None for col in SUMMARY_KEY]
+    counts = Counter(tuple(values[position] if position is not None else None for position in positions)
+                     for values in chunk)
+    rows = []
+    for key, count in counts.items():
+        if key[0] is None:
+            continue  # Undated rows never reach the table (see safe_cast)
+        rows.append(tuple(SUMMARY_DEFAULTS.get(col, '') if value is None else value
+                          for col, value in zip(SUMMARY_KEY, key)) + (count,))
+    return sorted(rows, key=lambda row: tuple(str(value) for value in row))
+
+
+def summary_select(source_table, where=""):
+    """SELECT of the summary rows of 'source_table' (for INSERT ... SELECT)."""
+    columns = ', '.join(f"COALESCE({col}, {SUMMARY_DEFAULTS.get(col, repr(''))})" if col != 'dateUTC' else col
+                        for col in SUMMARY_KEY)
+    return (f"SELECT {columns}, COUNT(*) FROM {source_table} WHERE dateUTC IS NOT NULL {where}"
+            f"GROUP BY {', '.join(str(i) for i in range(1, len(SUMMARY_KEY) + 1))}")
+
+
+def rebuild_summary(cnx, start_date=None, end_date=None):
+    """
+    Recounts the daily summary from TABLE_NAME, for the dates between 'start_date' and
+    'end_date' only if given. Used after upserts (which may change existing rows, so increments
+    would be wrong) and as the --rebuild-summary command for existing data.
+    """
+    with cnx.cursor() as cur:
+        cur.execute(SUMMARY_TABLE_SQL)
+        if start_date is not None:
+            cur.execute(f"DELETE FROM {SUMMARY_TABLE} WHERE dateUTC BETWEEN %s AND %s", (start_date, end_date))
+            cur.execute(f"INSERT INTO {SUMMARY_TABLE} ({', '.join(SUMMARY_KEY)}, applications) "
+                        + summary_select(TABLE_NAME, "AND dateUTC BETWEEN %s AND %s "), (start_date, end_date))
+        else:
+            cur.execute(f"DELETE FROM {SUMMARY_TABLE}")
+            cur.execute(f"INSERT INTO {SUMMARY_TABLE} ({', '.join(SUMMARY_KEY)}, applications) "
+                        + summary_select(TABLE_NAME))
+        rows = cur.rowcount
+    cnx.commit()
+    print(f"Daily summary rebuilt ({rows} summary rows"
+          + (f" for {start_date} to {end_date})." if start_date is not None else ")."))
+
+
+def connect(**options):
+    """Opens a MySQL connection with the configured credentials."""
+    return pymysql.connect(
+        host=DB_HOST,
+        port=DB_PORT,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        database=DB_NAME,
+        **options
+    )
+
+
+def upsert_clause(valid_columns):
+    """ON DUPLICATE KEY UPDATE clause: a row whose id already exists is overwritten, so writing it twice is harmless."""
+    return " ON DUPLICATE KEY UPDATE " + ', '.join(f"{col} = VALUES({col})" for col in valid_columns if col != 'id')
+
+
+def insert_statement(valid_columns, upsert=False):
+    """INSERT statement for 'valid_columns' (an upsert with 'upsert')."""
+    sql = f"INSERT INTO {TABLE_NAME} ({', '.join(valid_columns)}) VALUES ({', '.join(['%s'] * len(valid_columns))})"
+    return sql + upsert_clause(valid_columns) if upsert else sql
+
 
+def write_chunks(worker_no, cnx, sql, chunk_queue, valid_columns, failure_log, tracker, summary=True):
+    """
+    Writer thread: inserts and commits each chunk from the queue on its own connection until it
+    receives None. With 'summary' the chunk's daily summary increments are upserted in the same
+    transaction, so the summary counts exactly the committed rows. A failing chunk is rolled back
+    (retried first if it only lost a lock race on the summary) and its rows are written to the
+    failure log.
+    """
+    cur = cnx.cursor()
     try:
-        # 1. Connect to the database
-        cnx = pymysql.connect(
-            host=DB_HOST,
-            port=DB_PORT,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_NAME
-        )
-        cur = cnx.cursor()
-        print("Connection to MySQL successful.")
+        while True:
+            item = chunk_queue.get()
+            if item is None:
+                break
+            chunk_no, first_row, csv_rows, chunk = item
+            try:
+                for attempt in range(LOCK_RETRIES + 1):
+                    try:
+                        cur.executemany(sql, chunk)
+                        if summary:
+                            cur.executemany(SUMMARY_UPSERT_SQL, summary_rows(chunk, valid_columns))
+                        cnx.commit()  # Commit after each chunk
+                        break
+                    except Error as err:
+                        if err.args[0] not in LOCK_ERRORS or attempt == LOCK_RETRIES:
+                            raise
+                        cnx.rollback()
+                        print(f"Worker {worker_no}: lock conflict on chunk {chunk_no}, retrying.")
+                tracker.finish(chunk_no, csv_rows, len(chunk))
+                print(f"Worker {worker_no}: committed chunk {chunk_no} ({len(chunk)} rows from CSV row {first_row + 1}).")
+            except Exception as err:
+                # If a chunk fails, log it and roll back that chunk's transaction
+                print(f"\n--- DATABASE ERROR in CHUNK {chunk_no} starting at row index {first_row} (worker {worker_no}) ---")
+                print(f"Error: {err}")
+                try:
+                    cnx.rollback()
+                except Error:
+                    pass
+                print("Chunk rolled back. Continuing to next chunk.")
+                for values in chunk:
+                    failure_log.add(dict(zip(valid_columns, values)))
+                tracker.finish(chunk_no, csv_rows, 0, len(chunk))
+    finally:
+        cur.close()
+
+
+def insert_data_from_csv_dynamic(workers=WORKERS, upsert=False, restart=False):
+    """
+    Streams the CSV into MySQL: chunks of CHUNK_SIZE rows are validated column-wise and put on a
+    bounded queue; 'workers' writer threads, each with its own connection, insert and commit the
+    chunks while the next ones are validated. At most MAX_PENDING_CHUNKS chunks wait in memory,
+    whatever the size of the file.
+
+    Progress is checkpointed to CHECKPOINT_PATH. A rerun on the same file skips the committed
+    chunks (validating them again, so the rewritten failure log still lists their rejects) and
+    upserts the rest, since chunks after the checkpoint may already have been committed by other
+    workers. 'upsert' does so for a full run too; 'restart' ignores the checkpoint.
+
+    Inserted chunks increment the daily summary (SUMMARY_TABLE) as they are committed. An
+    upsert can replace rows that were already counted, so upsert runs instead recount the
+    summary for the dates they loaded once the load is done.
+    """
+    connections = []
+    failure_log = None
+    tracker = ChunkTracker()
+    started = time.perf_counter()
+
+    try:
+        # 0. Resume point of this file's content
+        checkpoint = Checkpoint.load(CHECKPOINT_PATH, CSV_FILE_PATH)
+        if restart:
+            checkpoint.chunks_done, checkpoint.rows_done, checkpoint.complete = 0, 0, False
+        if checkpoint.complete:
+            print(f"'{CSV_FILE_PATH}' was already loaded completely (see '{CHECKPOINT_PATH}'); "
+                  f"use --restart to load it again.")
+            return
+        skip_chunks = checkpoint.chunks_done
+        if skip_chunks:
+            upsert = True
+            print(f"Resuming from checkpoint: skipping {skip_chunks} committed chunks "
+                  f"({checkpoint.rows_done} rows), upserting the rest.")
+        tracker = ChunkTracker(skip_chunks, checkpoint.rows_done, checkpoint)
+
+        # 1. Connect to the database (one connection per worker)
+        for _ in range(max(1, workers)):
+            connections.append(connect())
+        print(f"Connection to MySQL successful ({len(connections)} connections).")
+        with connections[0].cursor() as cur:
+            cur.execute(SUMMARY_TABLE_SQL)
 
-        # 2. Read CSV and process data
+        # 2. Read CSV and stream the data
         with open(CSV_FILE_PATH, mode='r', encoding='utf-8') as file:
             csv_reader = csv.DictReader(file)
 
@@ -89,55 +307,57 @@ def insert_data_from_csv_dynamic():
             VALID_COLUMNS = [col for col in COLUMNS if col in TYPE_MAP]
 
             # Construct SQL statement dynamically
-            sql = f"INSERT INTO {TABLE_NAME} ({', '.join(VALID_COLUMNS)}) VALUES ({', '.join(['%s'] * len(VALID_COLUMNS))})"
-
-            data_to_insert = []
-
-            for row_index, row_dict in enumerate(csv_reader, 1):
-                record_values = []
-                is_row_valid = True
+            sql = insert_statement(VALID_COLUMNS, upsert)
 
-                for col_name in VALID_COLUMNS:
-                    csv_value = row_dict.get(col_name, '')
-                    target_type = TYPE_MAP[col_name]
-
-                    try:
-                        casted_value = safe_cast(csv_value, target_type, col_name, row_index)
-                        record_values.append(casted_value)
-                    except (ValueError, Exception) as e:
-                        print(f"Data Validation Error in Row {row_index} (Column '{col_name}'): {e}")
-                        failed_records.append({'row': row_index, 'data': row_dict, 'error': str(e)})
-                        is_row_valid = False
-                        break
+            failure_log = FailureLog(FAILED_LOG_PATH, COLUMNS)
+            first_row = skip_rows(csv_reader, checkpoint.rows_done, VALID_COLUMNS, failure_log, cast_column, CHUNK_SIZE)
 
-                if is_row_valid:
-                    data_to_insert.append(tuple(record_values))
+            # 3. Validate and write concurrently (bounded queue between the reader and the workers)
+            chunk_queue = queue.Queue(maxsize=MAX_PENDING_CHUNKS)
+            writers = [threading.Thread(target=write_chunks,
+                                        args=(worker_no, cnx, sql, chunk_queue, VALID_COLUMNS, failure_log, tracker,
+                                              not upsert),
+                                        daemon=True)
+                       for worker_no, cnx in enumerate(connections, 1)]
+            for writer in writers:
+                writer.start()
 
-            # 3. Execute batch insert (with chunking for better resilience)
-            CHUNK_SIZE = 500  # Commit every 500 rows
+            queued_rows = 0
+            chunk_no = skip_chunks
+            date_position = VALID_COLUMNS.index('dateUTC')
+            loaded_dates = []  # Date range of the upserted rows, for the summary recount
+            try:
+                for chunk_no, (first_row, csv_rows, chunk) in enumerate(
+                        read_valid_chunks(csv_reader, VALID_COLUMNS, failure_log, cast_column, CHUNK_SIZE, first_row),
+                        skip_chunks + 1):
+                    if chunk:
+                        # Blocks while the writers are behind
+                        chunk_queue.put((chunk_no - 1, first_row, csv_rows, chunk))
+                        if upsert:
+                            dates = [values[date_position] for values in chunk]
+                            loaded_dates = [min(dates + loaded_dates[:1]), max(dates + loaded_dates[1:])]
+                    else:
+                        tracker.finish(chunk_no - 1, csv_rows, 0)
+                    queued_rows += len(chunk)
+            finally:
+                for _ in writers:
+                    chunk_queue.put(None)
+                for writer in writers:
+                    writer.join()
 
-            if data_to_insert:
-                print(f"Found {len(data_to_insert)} records to process.")
-
-                for i in range(0, len(data_to_insert), CHUNK_SIZE):
-                    chunk = data_to_insert[i:i + CHUNK_SIZE]
-                    try:
-                        cur.executemany(sql, chunk)
-                        cnx.commit()  # Commit after each chunk
-                        successful_inserts += len(chunk)
-                        print(f"Committed chunk ending at row index {i + len(chunk)}.")
-                    except Error as err:
-                        # If a chunk fails, log it and roll back that chunk's transaction
-                        print(f"\n--- DATABASE ERROR in CHUNK starting at row index {i} ---")
-                        print(f"Error Code: {err.args[0]}")
-                        print(f"Error Message: {err.args[1]}")
-                        cnx.rollback()
-                        print("Chunk rolled back. Continuing to next chunk.")
-                        # Move failed records to the failed list (simplified for this example)
-                        failed_records.extend([{'row': 'Chunk Error', 'data': chunk, 'error': err.args[1]}])
+            # Only a run in which every chunk was committed marks the file as loaded
+            if tracker.committed_through == chunk_no and not tracker.failed:
+                checkpoint.save(chunk_no, tracker.rows_through, complete=True)
+            if loaded_dates:
+                rebuild_summary(connections[0], *loaded_dates)
 
-            else:
+            if not queued_rows:
                 print("No valid records found in CSV to insert.")
+            else:
+                print(f"{tracker.committed} of {chunk_no - skip_chunks} chunks committed, {tracker.failed} failed "
+                      f"(chunks 0-{tracker.committed_through - 1} all committed).")
+                if tracker.failed:
+                    print(f"Run the script again to retry from chunk {tracker.committed_through}.")
 
     except FileNotFoundError:
         print(f"\nERROR: CSV file not found at path: {CSV_FILE_PATH}")
@@ -147,8 +367,6 @@ def insert_data_from_csv_dynamic():
         print(f"\n--- DATABASE CONNECTION/INITIAL ERROR ---")
         print(f"Error Code: {err.args[0]}")
         print(f"Error Message: {err.args[1]}")
-        if cnx:
-            cnx.rollback()
         print("-----------------------------------------")
 
     except Exception as e:
@@ -158,30 +376,174 @@ def insert_data_from_csv_dynamic():
         print("---------------------")
 
     finally:
-        # Close connection safely using PyMySQL's .open attribute
+        # Close connections safely using PyMySQL's .open attribute
+        for cnx in connections:
+            if cnx.open:
+                cnx.close()
+        if connections:
+            print("MySQL connections closed.")
+
+        elapsed = time.perf_counter() - started
+        print(f"Inserted {tracker.inserted} rows in {elapsed:.1f}s "
+              f"({tracker.inserted / elapsed if elapsed else 0:.0f} rows/sec).")
+
+        if failure_log:
+            failure_log.close()
+            if failure_log.count:
+                print(f"\n--- FAILED RECORDS SUMMARY ({failure_log.count} total) ---")
+                print(f"Details of failed records written to '{FAILED_LOG_PATH}'")
+                print("--------------------------------------------------")
+
+
+def _load_data_value(value):
+    """Formats one value for LOAD DATA's default text format (tab separated, backslash escaped, \\N = NULL)."""
+    if value is None:
+        return '\\N'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def write_clean_file(rows, path):
+    """Writes validated row tuples to 'path' in LOAD DATA format. Returns the number of rows written."""
+    written = 0
+    with open(path, mode='w', encoding='utf-8', newline='') as outfile:
+        for row in rows:
+            outfile.write('\t'.join(_load_data_value(value) for value in row))
+            outfile.write('\n')
+            written += 1
+    return written
+
+
+def bulk_load_from_csv(upsert=False):
+    """
+    Bulk mode: validates the CSV with TYPE_MAP into a cleaned temp file, loads it into a staging
+    table with LOAD DATA LOCAL INFILE, then copies it into TABLE_NAME with one INSERT ... SELECT,
+    so the main table receives either every loaded row or none. Rejected rows still go to the
+    failure log. Needs local_infile enabled on the server.
+
+    Being all-or-nothing it needs no checkpoint; 'upsert' updates rows whose id already exists,
+    so a rerun is safe.
+    """
+    cnx = None
+    failure_log = None
+    clean_path = None
+    loaded = 0
+    started = time.perf_counter()
+
+    try:
+        # 1. Validate the CSV into a cleaned file (streamed, nothing kept in memory)
+        with open(CSV_FILE_PATH, mode='r', encoding='utf-8') as file:
+            csv_reader = csv.DictReader(file)
+
+            COLUMNS = csv_reader.fieldnames
+            if not COLUMNS:
+                raise Exception("CSV file is empty or has no header row.")
+
+            MISSING_COLUMNS = [col for col in TYPE_MAP if col not in COLUMNS and col != 'row_num']
+            if MISSING_COLUMNS:
+                print(
+                    f"\nFATAL ERROR: The following columns required by the script/DB schema are MISSING from the CSV header: {MISSING_COLUMNS}")
+                return
+
+            VALID_COLUMNS = [col for col in COLUMNS if col in TYPE_MAP]
+            failure_log = FailureLog(FAILED_LOG_PATH, COLUMNS)
+
+            handle, clean_path = tempfile.mkstemp(prefix='jobseeker_clean_', suffix='.tsv')
+            os.close(handle)
+            valid_rows = write_clean_file(read_valid_rows(csv_reader, VALID_COLUMNS, failure_log), clean_path)
+
+        validated = time.perf_counter()
+        print(f"Validated {valid_rows} rows in {validated - started:.1f}s "
+              f"({valid_rows / (validated - started) if validated > started else 0:.0f} rows/sec).")
+        if not valid_rows:
+            print("No valid records found in CSV to insert.")
+            return
+
+        # 2. Load into a fresh staging table
+        cnx = connect(local_infile=True)
+        print("Connection to MySQL successful.")
+        column_list = ', '.join(VALID_COLUMNS)
+        with cnx.cursor() as cur:
+            cur.execute(SUMMARY_TABLE_SQL)
+            cur.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+            cur.execute(f"CREATE TABLE {STAGING_TABLE} LIKE {TABLE_NAME}")
+            cur.execute(
+                f"LOAD DATA LOCAL INFILE %s INTO TABLE {STAGING_TABLE} CHARACTER SET utf8mb4 "
+                f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' ({column_list})",
+                (clean_path,))
+            staged = cur.rowcount
+            print(f"Loaded {staged} rows into {STAGING_TABLE}.")
+
+            # 3. Copy into the main table in one transaction (all rows or none)
+            copy = f"INSERT INTO {TABLE_NAME} ({column_list}) SELECT {column_list} FROM {STAGING_TABLE}"
+            cur.execute(copy + upsert_clause(VALID_COLUMNS) if upsert else copy)
+            loaded = cur.rowcount
+            if not upsert:
+                # Daily summary increments in the same transaction
+                cur.execute(f"INSERT INTO {SUMMARY_TABLE} ({', '.join(SUMMARY_KEY)}, applications) "
+                            + summary_select(STAGING_TABLE)
+                            + " ON DUPLICATE KEY UPDATE applications = applications + VALUES(applications)")
+            cnx.commit()
+            if upsert:
+                cur.execute(f"SELECT MIN(dateUTC), MAX(dateUTC) FROM {STAGING_TABLE}")
+                rebuild_summary(cnx, *cur.fetchone())
+            cur.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+
+    except FileNotFoundError:
+        print(f"\nERROR: CSV file not found at path: {CSV_FILE_PATH}")
+
+    except Error as err:
+        print(f"\n--- DATABASE ERROR (bulk load) ---")
+        print(f"Error Code: {err.args[0]}")
+        print(f"Error Message: {err.args[1] if len(err.args) > 1 else ''}")
+        if cnx and cnx.open:
+            cnx.rollback()
+        print(f"Nothing was copied into {TABLE_NAME}; the staged rows are left in {STAGING_TABLE} for review.")
+        print("-----------------------------------------")
+
+    except Exception as e:
+        print(f"\n--- GENERAL ERROR ---")
+        print(f"An error occurred: {e}")
+        print("---------------------")
+
+    finally:
         if cnx and cnx.open:
-            cur.close()
             cnx.close()
             print("MySQL connection closed.")
+        if clean_path and os.path.exists(clean_path):
+            os.remove(clean_path)
+
+        elapsed = time.perf_counter() - started
+        print(f"Bulk loaded {loaded} rows in {elapsed:.1f}s ({loaded / elapsed if elapsed else 0:.0f} rows/sec).")
 
-        if failed_records:
-            print(f"\n--- FAILED RECORDS SUMMARY ({len(failed_records)} total) ---")
-            # Log failed records to a file for review
-            with open('failed_inserts_log.csv', mode='w', newline='', encoding='utf-8') as outfile:
-                # Try to get fieldnames from the first failed record's data dictionary
-                fieldnames = failed_records[0]['data'].keys() if failed_records[0]['data'] else ['Data']
-                writer = csv.DictWriter(outfile, fieldnames=fieldnames)
-                writer.writeheader()
-                for record in failed_records:
-                    writer.writerow(record['data'])
-            print(f"Details of failed records written to 'failed_inserts_log.csv'")
-            print("--------------------------------------------------")
+        if failure_log:
+            failure_log.close()
+            if failure_log.count:
+                print(f"\n--- FAILED RECORDS SUMMARY ({failure_log.count} total) ---")
+                print(f"Details of failed records written to '{FAILED_LOG_PATH}'")
+                print("--------------------------------------------------")
 
 
 if __name__ == "__main__":
-    insert_data_from_csv_dynamic()
+    # python -m main_file.sql_connector [--bulk] [--workers N] [--upsert] [--restart]
+    # python -m main_file.sql_connector --rebuild-summary  (recount jobseeker_daily_summary from the loaded rows)
+    args = sys.argv[1:]
+    if '--rebuild-summary' in args:
+        summary_cnx = connect()
+        try:
+            rebuild_summary(summary_cnx)
+        finally:
+            summary_cnx.close()
+    elif '--bulk' in args:
+        bulk_load_from_csv('--upsert' in args)
+    else:
+        workers = int(args[args.index('--workers') + 1]) if '--workers' in args else WORKERS
+        insert_data_from_csv_dynamic(workers, '--upsert' in args, '--restart' in args)
 
 """
+Original table definition. sql_schema.py creates and migrates the current one (primary key
+(id, dateUTC), secondary indexes, monthly partitions on dateUTC): python sql_schema.py --migrate
+
 CREATE TABLE jobseeker_data (
     id INT PRIMARY KEY,
     dateUTC DATE,
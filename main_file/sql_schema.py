@@ -0,0 +1,340 @@
+import pymysql
+from pymysql import Error
+from pymysql.cursors import DictCursor
+import sys
+from datetime import date
+
+# --- Configuration (same database as sql_connector.py) ---
+DB_HOST = "127.0.0.1"
+DB_PORT = 3306
+DB_USER = "root"
+DB_PASSWORD = ""  # Set your XAMPP root password here if it's not empty
+DB_NAME = "jobdatabase"
+TABLE_NAME = "jobseeker_data"
+
+# --- Partition Settings ---
+PARTITION_MONTHS_AHEAD = 3  # Empty monthly partitions kept ahead of the newest data (see maintain_partitions)
+FUTURE_PARTITION = "p_future"  # Catch-all for dates past the last monthly partition
+
+# --- Table Definition ---
+# dateUTC is part of the primary key because MySQL requires every unique key of a partitioned
+# table to contain the partitioning column. An id keeps its dateUTC, so (id, dateUTC) still
+# identifies a row and the connectors' upserts still hit the existing row.
+CREATE_TABLE_SQL = f"""
+CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
+    id INT NOT NULL,
+    dateUTC DATE NOT NULL,
+    siteInstanceID INT,
+    countryCode VARCHAR(50),
+    status VARCHAR(50),
+    dataSource VARCHAR(100),
+    targetRefID VARCHAR(100),
+    title VARCHAR(255),
+    userID INT,
+    userEmail VARCHAR(255),
+    trafficSource VARCHAR(100),
+    registerSource VARCHAR(100),
+    isSearchable INT,
+    hasJbeAlert INT,
+    isDataFromCV INT,
+    deviceType VARCHAR(50),
+    timeCreatedUTC DATETIME,
+    timeUpdatedUTC DATETIME,
+    timeModifiedDB DATETIME,
+    row_num INT,
+    PRIMARY KEY (id, dateUTC)
+)
+"""
+
+# --- Secondary Indexes: name -> columns ---
+# The dashboard filters and groups by date, country, status, device and registration source, and
+# dedups by userID / id. Where a query only needs these columns the index covers it, so MySQL
+# answers from the index without reading the rows.
+INDEXES = {
+    # Per-site refresh: WHERE siteInstanceID <=> ... AND id >= ... ORDER BY id DESC
+    'idx_site_id': ['siteInstanceID', 'id'],
+    # Daily counts by country / status / device (covering)
+    'idx_date_country_status_device': ['dateUTC', 'countryCode', 'status', 'deviceType'],
+    # Country-filtered counts over a date range (covering)
+    'idx_country_date_status_device': ['countryCode', 'dateUTC', 'status', 'deviceType'],
+    # Registration source counts (covering)
+    'idx_date_regsource_status': ['dateUTC', 'registerSource', 'status'],
+    # Latest row per user: GROUP BY userID with MAX(id) (covering)
+    'idx_user_id': ['userID', 'id'],
+}
+
+# --- Dashboard Queries (name, SQL); %(start)s / %(end)s are the last 30 days of data ---
+DASHBOARD_QUERIES = [
+    ('Load latest rows (load_data)',
+     f"SELECT * FROM {TABLE_NAME} ORDER BY id DESC LIMIT 20000"),
+    ('Load one site over the loaded id window (site refresh)',
+     f"SELECT * FROM {TABLE_NAME} WHERE (siteInstanceID <=> %(site)s) AND id >= %(since_id)s ORDER BY id DESC"),
+    ('Daily counts by country / status / device',
+     f"SELECT dateUTC, countryCode, status, deviceType, COUNT(*) FROM {TABLE_NAME} "
+     f"WHERE dateUTC BETWEEN %(start)s AND %(end)s GROUP BY dateUTC, countryCode, status, deviceType"),
+    ('Counts for one country',
+     f"SELECT dateUTC, status, COUNT(*) FROM {TABLE_NAME} "
+     f"WHERE countryCode = %(country)s AND dateUTC BETWEEN %(start)s AND %(end)s GROUP BY dateUTC, status"),
+    ('Registration source counts',
+     f"SELECT registerSource, status, COUNT(*) FROM {TABLE_NAME} "
+     f"WHERE dateUTC BETWEEN %(start)s AND %(end)s GROUP BY registerSource, status"),
+    ('Latest row per user (dedup)',
+     f"SELECT userID, MAX(id) FROM {TABLE_NAME} GROUP BY userID"),
+]
+
+
+def connect():
+    """Opens a MySQL connection with the configured credentials."""
+    return pymysql.connect(
+        host=DB_HOST,
+        port=DB_PORT,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        database=DB_NAME,
+        cursorclass=DictCursor
+    )
+
+
+def month_start(day, months_ahead=0):
+    """First day of the month of 'day', 'months_ahead' months later."""
+    month_index = day.year * 12 + day.month - 1 + months_ahead
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_definition(month):
+    """Monthly partition holding the dates of 'month' (a first day of the month)."""
+    return f"PARTITION p{month:%Y%m} VALUES LESS THAN ('{month_start(month, 1):%Y-%m-%d}')"
+
+
+def table_exists(cur):
+    cur.execute("SELECT COUNT(*) AS n FROM information_schema.tables WHERE table_schema = %s AND table_name = %s",
+                (DB_NAME, TABLE_NAME))
+    return cur.fetchone()['n'] > 0
+
+
+def existing_indexes(cur):
+    """Index name -> list of columns (in index order) of the live table."""
+    cur.execute("SELECT index_name AS name, column_name AS col FROM information_schema.statistics "
+                "WHERE table_schema = %s AND table_name = %s ORDER BY index_name, seq_in_index",
+                (DB_NAME, TABLE_NAME))
+    indexes = {}
+    for row in cur.fetchall():
+        indexes.setdefault(row['name'], []).append(row['col'])
+    return indexes
+
+
+def existing_partitions(cur):
+    """Partition names of the live table in order (empty if it is not partitioned)."""
+    cur.execute("SELECT partition_name AS name FROM information_schema.partitions "
+                "WHERE table_schema = %s AND table_name = %s AND partition_name IS NOT NULL "
+                "ORDER BY partition_ordinal_position", (DB_NAME, TABLE_NAME))
+    return [row['name'] for row in cur.fetchall()]
+
+
+def migrate_indexes(cur):
+    """
+    Brings the secondary indexes in line with INDEXES: missing ones are added, ones whose
+    columns changed are rebuilt. Indexes not in INDEXES are left alone.
+    """
+    current = existing_indexes(cur)
+    changes = []
+    for name, columns in INDEXES.items():
+        if current.get(name) == columns:
+            continue
+        if name in current:
+            changes.append(f"DROP INDEX {name}")
+        changes.append(f"ADD INDEX {name} ({', '.join(columns)})")
+    if changes:
+        # One ALTER TABLE, so the table is rebuilt once however many indexes change
+        cur.execute(f"ALTER TABLE {TABLE_NAME} {', '.join(changes)}")
+        print(f"Indexes migrated: {'; '.join(changes)}")
+    else:
+        print("Indexes up to date.")
+
+
+def partition_table(cur):
+    """
+    Range-partitions the table by month on dateUTC, from the month of the oldest row to
+    PARTITION_MONTHS_AHEAD months past the current one, plus FUTURE_PARTITION for anything later.
+    The primary key becomes (id, dateUTC), which requires dateUTC to be NOT NULL.
+    """
+    cur.execute(f"SELECT MIN(dateUTC) AS oldest, SUM(dateUTC IS NULL) AS undated FROM {TABLE_NAME}")
+    stats = cur.fetchone()
+    if stats['undated']:
+        print(f"\nERROR: {stats['undated']} rows have no dateUTC; they cannot be placed in a date partition.")
+        print("Fix or delete them, then rerun the migration. The table was left unpartitioned.")
+        return False
+
+    first = month_start(stats['oldest'] or date.today())
+    last = month_start(date.today(), PARTITION_MONTHS_AHEAD)
+    months = []
+    while first <= last:
+        months.append(first)
+        first = month_start(first, 1)
+
+    cur.execute(f"ALTER TABLE {TABLE_NAME} MODIFY dateUTC DATE NOT NULL, "
+                f"DROP PRIMARY KEY, ADD PRIMARY KEY (id, dateUTC)")
+    cur.execute(f"ALTER TABLE {TABLE_NAME} PARTITION BY RANGE COLUMNS(dateUTC) ("
+                + ", ".join(partition_definition(month) for month in months)
+                + f", PARTITION {FUTURE_PARTITION} VALUES LESS THAN (MAXVALUE))")
+    print(f"Table partitioned by month: {len(months)} partitions from p{months[0]:%Y%m} "
+          f"to p{months[-1]:%Y%m} plus {FUTURE_PARTITION}.")
+    return True
+
+
+def maintain_partitions(cur):
+    """
+    Keeps PARTITION_MONTHS_AHEAD empty monthly partitions ahead of today by splitting them off
+    FUTURE_PARTITION, so new data keeps landing in its own month. Run it from a monthly job.
+    """
+    partitions = existing_partitions(cur)
+    monthly = [name for name in partitions if name != FUTURE_PARTITION]
+    if not monthly or FUTURE_PARTITION not in partitions:
+        print("Table is not partitioned by month; run --migrate first.")
+        return
+
+    newest = date(int(monthly[-1][1:5]), int(monthly[-1][5:7]), 1)
+    target = month_start(date.today(), PARTITION_MONTHS_AHEAD)
+    months = []
+    while newest < target:
+        newest = month_start(newest, 1)
+        months.append(newest)
+    if not months:
+        print("Partitions up to date.")
+        return
+
+    cur.execute(f"ALTER TABLE {TABLE_NAME} REORGANIZE PARTITION {FUTURE_PARTITION} INTO ("
+                + ", ".join(partition_definition(month) for month in months)
+                + f", PARTITION {FUTURE_PARTITION} VALUES LESS THAN (MAXVALUE))")
+    print(f"Added partitions p{months[0]:%Y%m} to p{months[-1]:%Y%m}.")
+
+
+def migrate():
+    """Creates the table if it is missing, then migrates its indexes and monthly partitions."""
+    cnx = None
+    try:
+        cnx = connect()
+        print("Connection to MySQL successful.")
+        with cnx.cursor() as cur:
+            if not table_exists(cur):
+                cur.execute(CREATE_TABLE_SQL)
+                print(f"Created table {TABLE_NAME}.")
+
+            migrate_indexes(cur)
+
+            if existing_partitions(cur):
+                maintain_partitions(cur)
+            else:
+                partition_table(cur)
+        cnx.commit()
+
+    except Error as err:
+        print(f"\n--- DATABASE ERROR (migration) ---")
+        print(f"Error Code: {err.args[0]}")
+        print(f"Error Message: {err.args[1] if len(err.args) > 1 else ''}")
+        print("-----------------------------------------")
+
+    finally:
+        if cnx and cnx.open:
+            cnx.close()
+            print("MySQL connection closed.")
+
+
+def query_parameters(cur):
+    """
+    Parameters of DASHBOARD_QUERIES: the last 30 days of data, the most common site and country,
+    and the lowest id of the newest 20000 rows (the id window of load_data()).
+    """
+    cur.execute(f"SELECT MAX(dateUTC) AS newest FROM {TABLE_NAME}")
+    newest = cur.fetchone()['newest'] or date.today()
+    cur.execute(f"SELECT siteInstanceID AS site, COUNT(*) AS n FROM {TABLE_NAME} "
+                f"GROUP BY siteInstanceID ORDER BY n DESC LIMIT 1")
+    site = cur.fetchone()
+    cur.execute(f"SELECT countryCode AS country, COUNT(*) AS n FROM {TABLE_NAME} "
+                f"GROUP BY countryCode ORDER BY n DESC LIMIT 1")
+    country = cur.fetchone()
+    cur.execute(f"SELECT MIN(id) AS since_id FROM (SELECT id FROM {TABLE_NAME} ORDER BY id DESC LIMIT 20000) AS latest")
+    since_id = cur.fetchone()['since_id'] or 0
+    return {'start': date.fromordinal(newest.toordinal() - 29), 'end': newest,
+            'site': site['site'] if site else 0, 'country': country['country'] if country else '',
+            'since_id': since_id}
+
+
+def explain_report():
+    """
+    Runs EXPLAIN on each of DASHBOARD_QUERIES and prints, per query, the index used, whether the
+    index covers it, the partitions read and the estimated rows. A query on no index is flagged
+    as a FULL SCAN; a date-bounded query reading every partition is flagged as NOT PRUNED.
+
+    Returns:
+        list: One dict per query (name, key, covering, partitions, rows, verdict).
+    """
+    cnx = None
+    report = []
+    try:
+        cnx = connect()
+        with cnx.cursor() as cur:
+            all_partitions = existing_partitions(cur)
+            params = query_parameters(cur)
+
+            print(f"\n--- EXPLAIN REPORT ({TABLE_NAME}, dates {params['start']} to {params['end']}) ---")
+            for name, sql in DASHBOARD_QUERIES:
+                cur.execute(f"EXPLAIN {sql}", params)
+                plan = [row for row in cur.fetchall() if row.get('table') == TABLE_NAME]
+                if not plan:
+                    continue
+                step = plan[0]
+                partitions = (step.get('partitions') or '').split(',') if step.get('partitions') else []
+                extra = step.get('Extra') or ''
+                verdict = "OK"
+                if not step.get('key'):
+                    verdict = "FULL SCAN"
+                elif 'dateUTC BETWEEN' in sql and all_partitions and len(partitions) >= len(all_partitions):
+                    verdict = "NOT PRUNED"
+
+                entry = {'name': name, 'key': step.get('key'), 'covering': 'Using index' in extra,
+                         'partitions': len(partitions), 'rows': step.get('rows'), 'verdict': verdict}
+                report.append(entry)
+                print(f"{verdict:>10} | {name}")
+                print(f"{'':>10} | index: {entry['key'] or 'none'}{' (covering)' if entry['covering'] else ''}, "
+                      f"partitions: {entry['partitions'] or '-'} of {len(all_partitions) or '-'}, "
+                      f"type: {step.get('type')}, est. rows: {entry['rows']}")
+            print("--------------------------------------------------")
+
+    except Error as err:
+        print(f"\n--- DATABASE ERROR (explain) ---")
+        print(f"Error Code: {err.args[0]}")
+        print(f"Error Message: {err.args[1] if len(err.args) > 1 else ''}")
+        print("-----------------------------------------")
+
+    finally:
+        if cnx and cnx.open:
+            cnx.close()
+    return report
+
+
+def run_maintenance():
+    """Entry point of --maintain: adds the upcoming monthly partitions."""
+    cnx = None
+    try:
+        cnx = connect()
+        with cnx.cursor() as cur:
+            maintain_partitions(cur)
+        cnx.commit()
+    except Error as err:
+        print(f"\n--- DATABASE ERROR (maintenance) ---")
+        print(f"Error: {err}")
+    finally:
+        if cnx and cnx.open:
+            cnx.close()
+
+
+if __name__ == "__main__":
+    # python sql_schema.py [--migrate] [--maintain] [--explain]  (no option: --migrate --explain)
+    args = sys.argv[1:] or ['--migrate', '--explain']
+    if '--migrate' in args:
+        migrate()
+    if '--maintain' in args:
+        run_maintenance()
+    if '--explain' in args:
+        explain_report()